@@ -0,0 +1,6 @@
+# benchmarks/__init__.py
+# Benchmark suite: python -m benchmarks --help
+from .harness import (
+    Benchmark, BENCHMARKS, benchmark, measure, calibrate, run_benchmarks,
+    load_results, save_results, compare, DEFAULT_TOLERANCE
+)
@@ -0,0 +1,134 @@
+# benchmarks/__main__.py
+# python -m benchmarks [--level micro|macro|integration] [--filter node.] [--quick]
+#                      [--output results.json] [--baseline FILE] [--save-baseline]
+# Exits 1 when a benchmark is slower than its baseline by more than its
+# tolerance on every attempt (first run + --retries re-runs of that benchmark)
+import argparse
+import os
+import sys
+import tempfile
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+def _isolate_environment():
+    """
+    Scratch SQLite file and quiet background work, set before `src` is
+    imported (models.py builds its engines at import time)
+    """
+    scratch = tempfile.mkdtemp(prefix="delivergraph-bench-")
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+    os.environ.pop('READ_DATABASE_URL', None)
+    # Timings must not include outbox sends, archiving or write-behind flushes
+    os.environ['NOTIFICATION_OUTBOX_WORKERS'] = '0'
+    os.environ['ARCHIVE_INTERVAL_SECONDS'] = '0'
+    os.environ['WRITE_BEHIND_ENABLED'] = 'false'
+    os.environ['QUOTE_CACHE_ENABLED'] = 'false'
+    os.environ['WORKFLOW_MODE'] = 'graph'
+    return scratch
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="DeliverGraph AI benchmark suite")
+    parser.add_argument("--level", action="append", choices=("micro", "macro", "integration"),
+                        help="Only run this level (repeatable)")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="Fewer, shorter rounds (smoke run, noisier)")
+    parser.add_argument("--output", help="Write the results JSON here")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write the results to --baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float,
+                        help="Allowed slowdown for every benchmark (default: per benchmark, "
+                             "BENCH_TOLERANCE for pure-Python ones)")
+    parser.add_argument("--repeat", type=int,
+                        help="Run the suite this many times and keep each benchmark's median run "
+                             "(default 3 with --save-baseline, else 1)")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="Re-run a benchmark that looks regressed this many times before failing")
+    parser.add_argument("--absolute", action="store_true",
+                        help="Compare raw seconds instead of calibration-normalized times")
+    args = parser.parse_args(argv)
+
+    scratch = _isolate_environment()
+
+    from src.database.models import init_db
+    from .harness import BENCHMARKS, run_benchmarks, merge_results
+    from . import suite
+
+    selected = [
+        bench for bench in BENCHMARKS
+        if (not args.level or bench.level in args.level) and args.filter in bench.name
+    ]
+    if not selected:
+        print("❌ No benchmarks match")
+        return 2
+
+    rounds, min_time = (3, 0.02) if args.quick else (9, 0.1)
+    print(f"📁 Scratch database: {scratch}")
+    init_db()
+    suite.seed_database()
+
+    repeat = args.repeat or (3 if args.save_baseline else 1)
+    runs = []
+    try:
+        for run in range(repeat):
+            print(f"\n⏱️ Running {len(selected)} benchmarks ({rounds} rounds, ≥{min_time}s each)"
+                  + (f", run {run + 1}/{repeat}" if repeat > 1 else ""))
+            runs.append(run_benchmarks(selected, rounds, min_time))
+        document, result = _check(args, merge_results(runs), selected, rounds, min_time)
+    finally:
+        suite.close_api_client()
+
+    if args.output:
+        from .harness import save_results
+        save_results(document, args.output)
+        print(f"💾 Results written to {args.output}")
+    return result
+
+def _check(args, document: dict, selected: list, rounds: int, min_time: float) -> tuple:
+    """Save or compare against the baseline; returns (final results, exit code)"""
+    from .harness import (DEFAULT_TOLERANCE, run_benchmarks, compare, best_results,
+                          print_comparison, load_results, save_results, python_version_note)
+
+    if args.save_baseline:
+        save_results(document, args.baseline)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+        return document, 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠️ No baseline at {args.baseline}; run with --save-baseline to create one")
+        return document, 0
+
+    baseline = load_results(args.baseline)
+    tolerances = {} if args.tolerance is not None else {
+        bench.name: bench.tolerance for bench in selected if bench.tolerance is not None
+    }
+    default_tolerance = args.tolerance if args.tolerance is not None else DEFAULT_TOLERANCE
+    rows = compare(document, baseline, tolerances, default_tolerance, normalize=not args.absolute)
+
+    # A slow round on a busy machine is not a regression: re-measure
+    # suspects and keep their best run
+    for attempt in range(args.retries):
+        suspects = {row['name'] for row in rows if row['status'] == 'regressed'}
+        if not suspects:
+            break
+        print(f"\n🔁 Re-running {len(suspects)} suspect benchmark(s), attempt {attempt + 1}/{args.retries}")
+        rerun = run_benchmarks([bench for bench in selected if bench.name in suspects], rounds, min_time)
+        document = best_results([document, rerun])
+        rows = compare(document, baseline, tolerances, default_tolerance, normalize=not args.absolute)
+
+    print(f"\n📊 Compared with {args.baseline}")
+    note = python_version_note(baseline)
+    if note:
+        print(note)
+    print_comparison(rows)
+
+    regressed = [row['name'] for row in rows if row['status'] == 'regressed']
+    if regressed:
+        print(f"\n❌ {len(regressed)} benchmark(s) slower than the baseline allows: {', '.join(regressed)}")
+        return document, 1
+    print("\n✅ No regressions")
+    return document, 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+# benchmarks/harness.py
+from datetime import datetime, timezone
+from statistics import median, pstdev
+import contextlib
+import io
+import json
+import os
+import platform
+import time
+
+# ============ SETTINGS ============
+# A benchmark regresses when its normalized median is more than
+# tolerance slower than the baseline (per-benchmark override in suite.py)
+DEFAULT_TOLERANCE = float(os.getenv('BENCH_TOLERANCE', '0.25'))
+RESULTS_SCHEMA = 1
+
+class Benchmark:
+    """
+    One named measurement
+    factory() does the setup and returns the zero-argument callable to time
+    """
+
+    def __init__(self, name: str, level: str, factory, tolerance: float = None):
+        self.name = name
+        self.level = level
+        self.factory = factory
+        self.tolerance = tolerance
+
+BENCHMARKS = []
+
+def benchmark(name: str, level: str, tolerance: float = None):
+    """Register a benchmark factory under name"""
+    def register(factory):
+        BENCHMARKS.append(Benchmark(name, level, factory, tolerance))
+        return factory
+    return register
+
+# ============ TIMING ============
+
+def measure(func, rounds: int = 5, min_time: float = 0.1, reference: dict = None) -> dict:
+    """
+    Time func like timeit.autorange: loops per round double until a round
+    takes at least min_time, then `rounds` rounds are recorded
+    Returns seconds per call (median, min, stdev) plus rounds/loops
+    reference ({"func", "loops"}) is timed right before every round and
+    "normalized" is the median of the per-round ratios: machine speed
+    drifts between (and during) runs, neighbouring rounds drift together
+    """
+    # Nodes and CRUD helpers print progress; keep it out of the timings
+    with contextlib.redirect_stdout(io.StringIO()) as sink:
+        func()
+        loops = 1
+        while True:
+            elapsed = _run(func, loops)
+            if elapsed >= min_time or loops >= 1 << 20:
+                break
+            loops *= 2
+            sink.seek(0)
+            sink.truncate()
+        samples = []
+        ratios = []
+        for _ in range(rounds):
+            if reference:
+                unit = _run(reference["func"], reference["loops"]) / reference["loops"]
+            samples.append(_run(func, loops) / loops)
+            if reference:
+                ratios.append(samples[-1] / unit)
+            sink.seek(0)
+            sink.truncate()
+    stats = {
+        "median": median(samples),
+        "min": min(samples),
+        "stdev": pstdev(samples),
+        "rounds": rounds,
+        "loops": loops
+    }
+    if reference:
+        stats["normalized"] = median(ratios)
+    return stats
+
+def _run(func, loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return time.perf_counter() - start
+
+def _calibration_workload():
+    # Fixed pure-Python work; results are also stored in units of its
+    # time, so a baseline recorded on one machine still means something
+    # on another
+    total = 0
+    table = {}
+    for i in range(2000):
+        total += i * i
+        table[i & 63] = total
+    return sorted(table.values())
+
+def calibrate(rounds: int = 5, min_time: float = 0.05) -> dict:
+    return measure(_calibration_workload, rounds, min_time)
+
+# ============ RUN ============
+
+def run_benchmarks(benchmarks: list, rounds: int = 5, min_time: float = 0.1) -> dict:
+    """Measure every benchmark; returns the machine-readable results document"""
+    calibration = calibrate(rounds, min_time / 2)
+    reference = {"func": _calibration_workload, "loops": calibration["loops"]}
+    results = {}
+    for bench in benchmarks:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func = bench.factory()
+        stats = measure(func, rounds, min_time, reference)
+        stats["level"] = bench.level
+        results[bench.name] = stats
+        print(f"   {bench.name:<40} {_format_seconds(stats['median']):>10}/op "
+              f"(±{_format_seconds(stats['stdev'])}, {stats['loops']} loops × {rounds})")
+    return {
+        "schema": RESULTS_SCHEMA,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "calibration": calibration,
+        "results": results
+    }
+
+# ============ BASELINES ============
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_results(document: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def merge_results(documents: list) -> dict:
+    """
+    Several runs of the same suite folded into one document: per benchmark,
+    the run with the median normalized time (used for baselines)
+    """
+    merged = dict(documents[-1], results={}, runs=len(documents))
+    for name in documents[-1]["results"]:
+        runs = sorted(
+            (doc["results"][name] for doc in documents if name in doc["results"]),
+            key=lambda stats: stats["normalized"]
+        )
+        merged["results"][name] = runs[(len(runs) - 1) // 2]
+    return merged
+
+def best_results(documents: list) -> dict:
+    """Per benchmark, the fastest of several runs (re-checking a suspected regression)"""
+    best = dict(documents[-1], results={})
+    for doc in documents:
+        for name, stats in doc["results"].items():
+            if name not in best["results"] or stats["normalized"] < best["results"][name]["normalized"]:
+                best["results"][name] = stats
+    return best
+
+def compare(current: dict, baseline: dict, tolerances: dict = None,
+            default_tolerance: float = DEFAULT_TOLERANCE, normalize: bool = True) -> list:
+    """
+    One row per current benchmark:
+    {name, baseline, current, ratio, tolerance, status}
+    status: ok / regressed / improved / new (not in the baseline)
+    ratio > 1 means slower than the baseline
+    """
+    key = "normalized" if normalize else "median"
+    rows = []
+    for name, stats in current["results"].items():
+        tolerance = (tolerances or {}).get(name)
+        tolerance = default_tolerance if tolerance is None else tolerance
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            rows.append({"name": name, "baseline": None, "current": stats[key],
+                         "ratio": None, "tolerance": tolerance, "status": "new"})
+            continue
+        ratio = stats[key] / base[key]
+        if ratio > 1 + tolerance:
+            status = "regressed"
+        elif ratio < 1 / (1 + tolerance):
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append({"name": name, "baseline": base[key], "current": stats[key],
+                     "ratio": ratio, "tolerance": tolerance, "status": status})
+    return rows
+
+def print_comparison(rows: list):
+    icons = {"ok": "✅", "regressed": "❌", "improved": "🚀", "new": "🆕"}
+    for row in rows:
+        change = "" if row["ratio"] is None else f"{(row['ratio'] - 1) * 100:+.1f}%"
+        print(f"{icons[row['status']]} {row['name']:<40} {change:>8}  "
+              f"(limit +{row['tolerance'] * 100:.0f}%)")
+
+def _format_seconds(value: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if value >= scale:
+            return f"{value / scale:.2f} {unit}"
+    return f"{value / 1e-9:.0f} ns"
+
+def python_version_note(baseline: dict) -> str:
+    if baseline.get("python") and baseline["python"] != platform.python_version():
+        return f"⚠️ Baseline recorded on Python {baseline['python']}, running {platform.python_version()}"
+    return ""
@@ -0,0 +1,288 @@
+# benchmarks/suite.py
+# Benchmark definitions. Import only after DATABASE_URL points at a scratch
+# database (benchmarks/__main__.py does this): the CRUD, workflow and API
+# benchmarks write thousands of rows.
+from datetime import datetime, timedelta
+import itertools
+import uuid
+from .harness import benchmark
+
+# Levels
+#   micro:       one pricing node on a prepared state (no graph, no DB unless the node writes)
+#   macro:       a whole quote through the compiled LangGraph workflow, or a priced batch
+#   integration: CRUD calls on the SQLite file and HTTP endpoints through TestClient
+LEVELS = ("micro", "macro", "integration")
+
+# Allowed slowdown before a benchmark fails (default: BENCH_TOLERANCE, 25%)
+# Whole quotes run long enough to be steady, so they get the tightest limit;
+# DB and HTTP timings move more between runs than pure-Python ones
+QUOTE_TOLERANCE = 0.15
+IO_TOLERANCE = 0.40
+
+REQUEST = {
+    'user_id': 'bench-user',
+    'user_email': None,
+    'material_type': 'fragile',
+    'distance': 15.0,
+    'urgency': 'express',
+    'weight': 12.5,
+    'location_type': 'suburban'
+}
+
+SEED_ROWS = 2000
+
+def seed_database(rows: int = SEED_ROWS):
+    """Completed deliveries spread over the last 30 days, so pages and stats read real rows"""
+    from src.database.models import SessionLocal
+    from src.database.crud import bulk_create_deliveries
+
+    now = datetime.utcnow()
+    materials = ('standard', 'fragile', 'perishable', 'heavy')
+    db = SessionLocal()
+    try:
+        bulk_create_deliveries(db, [
+            dict(REQUEST,
+                 user_id=f"bench-user-{i % 50}",
+                 material_type=materials[i % 4],
+                 total_price=100.0 + i % 400,
+                 status='completed' if i % 10 else 'failed',
+                 created_at=now - timedelta(minutes=i * 20))
+            for i in range(rows)
+        ])
+    finally:
+        db.close()
+
+def _ticket_ids(prefix: str):
+    # Fresh ticket IDs for benchmarks that insert (primary key must not repeat)
+    counter = itertools.count()
+    run = uuid.uuid4().hex[:4].upper()
+    return lambda: f"{prefix}-{run}-{next(counter)}"
+
+# ============ MICRO: PRICING NODES ============
+
+def _prepared_state(upto: str) -> dict:
+    """State as the graph hands it to node `upto` (earlier nodes already ran)"""
+    from src.utils.pricing_config import get_pricing_table
+    from src.nodes.distance_node import distance_node
+    from src.nodes.material_node import material_pricing_node
+    from src.nodes.urgency_node import urgency_node
+    from src.nodes.weight_node import weight_volume_node
+    from src.nodes.location_node import location_node
+
+    state = dict(REQUEST, ticket_id="DEL-BENCHNODE", base_price=None, urgency_multiplier=None,
+                 weight_surcharge=None, location_adjustment=None, total_price=None,
+                 pricing_version=get_pricing_table().version, action_log=[],
+                 error_message=None, retry_count=0)
+    for name, node in (("distance", distance_node), ("material", material_pricing_node),
+                       ("urgency", urgency_node), ("weight", weight_volume_node),
+                       ("location", location_node)):
+        if name == upto:
+            break
+        state = node(state)
+    return state
+
+def _node_call(node, upto: str):
+    prepared = _prepared_state(upto)
+    log = prepared.pop('action_log')
+    # Nodes mutate the state and append to action_log; each call gets a fresh copy
+    return lambda: node(dict(prepared, action_log=list(log)))
+
+@benchmark("node.input", "micro", tolerance=IO_TOLERANCE)
+def bench_input_node():
+    from src.nodes.input_node import input_node
+    next_id = _ticket_ids("DEL-BNI")
+    # Validates, pins the pricing table and inserts the pending delivery
+    return lambda: input_node(dict(REQUEST, ticket_id=next_id(), action_log=[], retry_count=0))
+
+@benchmark("node.distance", "micro")
+def bench_distance_node():
+    from src.nodes.distance_node import distance_node
+    return _node_call(distance_node, "distance")
+
+@benchmark("node.material", "micro")
+def bench_material_node():
+    from src.nodes.material_node import material_pricing_node
+    return _node_call(material_pricing_node, "material")
+
+@benchmark("node.urgency", "micro")
+def bench_urgency_node():
+    from src.nodes.urgency_node import urgency_node
+    return _node_call(urgency_node, "urgency")
+
+@benchmark("node.weight", "micro")
+def bench_weight_node():
+    from src.nodes.weight_node import weight_volume_node
+    return _node_call(weight_volume_node, "weight")
+
+@benchmark("node.location", "micro")
+def bench_location_node():
+    from src.nodes.location_node import location_node
+    return _node_call(location_node, "location")
+
+@benchmark("node.final_price", "micro", tolerance=IO_TOLERANCE)
+def bench_final_price_node():
+    from src.database.models import SessionLocal
+    from src.database.crud import create_delivery
+    from src.nodes.final_price_node import final_price_node
+
+    # Updates a real row, like it does in the graph
+    prepared = dict(_prepared_state("final_price"), ticket_id=_ticket_ids("DEL-BNF")())
+    db = SessionLocal()
+    try:
+        create_delivery(db, REQUEST['user_id'], REQUEST, ticket_id=prepared['ticket_id'])
+    finally:
+        db.close()
+    log = prepared.pop('action_log')
+    return lambda: final_price_node(dict(prepared, action_log=list(log)))
+
+# ============ MACRO: WHOLE QUOTES ============
+
+@benchmark("workflow.invoke", "macro", tolerance=QUOTE_TOLERANCE)
+def bench_workflow_invoke():
+    from src.workflow import app as workflow_app
+    return lambda: workflow_app.invoke(dict(REQUEST))
+
+@benchmark("workflow.invoke_unit_of_work", "macro", tolerance=QUOTE_TOLERANCE)
+def bench_invoke_workflow():
+    from src.workflow import invoke_workflow
+    # What the API runs: one shared session, one commit per quote
+    return lambda: invoke_workflow(dict(REQUEST))
+
+@benchmark("workflow.invoke_fused", "macro", tolerance=QUOTE_TOLERANCE)
+def bench_fused_workflow():
+    from src.workflow import create_workflow
+    fused = create_workflow("fused")
+    return lambda: fused.invoke(dict(REQUEST))
+
+@benchmark("workflow.invalid_input", "macro", tolerance=QUOTE_TOLERANCE)
+def bench_invalid_input():
+    from src.workflow import app as workflow_app
+    # Rejected at input: error handler path, error_logs write
+    return lambda: workflow_app.invoke(dict(REQUEST, material_type='glass'))
+
+@benchmark("batch.price_100", "macro", tolerance=IO_TOLERANCE)
+def bench_price_batch():
+    from src.batch import price_batch
+    requests = [dict(REQUEST, distance=1.0 + i) for i in range(100)]
+    return lambda: price_batch(requests)
+
+# ============ INTEGRATION: CRUD ============
+
+def _crud(call):
+    from src.database.models import SessionLocal
+
+    def run():
+        db = SessionLocal()
+        try:
+            return call(db)
+        finally:
+            db.close()
+    return run
+
+@benchmark("crud.create_delivery", "integration", tolerance=IO_TOLERANCE)
+def bench_create_delivery():
+    from src.database.crud import create_delivery
+    next_id = _ticket_ids("DEL-BCC")
+    return _crud(lambda db: create_delivery(db, REQUEST['user_id'], REQUEST, ticket_id=next_id()))
+
+@benchmark("crud.update_delivery", "integration", tolerance=IO_TOLERANCE)
+def bench_update_delivery():
+    from src.database.crud import create_delivery, update_delivery
+    ticket_id = _ticket_ids("DEL-BCU")()
+    _crud(lambda db: create_delivery(db, REQUEST['user_id'], REQUEST, ticket_id=ticket_id))()
+    prices = itertools.cycle((352.5, 353.5))
+    return _crud(lambda db: update_delivery(
+        db, ticket_id, {'total_price': next(prices), 'status': 'completed'}, return_object=False
+    ))
+
+@benchmark("crud.get_delivery", "integration", tolerance=IO_TOLERANCE)
+def bench_get_delivery():
+    from src.database.crud import create_delivery, get_delivery
+    ticket_id = _ticket_ids("DEL-BCG")()
+    _crud(lambda db: create_delivery(db, REQUEST['user_id'], REQUEST, ticket_id=ticket_id))()
+    return _crud(lambda db: get_delivery(db, ticket_id))
+
+@benchmark("crud.list_deliveries_50", "integration", tolerance=IO_TOLERANCE)
+def bench_list_deliveries():
+    from src.database.crud import list_deliveries
+    return _crud(lambda db: list_deliveries(db, limit=50, status='completed'))
+
+@benchmark("crud.get_delivery_stats", "integration", tolerance=IO_TOLERANCE)
+def bench_get_delivery_stats():
+    from src.database.crud import get_delivery_stats
+    return _crud(get_delivery_stats)
+
+@benchmark("crud.bulk_create_100", "integration", tolerance=IO_TOLERANCE)
+def bench_bulk_create():
+    from src.database.crud import bulk_create_deliveries
+    next_id = _ticket_ids("DEL-BCB")
+    return _crud(lambda db: bulk_create_deliveries(
+        db, [dict(REQUEST, ticket_id=next_id()) for _ in range(100)]
+    ))
+
+# ============ INTEGRATION: API ============
+# One TestClient for the whole run: startup hooks run once, requests go
+# through the ASGI app in-process (no sockets)
+_client = None
+
+def api_client():
+    global _client
+    if _client is None:
+        from fastapi.testclient import TestClient
+        from src.api.main import api
+        _client = TestClient(api)
+        _client.__enter__()
+    return _client
+
+def close_api_client():
+    global _client
+    if _client is not None:
+        _client.__exit__(None, None, None)
+        _client = None
+
+def _request(method: str, url: str, expected: int = 200, **kwargs):
+    client = api_client()
+
+    def run():
+        response = client.request(method, url, **kwargs)
+        if response.status_code != expected:
+            raise RuntimeError(f"{method} {url} returned {response.status_code}: {response.text[:200]}")
+        return response
+    return run
+
+def _quoted_ticket() -> str:
+    response = _request("POST", "/api/calculate-price", json=REQUEST)()
+    return response.json()['ticket_id']
+
+@benchmark("api.calculate_price", "integration", tolerance=IO_TOLERANCE)
+def bench_api_calculate_price():
+    return _request("POST", "/api/calculate-price", json=REQUEST)
+
+@benchmark("api.calculate_price_batch_100", "integration", tolerance=IO_TOLERANCE)
+def bench_api_batch():
+    requests = [dict(REQUEST, distance=1.0 + i) for i in range(100)]
+    return _request("POST", "/api/calculate-price/batch", json={"requests": requests})
+
+@benchmark("api.delivery_detail", "integration", tolerance=IO_TOLERANCE)
+def bench_api_delivery_detail():
+    # Finished ticket: served from the ticket cache after the first read
+    return _request("GET", f"/api/delivery/{_quoted_ticket()}")
+
+@benchmark("api.delivery_detail_304", "integration", tolerance=IO_TOLERANCE)
+def bench_api_delivery_detail_304():
+    ticket_id = _quoted_ticket()
+    etag = _request("GET", f"/api/delivery/{ticket_id}")().headers["etag"]
+    return _request("GET", f"/api/delivery/{ticket_id}", expected=304,
+                    headers={"If-None-Match": etag})
+
+@benchmark("api.deliveries_100", "integration", tolerance=IO_TOLERANCE)
+def bench_api_deliveries():
+    return _request("GET", "/api/deliveries?limit=100")
+
+@benchmark("api.stats", "integration", tolerance=IO_TOLERANCE)
+def bench_api_stats():
+    return _request("GET", "/api/stats")
+
+@benchmark("api.dashboard_summary", "integration", tolerance=IO_TOLERANCE)
+def bench_api_dashboard_summary():
+    return _request("GET", "/api/dashboard/summary")
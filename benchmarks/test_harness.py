@@ -0,0 +1,31 @@
+# test_harness.py
+from benchmarks.harness import compare, measure, merge_results, best_results
+
+def _results(**normalized):
+    return {"results": {name: {"normalized": value, "median": value} for name, value in normalized.items()}}
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = _results(quote=1.0, node=1.0, stats=1.0)
+    current = _results(quote=1.2, node=1.2, stats=0.5, export=3.0)
+
+    rows = {row['name']: row for row in compare(current, baseline, {"quote": 0.15}, 0.25)}
+
+    assert rows['quote']['status'] == "regressed"     # +20% against its own 15% limit
+    assert rows['node']['status'] == "ok"             # +20% within the default 25%
+    assert rows['stats']['status'] == "improved"
+    assert rows['export']['status'] == "new"
+    assert round(rows['quote']['ratio'], 6) == 1.2
+
+def test_merge_keeps_median_run_and_best_keeps_fastest():
+    runs = [_results(quote=value) for value in (1.3, 1.0, 1.1)]
+    assert merge_results(runs)['results']['quote']['normalized'] == 1.1
+    assert merge_results(runs)['runs'] == 3
+    assert best_results(runs)['results']['quote']['normalized'] == 1.0
+
+def test_measure_reports_per_call_seconds():
+    calls = []
+    stats = measure(lambda: calls.append(1), rounds=3, min_time=0.001,
+                    reference={"func": lambda: None, "loops": 10})
+    assert stats['loops'] * 3 + 1 <= len(calls)
+    assert 0 < stats['min'] <= stats['median']
+    assert stats['normalized'] > 0
@@ -0,0 +1,12 @@
+# conftest.py
+import os
+import tempfile
+
+# Point the engine at a throwaway SQLite file before any `src` module is
+# imported, so test runs never write to the shipped delivergraph.db
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="delivergraph-test-")
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_TEST_DB_DIR, 'test.db')}"
+
+from src.database.models import init_db  # noqa: E402
+
+init_db()
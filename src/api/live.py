@@ -0,0 +1,182 @@
+# src/api/live.py
+from datetime import datetime, timedelta
+import asyncio
+import os
+import orjson
+from ..database.models import AsyncReadSessionLocal
+from ..database.change_feed import add_change_listener, remove_change_listener
+from ..database.crud import (
+    get_delivery_rows_async, get_delivery_stats_async, list_deliveries_async, SUMMARY_COLUMNS
+)
+
+def sse_message(event: str, data) -> bytes:
+    """One Server-Sent Events frame with a JSON payload"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+class DeliveryFeed:
+    """
+    Pushes committed delivery changes to every open dashboard
+    - Writers in this process report ticket IDs when they commit
+      (change_feed listener), so their frames go out at once
+    - Commits from other processes (uvicorn --workers, process executor)
+      never reach those listeners: every poll_interval seconds the pump
+      also reads the delivery_stats counters, and when they moved it sends
+      the rows created since the last frame
+    - One pump task loads the rows and the stats once per batch and hands
+      the same encoded frame to every subscriber, so N dashboards cost one
+      query, not N polls
+    - A subscriber that falls max_queue frames behind gets a 'resync'
+      frame and reloads the summary instead of blocking the others
+    """
+
+    def __init__(self, max_queue: int = 100, debounce: float = 0.2,
+                 heartbeat: float = 15.0, poll_interval: float = 1.0,
+                 recent_rows: int = 100, commit_lag: float = 5.0, session_factory=None):
+        self.max_queue = max_queue
+        self.debounce = debounce
+        self.heartbeat = heartbeat
+        self.poll_interval = poll_interval
+        self.recent_rows = recent_rows
+        # created_at is set before the commit; rows this much older than
+        # the last frame are still picked up
+        self.commit_lag = commit_lag
+        self.session_factory = session_factory or AsyncReadSessionLocal
+        self._subscribers = set()
+        self._pending = set()
+        self._last_stats = None
+        self._since = None
+        self._loop = None
+        self._wakeup = None
+        self._task = None
+        self.published = 0
+        self.resyncs = 0
+
+    # ============ CONTROL ============
+
+    def start(self, loop: asyncio.AbstractEventLoop = None):
+        """Start the pump on loop (the running loop by default)"""
+        if self._task is not None:
+            return self
+        self._loop = loop or asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._since = datetime.utcnow()
+        self._task = self._loop.create_task(self._pump())
+        add_change_listener(self.notify)
+        print("✅ Live delivery feed started")
+        return self
+
+    async def stop(self):
+        remove_change_listener(self.notify)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for queue in list(self._subscribers):
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "resyncs": self.resyncs
+        }
+
+    # ============ PUBLISH ============
+
+    def notify(self, ticket_ids):
+        """Change listener: called from the committing thread"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._add, set(ticket_ids))
+
+    def _add(self, ticket_ids: set):
+        self._pending.update(ticket_ids)
+        self._wakeup.set()
+
+    async def _pump(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval or None)
+                # Collect a burst of commits (e.g. a batch quote) into one frame
+                await asyncio.sleep(self.debounce)
+            except asyncio.TimeoutError:
+                pass    # poll for commits made by other processes
+            self._wakeup.clear()
+            ticket_ids, self._pending = self._pending, set()
+            if not self._subscribers:
+                continue
+            try:
+                frame = await self.load_frame(ticket_ids)
+            except Exception as e:
+                print(f"⚠️ Live feed query failed: {e}")
+                frame = sse_message("resync", {})
+            if frame is None:
+                continue
+            for queue in list(self._subscribers):
+                self._send(queue, frame)
+            self.published += 1
+
+    async def load_frame(self, ticket_ids) -> bytes:
+        """
+        Frame with the given tickets plus rows created since the last frame,
+        or None when nothing was reported and the counters didn't move
+        """
+        started = datetime.utcnow()
+        async with self.session_factory() as db:
+            stats = await get_delivery_stats_async(db)
+            if not ticket_ids and self._last_stats in (None, stats):
+                # First poll only records the counters
+                self._last_stats = stats
+                return None
+            rows = await get_delivery_rows_async(db, ticket_ids, SUMMARY_COLUMNS) if ticket_ids else []
+            if self._since is not None:
+                recent, _ = await list_deliveries_async(
+                    db, self.recent_rows, created_after=self._since, columns=SUMMARY_COLUMNS
+                )
+                known = {row['ticket_id'] for row in rows}
+                rows += [row for row in recent if row['ticket_id'] not in known]
+                rows.sort(key=lambda row: (row['created_at'], row['ticket_id']), reverse=True)
+        self._last_stats = stats
+        self._since = started - timedelta(seconds=self.commit_lag)
+        return sse_message("deliveries", {"deliveries": rows, "stats": stats})
+
+    def _send(self, queue: asyncio.Queue, frame):
+        try:
+            queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Too far behind: drop its backlog, tell it to reload
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(sse_message("resync", {}))
+            self.resyncs += 1
+
+    # ============ SUBSCRIBE ============
+
+    async def subscribe(self):
+        """Async iterator of SSE frames for one client (ends on stop())"""
+        queue = asyncio.Queue(self.max_queue)
+        self._subscribers.add(queue)
+        try:
+            # Tells the client how long to wait before reconnecting
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    frame = b": ping\n\n"     # keeps proxies from closing the stream
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self._subscribers.discard(queue)
+
+# ============ SHARED FEED ============
+delivery_feed = DeliveryFeed(
+    max_queue=int(os.getenv('DASHBOARD_STREAM_QUEUE', '100')),
+    debounce=float(os.getenv('DASHBOARD_STREAM_DEBOUNCE', '0.2')),
+    poll_interval=float(os.getenv('DASHBOARD_STREAM_POLL', '1.0'))
+)
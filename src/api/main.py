@@ -1,22 +1,45 @@
 # src/api/main.py
-from fastapi import FastAPI, HTTPException, status, Request, Form
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, status, Request, Response, Query, Form
+from fastapi.responses import HTMLResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, List
-from ..workflow import app as workflow_app
-from ..database.models import init_db, SessionLocal
-from ..database.crud import get_delivery, get_all_deliveries, create_user
+from datetime import datetime
+import csv
+import io
+import orjson
+from ..executor import get_workflow_executor
+from ..database.write_behind import get_active_write_behind
+from ..utils.action_log import render_action_log
+from ..utils.quote_cache import quote_cache
+from ..utils.metrics import render_metrics
+from ..database.ticket_cache import ticket_cache, etag_matches
+from .outbox import get_outbox_dispatcher, wake_outbox
+from .live import delivery_feed
+from ..utils.pricing_config import get_pricing_table, reload_pricing_table
+from ..database.models import init_db, ReadSessionLocal, AsyncReadSessionLocal, async_read_engine
+from ..database.archive import start_archive_scheduler, stop_archive_scheduler
+from ..database.crud import (
+    get_delivery, list_deliveries, get_delivery_stats,
+    get_delivery_async, list_deliveries_async, iter_deliveries, get_delivery_stats_async,
+    create_user, LIST_COLUMNS, SUMMARY_COLUMNS
+)
 import uvicorn
 import os
 
 # Initialize FastAPI
+# JSON endpoints build plain dicts from data the server produced itself and
+# return them as ORJSONResponse: FastAPI skips response_model validation and
+# jsonable_encoder for a returned Response, and orjson writes datetimes
+# natively (same text as .isoformat()). response_model stays for the docs.
 api = FastAPI(
     title="🚚 DeliverGraph AI",
     version="1.0.0",
-    description="Real-time Delivery Pricing Engine with Web UI"
+    description="Real-time Delivery Pricing Engine with Web UI",
+    default_response_class=ORJSONResponse
 )
 
 # Mount static files
@@ -51,7 +74,25 @@ class DeliveryResponse(BaseModel):
     action_log: List[str]
     breakdown: dict
 
-# Initialize database on application startup
+class BatchDeliveryRequest(BaseModel):
+    requests: List[DeliveryRequest]
+
+class BatchQuoteResult(BaseModel):
+    ticket_id: str
+    status: str
+    total_price: Optional[float] = None
+    breakdown: Optional[dict] = None
+    error_message: Optional[str] = None
+
+class BatchDeliveryResponse(BaseModel):
+    count: int
+    completed: int
+    failed: int
+    results: List[BatchQuoteResult]
+
+# Initialize database on application startup (creates missing tables and
+# applies pending schema migrations)
+@api.on_event("startup")
 async def startup():
     # Run blocking DB initialization in a thread to avoid blocking the event loop
     import asyncio
@@ -62,6 +103,37 @@ async def startup():
     print("📊 Web UI: http://localhost:8000")
     print("📖 API Docs: http://localhost:8000/docs")
 
+@api.on_event("startup")
+async def start_notification_outbox():
+    # Quote emails are sent from the outbox in the background
+    if int(os.getenv('NOTIFICATION_OUTBOX_WORKERS', '2')) > 0:
+        get_outbox_dispatcher().start()
+
+@api.on_event("startup")
+async def start_archiving():
+    # Moves old finished deliveries to the monthly archive (ARCHIVE_INTERVAL_SECONDS > 0)
+    start_archive_scheduler()
+
+@api.on_event("startup")
+async def start_live_feed():
+    # Pushes committed delivery changes to open dashboards (SSE)
+    if AsyncReadSessionLocal is not None:
+        delivery_feed.start()
+
+@api.on_event("shutdown")
+async def shutdown():
+    # Let in-flight quotes finish before the process exits, then flush
+    # anything still queued for write-behind
+    get_workflow_executor().shutdown(wait=True)
+    writer = get_active_write_behind()
+    if writer:
+        writer.close()
+    get_outbox_dispatcher().stop(timeout=5)
+    stop_archive_scheduler()
+    await delivery_feed.stop()
+    if async_read_engine is not None:
+        await async_read_engine.dispose()
+
 # ============ WEB UI ROUTES ============
 
 @api.get("/", response_class=HTMLResponse)
@@ -84,15 +156,42 @@ async def delivery_details_page(request: Request, ticket_id: str):
 
 # ============ API ROUTES ============
 
+async def read_db(async_read, sync_read):
+    """
+    Run a read on an AsyncReadSessionLocal session, or, for in-memory
+    databases (no async engine), on a ReadSessionLocal session in the threadpool
+    """
+    if AsyncReadSessionLocal is not None:
+        async with AsyncReadSessionLocal() as db:
+            return await async_read(db)
+    return await run_in_threadpool(_sync_read, sync_read)
+
+def _sync_read(sync_read):
+    db = ReadSessionLocal()
+    try:
+        return sync_read(db)
+    finally:
+        db.close()
+
+def _loaded_delivery(db, ticket_id: str):
+    # Like get_delivery_async: action_log is read before the session closes
+    delivery = get_delivery(db, ticket_id)
+    if delivery is not None:
+        delivery.action_log = delivery.action_log
+    return delivery
+
 @api.post("/api/calculate-price", response_model=DeliveryResponse)
 async def calculate_price(delivery_request: DeliveryRequest):
     """Calculate delivery price via API"""
     try:
         # Pass a Python dict to the workflow (not a JSON string). Using
         # Pydantic v2's `model_dump()` returns a dict suitable for the
-        # workflow.invoke() call.
+        # workflow.invoke() call. The blocking run happens on the workflow
+        # executor so concurrent requests overlap instead of queuing on the loop.
         payload = delivery_request.model_dump()
-        result = workflow_app.invoke(payload)
+        result = await get_workflow_executor().invoke(payload)
+        # The outbox row is committed now, let the dispatcher pick it up
+        wake_outbox()
         
         if result.get('error_message'):
             raise HTTPException(
@@ -111,13 +210,13 @@ async def calculate_price(delivery_request: DeliveryRequest):
             "location_adjustment": result.get('location_adjustment', 0),
         }
         
-        return DeliveryResponse(
-            ticket_id=result['ticket_id'],
-            total_price=result['total_price'],
-            status='completed',
-            action_log=result['action_log'],
-            breakdown=breakdown
-        )
+        return ORJSONResponse({
+            "ticket_id": result['ticket_id'],
+            "total_price": result['total_price'],
+            "status": 'completed',
+            "action_log": render_action_log(result['action_log']),
+            "breakdown": breakdown
+        })
     
     except HTTPException:
         raise
@@ -127,12 +226,66 @@ async def calculate_price(delivery_request: DeliveryRequest):
             detail={"error": "Internal Server Error", "message": str(e)}
         )
 
-@api.get("/api/delivery/{ticket_id}")
-async def get_delivery_details(ticket_id: str):
-    """Get delivery details by ticket ID"""
-    db = SessionLocal()
+@api.post("/api/calculate-price/batch", response_model=BatchDeliveryResponse)
+async def calculate_price_batch(batch_request: BatchDeliveryRequest):
+    """Calculate prices for many deliveries in one call"""
     try:
-        delivery = get_delivery(db, ticket_id)
+        results = await get_workflow_executor().price_batch(batch_request.requests)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"error": "Internal Server Error", "message": str(e)}
+        )
+    
+    items = []
+    for result in results:
+        if result.get('error_message'):
+            items.append({
+                "ticket_id": result['ticket_id'],
+                "status": 'failed',
+                "total_price": None,
+                "breakdown": None,
+                "error_message": result['error_message']
+            })
+        else:
+            items.append({
+                "ticket_id": result['ticket_id'],
+                "status": 'completed',
+                "total_price": result['total_price'],
+                "breakdown": {
+                    "base_price": result['base_price'],
+                    "urgency_multiplier": result['urgency_multiplier'],
+                    "weight_surcharge": result['weight_surcharge'],
+                    "location_adjustment": result['location_adjustment'],
+                },
+                "error_message": None
+            })
+    
+    completed = sum(1 for item in items if item["status"] == 'completed')
+    return ORJSONResponse({
+        "count": len(items),
+        "completed": completed,
+        "failed": len(items) - completed,
+        "results": items
+    })
+
+@api.get("/api/delivery/{ticket_id}")
+async def get_delivery_details(ticket_id: str, request: Request):
+    """
+    Get delivery details by ticket ID
+    - Finished tickets are served from ticket_cache after the first read
+    - Responses carry a strong ETag; If-None-Match with it returns 304
+    """
+    writer = get_active_write_behind()
+    queued = writer is not None and writer.get_pending(ticket_id) is not None
+    cached = None if queued else ticket_cache.get(ticket_id)
+    
+    if cached is None:
+        epoch = ticket_cache.epoch
+        delivery = await read_db(
+            lambda db: get_delivery_async(db, ticket_id),
+            lambda db: _loaded_delivery(db, ticket_id)
+        )
         
         if not delivery:
             raise HTTPException(
@@ -140,7 +293,7 @@ async def get_delivery_details(ticket_id: str):
                 detail=f"Delivery with ticket {ticket_id} not found"
             )
         
-        return {
+        body = orjson.dumps({
             "ticket_id": delivery.ticket_id,
             "user_id": delivery.user_id,
             "material_type": delivery.material_type,
@@ -150,30 +303,184 @@ async def get_delivery_details(ticket_id: str):
             "location_type": delivery.location_type,
             "total_price": delivery.total_price,
             "status": delivery.status,
-            "action_log": delivery.action_log,
-            "created_at": delivery.created_at.isoformat()
-        }
-    finally:
-        db.close()
+            "action_log": render_action_log(delivery.action_log),
+            "created_at": delivery.created_at
+        })
+        # Queued writes may still change the row, so don't cache it yet
+        cached = ticket_cache.put(ticket_id, None if queued else delivery.status, body, epoch)
+    
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @api.get("/api/deliveries")
-async def get_deliveries(limit: int = 50):
-    """Get all deliveries"""
-    db = SessionLocal()
+async def get_deliveries(limit: int = 50, cursor: Optional[str] = None,
+                         status_filter: Optional[str] = Query(None, alias="status"),
+                         user_id: Optional[str] = None,
+                         created_after: Optional[datetime] = None,
+                         created_before: Optional[datetime] = None):
+    """
+    Get deliveries, newest first
+    - Pass the X-Next-Cursor response header back as ?cursor= for the next page
+    - Optional filters: status, user_id, created_after, created_before
+    """
+    try:
+        page = dict(
+            limit=min(max(limit, 1), 1000), cursor=cursor, status=status_filter,
+            user_id=user_id, created_after=created_after, created_before=created_before,
+            columns=SUMMARY_COLUMNS
+        )
+        rows, next_cursor = await read_db(
+            lambda db: list_deliveries_async(db, **page),
+            lambda db: list_deliveries(db, **page)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return ORJSONResponse(rows, headers=headers)
+
+# Rows per chunk written to the socket by the export stream
+EXPORT_CHUNK_ROWS = 500
+
+def _export_lines(fmt: str, filters: dict):
+    """
+    Yield the export body chunk by chunk straight off the DB cursor
+    (a sync generator: StreamingResponse iterates it in the threadpool)
+    """
+    db = ReadSessionLocal()
     try:
-        deliveries = get_all_deliveries(db, limit)
-        return [{
-            "ticket_id": d.ticket_id,
-            "user_id": d.user_id,
-            "material_type": d.material_type,
-            "distance": d.distance,
-            "total_price": d.total_price,
-            "status": d.status,
-            "created_at": d.created_at.isoformat()
-        } for d in deliveries]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if fmt == "csv" else None
+        if writer:
+            writer.writerow(LIST_COLUMNS)
+        
+        for count, row in enumerate(iter_deliveries(db, **filters), start=1):
+            if writer:
+                row["created_at"] = row["created_at"].isoformat() if row["created_at"] else None
+                writer.writerow([row[column] for column in LIST_COLUMNS])
+            else:
+                buffer.write(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE).decode())
+            if count % EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
     finally:
         db.close()
 
+@api.get("/api/deliveries/export")
+async def export_deliveries(format: str = "ndjson",
+                            status_filter: Optional[str] = Query(None, alias="status"),
+                            user_id: Optional[str] = None,
+                            created_after: Optional[datetime] = None,
+                            created_before: Optional[datetime] = None):
+    """Stream every matching delivery as NDJSON or CSV (constant memory)"""
+    media_types = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+    if format not in media_types:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format: {format}. Must be: {', '.join(media_types)}"
+        )
+    
+    filters = {
+        "status": status_filter,
+        "user_id": user_id,
+        "created_after": created_after,
+        "created_before": created_before
+    }
+    return StreamingResponse(
+        _export_lines(format, filters),
+        media_type=media_types[format],
+        headers={"Content-Disposition": f"attachment; filename=deliveries.{format}"}
+    )
+
+@api.get("/api/stats")
+async def get_stats(exact: bool = False):
+    """Delivery counts and revenue (exact=true recomputes from the table)"""
+    return ORJSONResponse(await read_db(
+        lambda db: get_delivery_stats_async(db, exact=exact),
+        lambda db: get_delivery_stats(db, exact=exact)
+    ))
+
+@api.get("/api/dashboard/summary")
+async def get_dashboard_summary(limit: int = 100):
+    """
+    Everything the dashboard shows in one call
+    - stats: lifetime counters (same as /api/stats, cost independent of size)
+    - deliveries: newest rows for the table; next_cursor pages further
+      through /api/deliveries
+    """
+    limit = min(max(limit, 1), 1000)
+    
+    async def summary_async(db):
+        stats = await get_delivery_stats_async(db)
+        return stats, *await list_deliveries_async(db, limit, columns=SUMMARY_COLUMNS)
+    
+    def summary_sync(db):
+        return get_delivery_stats(db), *list_deliveries(db, limit, columns=SUMMARY_COLUMNS)
+    
+    stats, rows, next_cursor = await read_db(summary_async, summary_sync)
+    return ORJSONResponse({"stats": stats, "deliveries": rows, "next_cursor": next_cursor})
+
+@api.get("/api/dashboard/stream")
+async def stream_dashboard():
+    """
+    Server-Sent Events: a 'deliveries' frame ({deliveries, stats}) after
+    each commit that creates or updates deliveries, 'resync' if this
+    client fell behind and should reload /api/dashboard/summary
+    """
+    return StreamingResponse(
+        delivery_feed.subscribe(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api.get("/api/dashboard/stream/stats")
+async def get_dashboard_stream_stats():
+    """Open dashboard streams and frames published"""
+    return delivery_feed.stats()
+
+@api.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint: node, CRUD, SendGrid and quote latencies"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@api.get("/api/quote-cache/stats")
+async def get_quote_cache_stats():
+    """Quote cache hit/miss/eviction counters"""
+    return quote_cache.stats()
+
+@api.get("/api/ticket-cache/stats")
+async def get_ticket_cache_stats():
+    """Ticket detail cache hit/miss/eviction counters"""
+    return ticket_cache.stats()
+
+@api.get("/api/notifications/stats")
+async def get_notification_stats():
+    """Notification outbox counts by status and dispatcher counters"""
+    return get_outbox_dispatcher().stats()
+
+@api.get("/api/pricing")
+async def get_pricing():
+    """Active pricing table (version, source and rates)"""
+    table = get_pricing_table()
+    return {"version": table.version, "source": table.source, "config": table.config}
+
+@api.post("/api/pricing/reload")
+async def reload_pricing():
+    """Reload PRICING_CONFIG_PATH and swap it in without a restart"""
+    try:
+        table = reload_pricing_table()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Pricing reload failed: {str(e)}"
+        )
+    return {"version": table.version, "source": table.source}
+
 @api.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -3,7 +3,10 @@ from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 from dotenv import load_dotenv
 load_dotenv()
+import json
 import os
+import threading
+from ..utils.metrics import SENDGRID_METRICS
 
 class NotificationService:
     def __init__(self):
@@ -34,7 +37,8 @@ class NotificationService:
                 subject=subject,
                 html_content=content
             )
-            response = self.sendgrid_client.send(message)
+            with SENDGRID_METRICS.time("send"):
+                response = self.sendgrid_client.send(message)
             return {
                 "status": "success", 
                 "status_code": response.status_code,
@@ -115,4 +119,72 @@ class NotificationService:
         </html>
         """
         
-        return self.send_email(email, subject, content)
\ No newline at end of file
+        return self.send_email(email, subject, content)
+
+# ============ TRANSPORTS ============
+# Transports are what the outbox dispatcher (src/api/outbox.py) sends through.
+# send_batch() takes a list of outbox messages
+#   {"id", "ticket_id", "channel", "recipient", "payload"}
+# and returns one result per message, shaped like send_email():
+#   {"status": "success"/"skipped"/"error", "message": str}
+
+class SendGridTransport:
+    """Sends quote emails through SendGrid, one client reused for the whole batch"""
+    
+    def __init__(self, service: NotificationService = None):
+        self.service = service or NotificationService()
+    
+    def send_batch(self, messages: list) -> list:
+        results = []
+        for message in messages:
+            payload = message['payload']
+            results.append(self.service.send_price_quote_email(
+                email=message['recipient'],
+                ticket_id=message['ticket_id'],
+                total_price=payload.get('total_price') or 0,
+                breakdown=payload.get('breakdown') or {}
+            ))
+        return results
+
+class FileTransport:
+    """Appends each message as one JSON line to a local file (dev / testing)"""
+    
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv('NOTIFICATION_FILE_PATH', 'notifications.jsonl')
+        self._lock = threading.Lock()
+    
+    def send_batch(self, messages: list) -> list:
+        lines = "".join(json.dumps(message, default=str) + "\n" for message in messages)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError as e:
+            return [{"status": "error", "message": f"File sink failed: {str(e)}"}] * len(messages)
+        return [{"status": "success", "message": f"Written to {self.path}"}] * len(messages)
+
+class MemoryTransport:
+    """Keeps sent messages in memory (tests)"""
+    
+    def __init__(self):
+        self.sent = []
+        self.batches = 0
+        self._lock = threading.Lock()
+    
+    def send_batch(self, messages: list) -> list:
+        with self._lock:
+            self.sent.extend(messages)
+            self.batches += 1
+        return [{"status": "success", "message": "Stored in memory"}] * len(messages)
+
+TRANSPORTS = {
+    "sendgrid": SendGridTransport,
+    "file": FileTransport,
+    "memory": MemoryTransport,
+}
+
+def get_transport(name: str = None):
+    """Transport named by NOTIFICATION_TRANSPORT (default: sendgrid)"""
+    name = name or os.getenv('NOTIFICATION_TRANSPORT', 'sendgrid')
+    if name not in TRANSPORTS:
+        raise ValueError(f"Invalid notification transport: {name}. Must be: {', '.join(TRANSPORTS)}")
+    return TRANSPORTS[name]()
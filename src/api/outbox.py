@@ -0,0 +1,260 @@
+# src/api/outbox.py
+from datetime import datetime, timedelta
+import os
+import threading
+import uuid
+from sqlalchemy import select, update, bindparam, func
+from ..database.models import SessionLocal, NotificationOutbox
+from .notifications import get_transport
+
+class OutboxDispatcher:
+    """
+    Background sender for the notification outbox
+    - Worker threads claim due rows in batches with one UPDATE, so two
+      workers (or two processes) never send the same row
+    - Each batch goes to the transport in one send_batch() call
+    - Failed sends retry with exponential backoff, then end as 'failed'
+    - A claimed row that is never finished (crashed worker) becomes due
+      again after lease_seconds
+    """
+
+    def __init__(self, transport=None, workers: int = 2, batch_size: int = 50,
+                 poll_interval: float = 0.5, max_attempts: int = 5,
+                 backoff_base: float = 2.0, backoff_max: float = 300.0,
+                 lease_seconds: float = 60.0, session_factory=None):
+        self.transport = transport or get_transport()
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self.session_factory = session_factory or SessionLocal
+
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._counter_lock = threading.Lock()
+        self.batches_sent = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    # ============ CONTROL ============
+
+    def start(self):
+        """Start the worker threads (no-op if already running)"""
+        if self._threads:
+            return self
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"outbox-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"✅ Notification outbox started ({self.workers} workers)")
+        return self
+
+    def stop(self, timeout: float = None):
+        """Stop the worker threads (rows left in the outbox are sent on next start)"""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self):
+        """Check the outbox now instead of waiting for the next poll"""
+        self._wakeup.set()
+
+    def drain(self) -> int:
+        """Send everything that is due, in the calling thread; returns rows processed"""
+        total = 0
+        while True:
+            processed = self.dispatch_once()
+            if not processed:
+                return total
+            total += processed
+
+    def stats(self) -> dict:
+        db = self.session_factory()
+        try:
+            rows = db.query(
+                NotificationOutbox.status, func.count(NotificationOutbox.id)
+            ).group_by(NotificationOutbox.status).all()
+        finally:
+            db.close()
+        return {
+            "by_status": {status: count for status, count in rows},
+            "batches_sent": self.batches_sent,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "workers": len(self._threads)
+        }
+
+    # ============ DISPATCH ============
+
+    def dispatch_once(self) -> int:
+        """Claim one batch of due rows, send it and record the results"""
+        token, messages = self._claim()
+        if not messages:
+            return 0
+        try:
+            results = self.transport.send_batch(messages)
+        except Exception as e:
+            results = [{"status": "error", "message": f"Transport failed: {str(e)}"}] * len(messages)
+        self._complete(token, messages, results)
+        return len(messages)
+
+    def _claim(self):
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        table = NotificationOutbox.__table__
+        due = (table.c.status.in_(('pending', 'sending')), table.c.next_attempt_at <= now)
+
+        db = self.session_factory()
+        try:
+            # Due conditions are repeated on the UPDATE itself so a row another
+            # worker claimed in the meantime is skipped rather than sent twice
+            ids = select(table.c.id).where(*due).order_by(table.c.id).limit(self.batch_size)
+            db.execute(
+                update(table)
+                .where(table.c.id.in_(ids), *due)
+                .values(
+                    status='sending',
+                    claim_token=token,
+                    attempts=table.c.attempts + 1,
+                    next_attempt_at=now + timedelta(seconds=self.lease_seconds)
+                )
+            )
+            rows = db.execute(
+                select(table.c.id, table.c.ticket_id, table.c.channel, table.c.recipient,
+                       table.c.payload, table.c.attempts)
+                .where(table.c.claim_token == token)
+                .order_by(table.c.id)
+            ).all()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        return token, [
+            {
+                "id": row.id,
+                "ticket_id": row.ticket_id,
+                "channel": row.channel,
+                "recipient": row.recipient,
+                "payload": row.payload or {},
+                "attempts": row.attempts
+            }
+            for row in rows
+        ]
+
+    def _complete(self, token: str, messages: list, results: list):
+        now = datetime.utcnow()
+        finished = []
+        retries = []
+        sent = retried = failed = 0
+        for message, result in zip(messages, results):
+            status = result.get('status')
+            if status in ('success', 'skipped'):
+                finished.append({
+                    'b_id': message['id'],
+                    'status': 'sent' if status == 'success' else 'skipped',
+                    'last_error': None,
+                    'sent_at': now
+                })
+                if status == 'success':
+                    sent += 1
+            elif message['attempts'] >= self.max_attempts:
+                finished.append({
+                    'b_id': message['id'],
+                    'status': 'failed',
+                    'last_error': result.get('message'),
+                    'sent_at': None
+                })
+                failed += 1
+            else:
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (message['attempts'] - 1))
+                retries.append({
+                    'b_id': message['id'],
+                    'status': 'pending',
+                    'last_error': result.get('message'),
+                    'next_attempt_at': now + timedelta(seconds=delay)
+                })
+                retried += 1
+
+        table = NotificationOutbox.__table__
+        where = (table.c.id == bindparam('b_id'), table.c.claim_token == token)
+        db = self.session_factory()
+        try:
+            if finished:
+                db.execute(
+                    update(table).where(*where).values(
+                        status=bindparam('status'),
+                        last_error=bindparam('last_error'),
+                        sent_at=bindparam('sent_at'),
+                        claim_token=None
+                    ),
+                    finished
+                )
+            if retries:
+                db.execute(
+                    update(table).where(*where).values(
+                        status=bindparam('status'),
+                        last_error=bindparam('last_error'),
+                        next_attempt_at=bindparam('next_attempt_at'),
+                        claim_token=None
+                    ),
+                    retries
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        with self._counter_lock:
+            self.batches_sent += 1
+            self.sent += sent
+            self.retried += retried
+            self.failed += failed
+        if retried or failed:
+            print(f"⚠️ Outbox batch: {sent} sent, {retried} to retry, {failed} failed")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.dispatch_once()
+            except Exception as e:
+                print(f"⚠️ Outbox dispatch failed: {e}")
+                processed = 0
+            if not processed:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+# ============ SHARED DISPATCHER ============
+_outbox_dispatcher = None
+_outbox_lock = threading.Lock()
+
+def get_outbox_dispatcher() -> OutboxDispatcher:
+    """Shared dispatcher (configured from the environment, not started)"""
+    global _outbox_dispatcher
+    with _outbox_lock:
+        if _outbox_dispatcher is None:
+            _outbox_dispatcher = OutboxDispatcher(
+                workers=int(os.getenv('NOTIFICATION_OUTBOX_WORKERS', '2')),
+                batch_size=int(os.getenv('NOTIFICATION_OUTBOX_BATCH_SIZE', '50')),
+                poll_interval=float(os.getenv('NOTIFICATION_OUTBOX_POLL_INTERVAL', '0.5')),
+                max_attempts=int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', '5'))
+            )
+        return _outbox_dispatcher
+
+def wake_outbox():
+    """Nudge the shared dispatcher after a quote commits (no-op if not running)"""
+    if _outbox_dispatcher is not None:
+        _outbox_dispatcher.wake()
@@ -0,0 +1,85 @@
+# test_live.py
+import asyncio
+import json
+from src.api.live import DeliveryFeed
+from src.database.models import SessionLocal
+from src.database.crud import bulk_create_deliveries, get_delivery_stats
+from src.workflow import invoke_workflow
+
+def _frame(raw: bytes):
+    event, data = raw.decode().strip().split("\n")
+    return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+def test_feed_pushes_one_frame_per_commit_to_every_subscriber():
+    async def run():
+        feed = DeliveryFeed(debounce=0.05).start()
+        streams = [feed.subscribe() for _ in range(3)]
+        try:
+            for stream in streams:
+                assert await anext(stream) == b"retry: 3000\n\n"
+            # A whole workflow run (insert + price update) commits once
+            result = await asyncio.to_thread(invoke_workflow, {
+                'user_id': 'live-user', 'material_type': 'standard', 'distance': 5.0,
+                'urgency': 'standard', 'weight': 2.0, 'location_type': 'urban'
+            })
+            frames = [await asyncio.wait_for(anext(stream), 5) for stream in streams]
+            return result, frames, feed.published
+        finally:
+            await feed.stop()
+
+    result, frames, published = asyncio.run(run())
+    assert published == 1
+    assert len(set(frames)) == 1
+    event, data = _frame(frames[0])
+    assert event == "deliveries"
+    assert [row['ticket_id'] for row in data['deliveries']] == [result['ticket_id']]
+    assert data['deliveries'][0]['status'] == 'completed'
+
+    db = SessionLocal()
+    try:
+        assert data['stats'] == get_delivery_stats(db)
+    finally:
+        db.close()
+
+def test_slow_subscriber_is_told_to_resync():
+    async def run():
+        feed = DeliveryFeed(max_queue=2)
+        stream = feed.subscribe()
+        await anext(stream)
+        queue = next(iter(feed._subscribers))
+        for i in range(3):
+            feed._send(queue, f"frame {i}".encode())
+        return [queue.get_nowait() for _ in range(queue.qsize())], feed.resyncs
+
+    backlog, resyncs = asyncio.run(run())
+    assert [_frame(frame)[0] for frame in backlog] == ["resync"] and resyncs == 1
+
+def test_feed_picks_up_commits_from_other_processes(monkeypatch):
+    # Another worker's commit never reaches this process's change listeners
+    monkeypatch.setattr("src.database.crud.mark_changed", lambda db, ticket_ids: None)
+
+    async def run():
+        feed = DeliveryFeed(debounce=0.05, poll_interval=0.05).start()
+        stream = feed.subscribe()
+        try:
+            await anext(stream)
+            await asyncio.sleep(0.2)      # first poll records the counters
+            ticket_ids = await asyncio.to_thread(_create_elsewhere)
+            return ticket_ids, await asyncio.wait_for(anext(stream), 5)
+        finally:
+            await feed.stop()
+
+    ticket_ids, frame = asyncio.run(run())
+    event, data = _frame(frame)
+    assert event == "deliveries"
+    assert ticket_ids[0] in [row['ticket_id'] for row in data['deliveries']]
+
+def _create_elsewhere():
+    db = SessionLocal()
+    try:
+        return bulk_create_deliveries(db, [{
+            'user_id': 'live-other', 'material_type': 'standard', 'distance': 5.0,
+            'urgency': 'standard', 'weight': 2.0, 'location_type': 'urban'
+        }])
+    finally:
+        db.close()
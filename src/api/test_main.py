@@ -0,0 +1,35 @@
+# test_main.py
+import os
+import subprocess
+import sys
+
+# Engines are built at import time, so the in-memory configuration runs in
+# its own interpreter
+IN_MEMORY_CHECK = """
+from fastapi.testclient import TestClient
+from src.api.main import api
+from src.database.models import AsyncReadSessionLocal
+
+assert AsyncReadSessionLocal is None
+with TestClient(api) as client:
+    quote = client.post("/api/calculate-price", json={
+        "user_id": "memory-user", "material_type": "standard", "distance": 5.0,
+        "urgency": "standard", "weight": 2.0, "location_type": "urban"
+    })
+    assert quote.status_code == 200, quote.text
+    ticket_id = quote.json()["ticket_id"]
+    for url in ("/api/deliveries", "/api/stats", "/api/dashboard/summary",
+                f"/api/delivery/{ticket_id}", "/api/deliveries/export"):
+        response = client.get(url)
+        assert response.status_code == 200, (url, response.text)
+        assert ticket_id in response.text or url == "/api/stats", url
+    assert client.get("/api/stats").json()["total_deliveries"] >= 1
+"""
+
+def test_read_endpoints_work_on_in_memory_database():
+    env = dict(os.environ, DATABASE_URL="sqlite://", NOTIFICATION_OUTBOX_WORKERS="0")
+    env.pop("READ_DATABASE_URL", None)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run([sys.executable, "-c", IN_MEMORY_CHECK], cwd=root, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
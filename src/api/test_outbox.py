@@ -0,0 +1,96 @@
+# test_outbox.py
+from datetime import datetime, timedelta
+from src.api.outbox import OutboxDispatcher
+from src.api.notifications import MemoryTransport
+from src.database.models import SessionLocal, NotificationOutbox
+from src.database.crud import enqueue_notification, get_notifications_by_ticket
+from src.workflow import invoke_workflow
+
+class FlakyTransport:
+    """Fails every send"""
+    def __init__(self):
+        self.calls = 0
+
+    def send_batch(self, messages):
+        self.calls += 1
+        return [{"status": "error", "message": "smtp down"}] * len(messages)
+
+def _clear_outbox():
+    db = SessionLocal()
+    try:
+        db.query(NotificationOutbox).delete()
+        db.commit()
+    finally:
+        db.close()
+
+def _notifications(ticket_id):
+    db = SessionLocal()
+    try:
+        return get_notifications_by_ticket(db, ticket_id)
+    finally:
+        db.close()
+
+def test_quote_writes_outbox_row_and_dispatcher_sends_batch():
+    _clear_outbox()
+    results = [
+        invoke_workflow({
+            'user_id': 'outbox-user',
+            'user_email': f'customer{i}@example.com',
+            'material_type': 'standard',
+            'distance': 10.0 + i,
+            'urgency': 'standard',
+            'weight': 5.0,
+            'location_type': 'urban'
+        })
+        for i in range(3)
+    ]
+
+    # Nothing is sent inside the quote, the row just waits in the outbox
+    for result in results:
+        assert result['action_log'][-2] == ("email_queued", "notification", result['user_email'])
+        [row] = _notifications(result['ticket_id'])
+        assert row.status == 'pending'
+
+    transport = MemoryTransport()
+    dispatcher = OutboxDispatcher(transport=transport, batch_size=50)
+    assert dispatcher.drain() == 3
+    assert transport.batches == 1
+    assert [m['ticket_id'] for m in transport.sent] == [r['ticket_id'] for r in results]
+    assert transport.sent[0]['payload']['total_price'] == results[0]['total_price']
+    for result in results:
+        [row] = _notifications(result['ticket_id'])
+        assert row.status == 'sent'
+        assert row.sent_at is not None
+
+def test_failed_sends_back_off_then_fail():
+    _clear_outbox()
+    db = SessionLocal()
+    try:
+        enqueue_notification(db, 'DEL-OUTBOX1', 'a@example.com', {'total_price': 10.0})
+    finally:
+        db.close()
+
+    transport = FlakyTransport()
+    dispatcher = OutboxDispatcher(transport=transport, max_attempts=2, backoff_base=60)
+    assert dispatcher.drain() == 1
+    [row] = _notifications('DEL-OUTBOX1')
+    assert row.status == 'pending'
+    assert row.attempts == 1
+    assert row.last_error == 'smtp down'
+    assert row.next_attempt_at > datetime.utcnow() + timedelta(seconds=30)
+
+    # Not due yet, so nothing is claimed
+    assert dispatcher.drain() == 0
+
+    db = SessionLocal()
+    try:
+        db.query(NotificationOutbox).update({'next_attempt_at': datetime.utcnow()})
+        db.commit()
+    finally:
+        db.close()
+    assert dispatcher.drain() == 1
+    [row] = _notifications('DEL-OUTBOX1')
+    assert row.status == 'failed'
+    assert row.attempts == 2
+    assert transport.calls == 2
+    assert dispatcher.stats()['by_status'] == {'failed': 1}
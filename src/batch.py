@@ -0,0 +1,201 @@
+# src/batch.py
+from datetime import datetime
+from typing import List
+import uuid
+import numpy as np
+from .utils.pricing_config import get_pricing_table, refresh_pricing_table, invalid_option_message
+from .utils.pricing_kernels import (
+    REQUIRED_FIELDS, VALID, MISSING_FIELDS, INVALID_MATERIAL, INVALID_URGENCY,
+    INVALID_LOCATION, INVALID_DISTANCE, INVALID_WEIGHT,
+    build_lookup_tables, encode, validate_arrays, price_arrays
+)
+from .database.models import SessionLocal
+from .database.crud import bulk_create_deliveries, bulk_log_errors
+from .utils.metrics import WORKFLOW_METRICS
+
+@WORKFLOW_METRICS.instrument("price_batch")
+def price_batch(requests: List[dict], db=None) -> List[dict]:
+    """
+    Prices N delivery requests in one pass
+    - Validation and pricing run as NumPy array operations
+    - All deliveries and error logs are written in one transaction
+    - Returns one final state dict per request, in input order, with the same
+      fields and values the compiled workflow produces for that request
+    """
+    requests = [r.model_dump() if hasattr(r, 'model_dump') else dict(r) for r in requests]
+    if not requests:
+        return []
+
+    n = len(requests)
+    # One pricing table version for the whole batch
+    refresh_pricing_table()
+    table = get_pricing_table()
+    tables = build_lookup_tables(table)
+
+    # ============ ENCODE INPUTS ============
+    present = np.array(
+        [[bool(r.get(field)) for field in REQUIRED_FIELDS] for r in requests],
+        dtype=bool
+    ).reshape(n, len(REQUIRED_FIELDS))
+    material_idx = encode([r.get('material_type') for r in requests], tables['material_type'][0])
+    urgency_idx = encode([r.get('urgency') for r in requests], tables['urgency'][0])
+    location_idx = encode([r.get('location_type') for r in requests], tables['location_type'][0])
+    distance = np.array([r.get('distance') or 0.0 for r in requests], dtype=np.float64)
+    weight = np.array([r.get('weight') or 0.0 for r in requests], dtype=np.float64)
+
+    # ============ VALIDATE + PRICE ============
+    codes = validate_arrays(present, material_idx, urgency_idx, location_idx, distance, weight)
+    valid = np.flatnonzero(codes == VALID)
+
+    priced = price_arrays(
+        tables, material_idx[valid], urgency_idx[valid], location_idx[valid],
+        distance[valid], weight[valid], table
+    )
+    priced = {key: values.tolist() for key, values in priced.items()}
+
+    # ============ BUILD RESULTS ============
+    now = datetime.utcnow()
+    results = [None] * n
+    delivery_rows = []
+    error_rows = []
+
+    for pos, i in enumerate(valid.tolist()):
+        state = _initial_state(requests[i])
+        state['pricing_version'] = table.version
+        state['base_price'] = priced['base_price'][pos]
+        state['urgency_multiplier'] = priced['urgency_multiplier'][pos]
+        state['weight_surcharge'] = priced['weight_surcharge'][pos]
+        state['location_adjustment'] = priced['location_adjustment'][pos]
+        # Python's round() on each element keeps results identical to final_price_node
+        state['total_price'] = round(priced['total'][pos], 2)
+        state['action_log'] = _pricing_log(state, table)
+
+        delivery_rows.append({
+            'ticket_id': state['ticket_id'],
+            'user_id': state['user_id'],
+            'material_type': state['material_type'],
+            'distance': state['distance'],
+            'urgency': state['urgency'],
+            'weight': state['weight'],
+            'location_type': state['location_type'],
+            'total_price': state['total_price'],
+            'status': 'completed',
+            'action_log': list(state['action_log']),
+            'created_at': now
+        })
+        state['action_log'].append(("price_saved", "final_price"))
+        results[i] = state
+
+    for i in np.flatnonzero(codes != VALID).tolist():
+        state = _initial_state(requests[i])
+        state['pricing_version'] = table.version
+        message = _error_message(int(codes[i]), state, table)
+        state['error_message'] = message
+        if codes[i] == MISSING_FIELDS:
+            state['action_log'].append(("validation_failed", "input", message))
+        else:
+            state['action_log'].append(("error", "input", message))
+
+        error_rows.append({
+            'ticket_id': state['ticket_id'],
+            'error_type': "workflow_error",
+            'error_message': message,
+            'node_name': "error_handler",
+            'timestamp': now
+        })
+        state['action_log'].append(("error_logged", "error_handler", message))
+        results[i] = state
+
+    # ============ SAVE TO DATABASE ============
+    owns_session = db is None
+    if owns_session:
+        db = SessionLocal()
+    try:
+        bulk_create_deliveries(db, delivery_rows, commit=False)
+        bulk_log_errors(db, error_rows, commit=False)
+        db.commit()
+        print(f"✅ Batch priced: {len(delivery_rows)} completed, {len(error_rows)} failed")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if owns_session:
+            db.close()
+
+    return results
+
+# ============ HELPERS ============
+
+def _initial_state(request: dict) -> dict:
+    """State dict shaped like the workflow output"""
+    return {
+        'ticket_id': request.get('ticket_id') or f"DEL-{uuid.uuid4().hex[:8].upper()}",
+        'user_id': request.get('user_id'),
+        'user_email': request.get('user_email'),
+        'material_type': request.get('material_type'),
+        'distance': request.get('distance'),
+        'urgency': request.get('urgency'),
+        'weight': request.get('weight'),
+        'location_type': request.get('location_type'),
+        'base_price': None,
+        'urgency_multiplier': None,
+        'weight_surcharge': None,
+        'location_adjustment': None,
+        'pricing_version': None,
+        'total_price': None,
+        'action_log': [],
+        'error_message': None,
+        'retry_count': 0
+    }
+
+def _error_message(code: int, state: dict, table) -> str:
+    """Same messages input_node produces for each validation failure"""
+    if code == MISSING_FIELDS:
+        missing = [f for f in REQUIRED_FIELDS if not state.get(f)]
+        return f"Missing required fields: {', '.join(missing)}"
+    if code == INVALID_MATERIAL:
+        return invalid_option_message('material_type', state['material_type'], table)
+    if code == INVALID_URGENCY:
+        return invalid_option_message('urgency', state['urgency'], table)
+    if code == INVALID_LOCATION:
+        return invalid_option_message('location_type', state['location_type'], table)
+    if code == INVALID_DISTANCE:
+        return "Distance must be greater than 0 km"
+    if code == INVALID_WEIGHT:
+        return "Weight must be greater than 0 kg"
+    return "Unknown error"
+
+def _pricing_log(state: dict, table) -> List[tuple]:
+    """Action log events the pricing nodes append for a valid request"""
+    material_type = state['material_type']
+    distance = state['distance']
+    weight = state['weight']
+    rate = table.distance_rate_per_km
+    threshold = table.weight_threshold_kg
+    surcharge_rate = table.surcharge_per_kg
+    base = table.material_base_prices[material_type]
+
+    log = [
+        ("input_validated", "input"),
+        ("pricing_version", "input", table.version),
+        ("distance", "distance", distance),
+        ("material_priced", "material", material_type, base, distance, rate, state['base_price']),
+        ("urgency", "urgency", state['urgency'], state['urgency_multiplier']),
+    ]
+
+    if state['weight_surcharge'] > 0:
+        log.append(("weight_surcharge", "weight",
+                    weight, weight - threshold, surcharge_rate, state['weight_surcharge']))
+    else:
+        log.append(("weight_within_threshold", "weight", weight))
+
+    if state['location_adjustment'] > 0:
+        log.append(("location_adjusted", "location",
+                    state['location_type'], state['location_adjustment']))
+    else:
+        log.append(("location", "location", state['location_type']))
+
+    log.append(("final_price", "final_price",
+                state['base_price'], state['urgency_multiplier'], state['weight_surcharge'],
+                state['location_adjustment'], state['total_price']))
+    return log
@@ -1,16 +1,27 @@
 # src/database/__init__.py
-from .models import init_db, SessionLocal, Base, User, Delivery, ErrorLog
+from .models import (
+    init_db, SessionLocal, ReadSessionLocal, workflow_session, Base, User, Delivery, ErrorLog, NotificationOutbox
+)
+from .archive import run_maintenance, archive_deliveries, purge_archives, compact
 from .crud import (
     create_user, get_user, get_all_users,
     create_delivery, update_delivery, get_delivery, get_all_deliveries,
+    bulk_create_deliveries, bulk_update_status, bulk_log_errors,
+    list_deliveries, iter_deliveries, get_delivery_summaries, get_user_deliveries,
     log_error, get_errors_by_ticket, get_all_errors,
+    enqueue_notification, get_notifications_by_ticket,
     get_delivery_stats
 )
 
 __all__ = [
-    'init_db', 'SessionLocal', 'Base', 'User', 'Delivery', 'ErrorLog',
+    'init_db', 'SessionLocal', 'ReadSessionLocal', 'workflow_session', 'Base', 'User', 'Delivery', 'ErrorLog',
+    'NotificationOutbox',
+    'run_maintenance', 'archive_deliveries', 'purge_archives', 'compact',
     'create_user', 'get_user', 'get_all_users',
     'create_delivery', 'update_delivery', 'get_delivery', 'get_all_deliveries',
+    'bulk_create_deliveries', 'bulk_update_status', 'bulk_log_errors',
+    'list_deliveries', 'iter_deliveries', 'get_delivery_summaries', 'get_user_deliveries',
     'log_error', 'get_errors_by_ticket', 'get_all_errors',
+    'enqueue_notification', 'get_notifications_by_ticket',
     'get_delivery_stats'
 ]
\ No newline at end of file
@@ -0,0 +1,53 @@
+# src/database/action_logs.py
+from sqlalchemy import select, insert, func
+from .models import ActionLogEntry
+
+# ============ APPEND-ONLY ACTION LOG ============
+# Writers hand over the ticket's whole log (state['action_log']) as before;
+# only entries past what is already stored get inserted, so a write costs
+# the new entries, not the length of the log.
+
+def entry_rows(ticket_id: str, entries: list, start: int = 0) -> list:
+    """Insert rows for entries[start:], numbered from start"""
+    return [
+        {'ticket_id': ticket_id, 'seq': seq, 'entry': list(entry) if isinstance(entry, tuple) else entry}
+        for seq, entry in enumerate(entries[start:], start=start)
+    ]
+
+def stored_counts(db, ticket_ids) -> dict:
+    """Number of entries already stored per ticket"""
+    ticket_ids = list(ticket_ids)
+    if not ticket_ids:
+        return {}
+    rows = db.execute(
+        select(ActionLogEntry.ticket_id, func.count())
+        .where(ActionLogEntry.ticket_id.in_(ticket_ids))
+        .group_by(ActionLogEntry.ticket_id)
+    )
+    return {ticket_id: count for ticket_id, count in rows}
+
+def append_action_logs(db, logs: dict, new_tickets: bool = False) -> int:
+    """
+    Store the unsaved tail of each ticket's log ({ticket_id: entries})
+    new_tickets=True skips the lookup for tickets created in this batch
+    Returns the number of entries inserted (caller commits)
+    """
+    counts = {} if new_tickets else stored_counts(db, logs)
+    rows = []
+    for ticket_id, entries in logs.items():
+        rows.extend(entry_rows(ticket_id, entries or [], counts.get(ticket_id, 0)))
+    if rows:
+        db.execute(insert(ActionLogEntry), rows)
+    return len(rows)
+
+def action_log_query(ticket_id: str):
+    return (
+        select(ActionLogEntry.entry)
+        .where(ActionLogEntry.ticket_id == ticket_id)
+        .order_by(ActionLogEntry.seq)
+    )
+
+def load_action_log(db, ticket_id: str, legacy: list = None) -> list:
+    """A ticket's log in order (falls back to a not-yet-migrated blob)"""
+    entries = db.execute(action_log_query(ticket_id)).scalars().all()
+    return list(entries) if entries else list(legacy or [])
@@ -0,0 +1,356 @@
+# src/database/archive.py
+from datetime import datetime, timedelta
+import argparse
+import os
+import threading
+from sqlalchemy import (
+    Table, Column, MetaData, Index, select, insert, delete, update, func, inspect
+)
+from .models import (
+    SessionLocal, Delivery, ErrorLog, ActionLogEntry, ArchivedDelivery, DeliveryStat,
+    engine as default_engine
+)
+from .ticket_cache import ticket_cache
+
+# ============ PARTITIONS ============
+# Finished deliveries older than ARCHIVE_AFTER_DAYS move out of the hot
+# tables into per-month tables in the same database:
+#   deliveries_archive_YYYYMM, action_log_entries_archive_YYYYMM,
+#   error_logs_archive_YYYYMM
+# archived_deliveries maps ticket_id -> month so get_delivery() can still
+# find an archived ticket with one indexed lookup.
+
+ARCHIVE_STATUSES = ('completed', 'failed')
+
+_DELIVERIES = Delivery.__table__
+_ACTION_LOGS = ActionLogEntry.__table__
+_ERROR_LOGS = ErrorLog.__table__
+
+# SQLite caps bound parameters per statement
+_IN_CHUNK = 500
+
+_archive_metadata = MetaData()
+_archive_lock = threading.Lock()
+
+def partition_name(table_name: str, month: str) -> str:
+    return f"{table_name}_archive_{month}"
+
+def archive_table(base: Table, month: str) -> Table:
+    """Archive table for one month, same columns as the hot table"""
+    name = partition_name(base.name, month)
+    with _archive_lock:
+        table = _archive_metadata.tables.get(name)
+        if table is None:
+            columns = [
+                Column(c.name, c.type, primary_key=c.primary_key, autoincrement=False)
+                for c in base.columns
+            ]
+            indexes = []
+            if 'ticket_id' in base.c and not base.c.ticket_id.primary_key:
+                indexes.append(Index(f"ix_{name}_ticket", 'ticket_id'))
+            table = Table(name, _archive_metadata, *columns, *indexes)
+        return table
+
+def archive_months(bind, base: Table = _DELIVERIES) -> list:
+    """Months that have an archive partition for base, oldest first"""
+    prefix = partition_name(base.name, "")
+    return sorted(
+        name[len(prefix):] for name in inspect(bind).get_table_names()
+        if name.startswith(prefix)
+    )
+
+def _month(value: datetime) -> str:
+    return value.strftime("%Y%m")
+
+def _copy_rows(db, base: Table, month: str, where):
+    """INSERT INTO <base>_archive_<month> SELECT ... FROM <base> WHERE ..."""
+    target = archive_table(base, month)
+    target.create(db.connection(), checkfirst=True)
+    db.execute(insert(target).from_select(
+        [c.name for c in base.columns], select(*base.columns).where(where)
+    ))
+
+# ============ ARCHIVING ============
+
+def _move_deliveries(db, month: str, ticket_ids: list):
+    in_batch = _DELIVERIES.c.ticket_id.in_(ticket_ids)
+    moved = db.execute(
+        select(_DELIVERIES.c.status, func.count(), func.coalesce(func.sum(_DELIVERIES.c.total_price), 0.0))
+        .where(in_batch).group_by(_DELIVERIES.c.status)
+    ).all()
+
+    _copy_rows(db, _DELIVERIES, month, in_batch)
+    _copy_rows(db, _ACTION_LOGS, month, _ACTION_LOGS.c.ticket_id.in_(ticket_ids))
+    now = datetime.utcnow()
+    db.execute(insert(ArchivedDelivery), [
+        {'ticket_id': ticket_id, 'month': month, 'archived_at': now} for ticket_id in ticket_ids
+    ])
+    db.execute(delete(_ACTION_LOGS).where(_ACTION_LOGS.c.ticket_id.in_(ticket_ids)))
+    db.execute(delete(_DELIVERIES).where(in_batch))
+
+    # The delete trigger took these rows out of delivery_stats, but archived
+    # deliveries still count towards lifetime stats
+    for status, count, revenue in moved:
+        db.execute(
+            update(DeliveryStat.__table__)
+            .where(DeliveryStat.__table__.c.status == status)
+            .values(count=DeliveryStat.__table__.c.count + count,
+                    revenue=DeliveryStat.__table__.c.revenue + revenue)
+        )
+
+def archive_deliveries(older_than_days: float = None, session_factory=None,
+                       batch_size: int = _IN_CHUNK, now: datetime = None) -> dict:
+    """
+    Move completed/failed deliveries created more than older_than_days ago
+    (and their action log entries) into monthly archive tables
+    Each batch is its own short transaction. Returns {month: rows moved}
+    """
+    older_than_days = _env_float('ARCHIVE_AFTER_DAYS', 90) if older_than_days is None else older_than_days
+    cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+    session_factory = session_factory or SessionLocal
+    moved = {}
+    while True:
+        db = session_factory()
+        try:
+            rows = db.execute(
+                select(_DELIVERIES.c.ticket_id, _DELIVERIES.c.created_at)
+                .where(_DELIVERIES.c.status.in_(ARCHIVE_STATUSES), _DELIVERIES.c.created_at < cutoff)
+                .order_by(_DELIVERIES.c.created_at)
+                .limit(min(batch_size, _IN_CHUNK))
+            ).all()
+            if not rows:
+                return moved
+            by_month = {}
+            for ticket_id, created_at in rows:
+                by_month.setdefault(_month(created_at), []).append(ticket_id)
+            for month, ticket_ids in by_month.items():
+                _move_deliveries(db, month, ticket_ids)
+                moved[month] = moved.get(month, 0) + len(ticket_ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+def archive_error_logs(older_than_days: float = None, session_factory=None,
+                       batch_size: int = _IN_CHUNK, now: datetime = None) -> dict:
+    """Move error logs older than older_than_days into monthly archive tables"""
+    older_than_days = _env_float('ARCHIVE_AFTER_DAYS', 90) if older_than_days is None else older_than_days
+    cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+    session_factory = session_factory or SessionLocal
+    moved = {}
+    while True:
+        db = session_factory()
+        try:
+            rows = db.execute(
+                select(_ERROR_LOGS.c.id, _ERROR_LOGS.c.timestamp)
+                .where(_ERROR_LOGS.c.timestamp < cutoff)
+                .order_by(_ERROR_LOGS.c.timestamp)
+                .limit(min(batch_size, _IN_CHUNK))
+            ).all()
+            if not rows:
+                return moved
+            by_month = {}
+            for error_id, timestamp in rows:
+                by_month.setdefault(_month(timestamp), []).append(error_id)
+            for month, error_ids in by_month.items():
+                _copy_rows(db, _ERROR_LOGS, month, _ERROR_LOGS.c.id.in_(error_ids))
+                db.execute(delete(_ERROR_LOGS).where(_ERROR_LOGS.c.id.in_(error_ids)))
+                moved[month] = moved.get(month, 0) + len(error_ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+# ============ RETENTION ============
+
+def purge_archives(retention_months: int = None, session_factory=None,
+                   now: datetime = None) -> list:
+    """
+    Drop archive partitions older than retention_months (0 keeps everything)
+    Returns the months dropped
+    """
+    retention_months = int(os.getenv('ARCHIVE_RETENTION_MONTHS', '0')) if retention_months is None else retention_months
+    if retention_months <= 0:
+        return []
+    now = now or datetime.utcnow()
+    year, month = divmod(now.year * 12 + now.month - 1 - retention_months, 12)
+    oldest_kept = f"{year:04d}{month + 1:02d}"
+
+    session_factory = session_factory or SessionLocal
+    db = session_factory()
+    dropped = []
+    try:
+        bind = db.connection()
+        months = set()
+        for base in (_DELIVERIES, _ACTION_LOGS, _ERROR_LOGS):
+            months.update(archive_months(bind, base))
+        for month in sorted(m for m in months if m < oldest_kept):
+            if month in archive_months(bind, _DELIVERIES):
+                table = archive_table(_DELIVERIES, month)
+                # Purged deliveries leave the lifetime stats too
+                for status, count, revenue in db.execute(
+                    select(table.c.status, func.count(), func.coalesce(func.sum(table.c.total_price), 0.0))
+                    .group_by(table.c.status)
+                ):
+                    db.execute(
+                        update(DeliveryStat.__table__)
+                        .where(DeliveryStat.__table__.c.status == status)
+                        .values(count=DeliveryStat.__table__.c.count - count,
+                                revenue=DeliveryStat.__table__.c.revenue - revenue)
+                    )
+            db.execute(delete(ArchivedDelivery.__table__).where(ArchivedDelivery.__table__.c.month == month))
+            for base in (_DELIVERIES, _ACTION_LOGS, _ERROR_LOGS):
+                archive_table(base, month).drop(bind, checkfirst=True)
+            dropped.append(month)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if dropped:
+        # Purged tickets must stop resolving
+        ticket_cache.clear()
+        print(f"🗑️ Dropped archive partitions: {', '.join(dropped)}")
+    return dropped
+
+# ============ COMPACTION ============
+
+def compact(engine=None, vacuum: bool = True) -> dict:
+    """
+    Reclaim space after archiving (SQLite): checkpoint the WAL, refresh
+    planner statistics and optionally VACUUM. Returns file size before/after
+    """
+    engine = engine or default_engine
+    if engine.dialect.name != 'sqlite':
+        return {}
+
+    def size(connection):
+        page_count = connection.exec_driver_sql("PRAGMA page_count").scalar()
+        page_size = connection.exec_driver_sql("PRAGMA page_size").scalar()
+        return page_count * page_size
+
+    # VACUUM can't run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        before = size(connection)
+        connection.exec_driver_sql("PRAGMA optimize")
+        if vacuum:
+            connection.exec_driver_sql("VACUUM")
+        connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+        after = size(connection)
+    print(f"🧹 Compacted database: {before / 1e6:.1f} MB → {after / 1e6:.1f} MB")
+    return {"bytes_before": before, "bytes_after": after}
+
+def run_maintenance(older_than_days: float = None, retention_months: int = None,
+                    vacuum: bool = None, session_factory=None, engine=None) -> dict:
+    """Archive, apply retention, then compact - one scheduled maintenance pass"""
+    if vacuum is None:
+        vacuum = os.getenv('ARCHIVE_VACUUM', 'true').lower() in ('1', 'true', 'yes')
+    deliveries = archive_deliveries(older_than_days, session_factory)
+    errors = archive_error_logs(older_than_days, session_factory)
+    dropped = purge_archives(retention_months, session_factory)
+    summary = {
+        "deliveries_archived": deliveries,
+        "error_logs_archived": errors,
+        "partitions_dropped": dropped,
+        "compaction": compact(engine, vacuum=vacuum) if (deliveries or errors or dropped) else {}
+    }
+    print(f"✅ Archive pass: {sum(deliveries.values())} deliveries, {sum(errors.values())} error logs moved")
+    return summary
+
+# ============ ROUTER ============
+
+def find_archived_delivery(db, ticket_id: str):
+    """Archived ticket as a transient Delivery (with its action log), or None"""
+    month = db.execute(
+        select(ArchivedDelivery.month).where(ArchivedDelivery.ticket_id == ticket_id)
+    ).scalar()
+    if month is None:
+        return None
+    table = archive_table(_DELIVERIES, month)
+    row = db.execute(select(table).where(table.c.ticket_id == ticket_id)).mappings().first()
+    if row is None:
+        return None
+
+    fields = {attr.key: row[attr.columns[0].name] for attr in inspect(Delivery).column_attrs}
+    delivery = Delivery(**fields)
+    logs = archive_table(_ACTION_LOGS, month)
+    entries = db.execute(
+        select(logs.c.entry).where(logs.c.ticket_id == ticket_id).order_by(logs.c.seq)
+    ).scalars().all()
+    delivery.action_log = list(entries) if entries else list(fields['legacy_action_log'] or [])
+    return delivery
+
+def archived_stats_rows(db) -> list:
+    """(status, count, revenue) per status for every archive partition"""
+    rows = []
+    for month in archive_months(db.connection()):
+        table = archive_table(_DELIVERIES, month)
+        rows.extend(db.execute(
+            select(table.c.status, func.count(), func.coalesce(func.sum(table.c.total_price), 0.0))
+            .group_by(table.c.status)
+        ).all())
+    return rows
+
+# ============ SCHEDULER ============
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+class ArchiveScheduler:
+    """Runs run_maintenance() every interval seconds on a background thread"""
+
+    def __init__(self, interval: float, **maintenance_options):
+        self.interval = interval
+        self.maintenance_options = maintenance_options
+        self.last_run = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="archive", daemon=True)
+            self._thread.start()
+            print(f"✅ Archive scheduler started (every {self.interval:g}s)")
+        return self
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.last_run = run_maintenance(**self.maintenance_options)
+            except Exception as e:
+                print(f"⚠️ Archive pass failed: {e}")
+
+_archive_scheduler = None
+
+def start_archive_scheduler():
+    """Start the shared scheduler if ARCHIVE_INTERVAL_SECONDS > 0"""
+    global _archive_scheduler
+    interval = _env_float('ARCHIVE_INTERVAL_SECONDS', 0)
+    if interval > 0 and _archive_scheduler is None:
+        _archive_scheduler = ArchiveScheduler(interval).start()
+    return _archive_scheduler
+
+def stop_archive_scheduler():
+    if _archive_scheduler is not None:
+        _archive_scheduler.stop(timeout=5)
+
+# ============ RUN DIRECTLY (CRON) ============
+# python -m src.database.archive [--days 90] [--retention-months 24] [--no-vacuum]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old deliveries and compact the database")
+    parser.add_argument("--days", type=float, default=None, help="archive finished deliveries older than this")
+    parser.add_argument("--retention-months", type=int, default=None, help="drop archive months older than this (0 = keep)")
+    parser.add_argument("--no-vacuum", action="store_true", help="skip VACUUM")
+    args = parser.parse_args()
+    run_maintenance(args.days, args.retention_months, vacuum=False if args.no_vacuum else None)
@@ -0,0 +1,38 @@
+# src/database/change_feed.py
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# ============ COMMITTED TICKET CHANGES ============
+# Writers mark the tickets they insert or update on their session; once the
+# session commits, every registered listener gets the set of ticket IDs.
+# Listeners run in the committing thread and must be quick (hand off, don't
+# do I/O). A rollback forgets the marks.
+
+_listeners = []
+
+def add_change_listener(listener):
+    """Call listener(ticket_ids) after each commit that touched deliveries"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+def remove_change_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+def mark_changed(db: Session, ticket_ids):
+    db.info.setdefault('changed_tickets', set()).update(ticket_ids)
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_changes(session):
+    changed = session.info.pop('changed_tickets', None)
+    if not changed:
+        return
+    for listener in list(_listeners):
+        try:
+            listener(changed)
+        except Exception as e:
+            print(f"⚠️ Change listener failed: {e}")
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_changes(session):
+    session.info.pop('changed_tickets', None)
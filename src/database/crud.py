@@ -1,11 +1,22 @@
 # src/database/crud.py
-from sqlalchemy.orm import Session
-from .models import User, Delivery, ErrorLog
+from sqlalchemy import func, select, insert, update, tuple_, inspect
+from sqlalchemy.orm import Session, defer
+from sqlalchemy.ext.asyncio import AsyncSession
+from .models import User, Delivery, ErrorLog, NotificationOutbox, DeliveryStat, ActionLogEntry
+from .write_behind import get_active_write_behind
+from .action_logs import append_action_logs, entry_rows, action_log_query
+from .archive import find_archived_delivery, archived_stats_rows
+from .ticket_cache import invalidate_on_commit
+from .change_feed import mark_changed
+from ..utils.metrics import CRUD_METRICS
+import base64
+import json
 import uuid
 from datetime import datetime
 
 # ============ USER OPERATIONS ============
 
+@CRUD_METRICS.instrument("create_user")
 def create_user(db: Session, name: str, email: str = None, phone: str = None):
     """Create a new user"""
     user_id = str(uuid.uuid4())[:8]
@@ -22,6 +33,7 @@ def create_user(db: Session, name: str, email: str = None, phone: str = None):
     print(f"✅ User created: {user_id}")
     return user
 
+@CRUD_METRICS.instrument("get_user")
 def get_user(db: Session, user_id: str):
     """Get user by user_id"""
     return db.query(User).filter(User.user_id == user_id).first()
@@ -32,9 +44,14 @@ def get_all_users(db: Session, limit: int = 100):
 
 # ============ DELIVERY OPERATIONS ============
 
-def create_delivery(db: Session, user_id: str, inputs: dict):
-    """Create a new delivery request"""
-    ticket_id = f"DEL-{uuid.uuid4().hex[:8].upper()}"
+@CRUD_METRICS.instrument("create_delivery")
+def create_delivery(db: Session, user_id: str, inputs: dict,
+                    ticket_id: str = None, commit: bool = True):
+    """
+    Create a new delivery request
+    commit=False only flushes (the caller's unit of work commits)
+    """
+    ticket_id = ticket_id or f"DEL-{uuid.uuid4().hex[:8].upper()}"
     
     delivery = Delivery(
         ticket_id=ticket_id,
@@ -46,53 +63,316 @@ def create_delivery(db: Session, user_id: str, inputs: dict):
         location_type=inputs.get('location_type'),
         total_price=None,
         status='pending',
-        action_log=[],
         created_at=datetime.utcnow()
     )
     
     db.add(delivery)
-    db.commit()
-    db.refresh(delivery)
+    mark_changed(db, [ticket_id])
+    if commit:
+        db.commit()
+        db.refresh(delivery)
+    else:
+        db.flush()
     print(f"✅ Delivery created: {ticket_id}")
     return delivery
 
-def update_delivery(db: Session, ticket_id: str, updates: dict):
-    """Update an existing delivery"""
-    delivery = db.query(Delivery).filter(Delivery.ticket_id == ticket_id).first()
+# Columns update_delivery() may set (action_log is handled separately)
+_UPDATABLE_COLUMNS = frozenset(
+    attr.key for attr in inspect(Delivery).column_attrs
+) - {'ticket_id', 'legacy_action_log'}
+
+@CRUD_METRICS.instrument("update_delivery")
+def update_delivery(db: Session, ticket_id: str, updates: dict, commit: bool = True,
+                    refresh: bool = False, return_object: bool = True):
+    """
+    Update an existing delivery with one UPDATE ... WHERE ticket_id = ?
+    - updates['action_log'] is the full log; only entries not stored yet
+      are appended to action_log_entries
+    - commit=False leaves the commit to the caller's unit of work
+    - return_object=False returns the rows affected (0 or 1) and never
+      loads the row; otherwise returns the Delivery (None if not found),
+      re-read from the database only if refresh=True
+    """
+    values = {key: value for key, value in updates.items() if key in _UPDATABLE_COLUMNS}
+    action_log = updates.get('action_log')
     
-    if not delivery:
-        print(f"❌ Delivery not found: {ticket_id}")
-        return None
+    if values:
+        # ORM-enabled UPDATE: objects already in the session are patched in
+        # place (synchronize_session="evaluate"), no SELECT needed
+        affected = db.execute(
+            update(Delivery).where(Delivery.ticket_id == ticket_id).values(**values),
+            execution_options={"synchronize_session": "evaluate"}
+        ).rowcount
+    else:
+        affected = db.execute(
+            select(func.count()).where(Delivery.ticket_id == ticket_id)
+        ).scalar()
     
-    # Update fields
-    for key, value in updates.items():
-        if hasattr(delivery, key):
-            setattr(delivery, key, value)
+    if not affected:
+        print(f"❌ Delivery not found: {ticket_id}")
+        return None if return_object else 0
     
-    db.commit()
-    db.refresh(delivery)
+    invalidate_on_commit(db, [ticket_id])
+    if action_log is not None:
+        append_action_logs(db, {ticket_id: action_log})
+    if commit:
+        db.commit()
     print(f"✅ Delivery updated: {ticket_id}")
+    
+    if not return_object:
+        return affected
+    delivery = db.get(Delivery, ticket_id)
+    if refresh:
+        db.refresh(delivery)
     return delivery
 
+# ============ BULK OPERATIONS ============
+# One executemany per table instead of add/commit/refresh per row.
+# commit=False leaves the transaction to the caller, like the single-row versions.
+
+# SQLite caps bound parameters per statement; IN lists are sent in chunks
+_IN_CHUNK = 500
+
+@CRUD_METRICS.instrument("bulk_create_deliveries")
+def bulk_create_deliveries(db: Session, rows: list, commit: bool = True) -> list:
+    """
+    Insert many deliveries in one statement
+    Each row: user_id + input fields, optionally ticket_id, total_price,
+    status, created_at and action_log (full log, stored as entries)
+    Returns the ticket IDs in input order (generated where not given)
+    """
+    now = datetime.utcnow()
+    delivery_rows = []
+    log_rows = []
+    for row in rows:
+        ticket_id = row.get('ticket_id') or f"DEL-{uuid.uuid4().hex[:8].upper()}"
+        delivery_rows.append({
+            'ticket_id': ticket_id,
+            'user_id': row.get('user_id'),
+            'material_type': row.get('material_type'),
+            'distance': row.get('distance'),
+            'urgency': row.get('urgency'),
+            'weight': row.get('weight'),
+            'location_type': row.get('location_type'),
+            'total_price': row.get('total_price'),
+            'status': row.get('status', 'pending'),
+            'created_at': row.get('created_at') or now
+        })
+        if row.get('action_log'):
+            log_rows.extend(entry_rows(ticket_id, row['action_log']))
+    
+    if delivery_rows:
+        db.execute(insert(Delivery), delivery_rows)
+    if log_rows:
+        db.execute(insert(ActionLogEntry), log_rows)
+    mark_changed(db, [row['ticket_id'] for row in delivery_rows])
+    if commit:
+        db.commit()
+    print(f"✅ Deliveries created: {len(delivery_rows)}")
+    return [row['ticket_id'] for row in delivery_rows]
+
+@CRUD_METRICS.instrument("bulk_update_status")
+def bulk_update_status(db: Session, ticket_ids: list, status: str,
+                       commit: bool = True) -> int:
+    """Set the same status on many deliveries, returns rows affected"""
+    affected = 0
+    for start in range(0, len(ticket_ids), _IN_CHUNK):
+        chunk = ticket_ids[start:start + _IN_CHUNK]
+        result = db.execute(
+            update(Delivery.__table__)
+            .where(Delivery.__table__.c.ticket_id.in_(chunk))
+            .values(status=status)
+        )
+        affected += result.rowcount
+    invalidate_on_commit(db, ticket_ids)
+    if commit:
+        db.commit()
+    print(f"✅ Deliveries updated: {affected} → {status}")
+    return affected
+
+@CRUD_METRICS.instrument("bulk_log_errors")
+def bulk_log_errors(db: Session, errors: list, commit: bool = True) -> list:
+    """
+    Insert many error logs in one statement
+    Each error: ticket_id, error_type, error_message, node_name (timestamp optional)
+    Returns the ticket IDs in input order
+    """
+    now = datetime.utcnow()
+    error_rows = [{
+        'ticket_id': error.get('ticket_id'),
+        'error_type': error.get('error_type'),
+        'error_message': error.get('error_message'),
+        'node_name': error.get('node_name'),
+        'timestamp': error.get('timestamp') or now
+    } for error in errors]
+    
+    if error_rows:
+        db.execute(insert(ErrorLog), error_rows)
+    if commit:
+        db.commit()
+    print(f"🚨 Errors logged: {len(error_rows)}")
+    return [row['ticket_id'] for row in error_rows]
+
+@CRUD_METRICS.instrument("get_delivery")
 def get_delivery(db: Session, ticket_id: str):
-    """Get delivery by ticket_id"""
-    return db.query(Delivery).filter(Delivery.ticket_id == ticket_id).first()
+    """
+    Get delivery by ticket_id
+    Includes writes still queued in the write-behind queue (if running)
+    Falls back to the monthly archive for tickets moved out of deliveries
+    """
+    writer = get_active_write_behind()
+    pending = writer.get_pending(ticket_id) if writer else None
+    if pending is None:
+        delivery = db.query(Delivery).filter(Delivery.ticket_id == ticket_id).first()
+        return delivery if delivery is not None else find_archived_delivery(db, ticket_id)
+    
+    fields, in_db = pending
+    if in_db:
+        # Queued updates are only an overlay: with no stored row (e.g. an
+        # update for a ticket that failed validation) there is no delivery
+        stored = db.query(Delivery).filter(Delivery.ticket_id == ticket_id).first()
+        if stored is None:
+            return find_archived_delivery(db, ticket_id)
+        base = {attr.key: getattr(stored, attr.key) for attr in inspect(Delivery).column_attrs}
+        base['action_log'] = stored.action_log
+        fields = {**base, **fields}
+    # Transient object, never attached to the session
+    return Delivery(**fields)
 
+@CRUD_METRICS.instrument("get_all_deliveries")
 def get_all_deliveries(db: Session, limit: int = 100):
-    """Get all deliveries, sorted by created_at descending"""
-    return db.query(Delivery).order_by(Delivery.created_at.desc()).limit(limit).all()
+    """
+    Get all deliveries, sorted by created_at descending
+    action_log is deferred (loaded on first access); list views should
+    use list_deliveries() / get_delivery_summaries() instead
+    """
+    return db.query(Delivery).options(defer(Delivery.legacy_action_log)).order_by(
+        Delivery.created_at.desc()
+    ).limit(limit).all()
+
+# ============ DELIVERY LISTING (KEYSET PAGING) ============
+# Pages are ordered newest first by (created_at, ticket_id). A cursor is the
+# position of the last row of the previous page, so page N costs the same
+# as page 1 (no OFFSET).
+
+# Columns returned by listings and exports (everything except action_log,
+# which only the detail view loads)
+LIST_COLUMNS = (
+    'ticket_id', 'user_id', 'material_type', 'distance', 'urgency', 'weight',
+    'location_type', 'total_price', 'status', 'created_at'
+)
+# Columns shown in the dashboard table
+SUMMARY_COLUMNS = (
+    'ticket_id', 'user_id', 'material_type', 'distance', 'total_price', 'status', 'created_at'
+)
+
+def encode_cursor(created_at: datetime, ticket_id: str) -> str:
+    """Opaque cursor for the row after which the next page starts"""
+    raw = json.dumps([created_at.isoformat(), ticket_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    """(created_at, ticket_id) from encode_cursor(); ValueError if malformed"""
+    try:
+        created_at, ticket_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), str(ticket_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+def _delivery_filters(status: str = None, user_id: str = None,
+                      created_after: datetime = None, created_before: datetime = None) -> list:
+    conditions = []
+    if status:
+        conditions.append(Delivery.status == status)
+    if user_id:
+        conditions.append(Delivery.user_id == user_id)
+    if created_after:
+        conditions.append(Delivery.created_at >= created_after)
+    if created_before:
+        conditions.append(Delivery.created_at < created_before)
+    return conditions
+
+def _list_query(filters: list, columns: tuple = LIST_COLUMNS):
+    # Keyset position is always selected, even if not asked for
+    names = tuple(columns) + tuple(c for c in ('created_at', 'ticket_id') if c not in columns)
+    return select(*[getattr(Delivery, name) for name in names]).where(*filters).order_by(
+        Delivery.created_at.desc(), Delivery.ticket_id.desc()
+    )
+
+@CRUD_METRICS.instrument("list_deliveries")
+def list_deliveries(db: Session, limit: int = 50, cursor: str = None, status: str = None,
+                    user_id: str = None, created_after: datetime = None,
+                    created_before: datetime = None, columns: tuple = LIST_COLUMNS):
+    """
+    One page of deliveries, newest first
+    Returns (rows, next_cursor): rows are dicts of the requested columns
+    (default LIST_COLUMNS), next_cursor is None on the last page
+    """
+    query = _page_query(limit, cursor, status, user_id, created_after, created_before, columns)
+    return _page(db.execute(query).mappings().all(), limit, columns)
 
+def _page_query(limit, cursor, status, user_id, created_after, created_before, columns):
+    filters = _delivery_filters(status, user_id, created_after, created_before)
+    if cursor:
+        # Row-value comparison lets the index seek straight to the cursor
+        filters.append(tuple_(Delivery.created_at, Delivery.ticket_id) < decode_cursor(cursor))
+    # Fetch one extra row to know whether another page exists
+    return _list_query(filters, columns).limit(limit + 1)
+
+def _page(rows, limit: int, columns: tuple):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['ticket_id'])
+    return [{name: row[name] for name in columns} for row in rows], next_cursor
+
+def iter_deliveries(db: Session, status: str = None, user_id: str = None,
+                    created_after: datetime = None, created_before: datetime = None,
+                    batch_size: int = 1000, columns: tuple = LIST_COLUMNS):
+    """
+    Stream every matching delivery as a dict of columns, newest first
+    Rows are fetched from the DB cursor batch_size at a time, so memory
+    stays flat however many rows match
+    """
+    filters = _delivery_filters(status, user_id, created_after, created_before)
+    result = db.execute(
+        _list_query(filters, columns),
+        execution_options={"yield_per": batch_size}
+    ).mappings()
+    try:
+        for row in result:
+            yield {name: row[name] for name in columns}
+    finally:
+        result.close()
+
+@CRUD_METRICS.instrument("get_delivery_summaries")
+def get_delivery_summaries(db: Session, limit: int = 100, user_id: str = None,
+                           status: str = None) -> list:
+    """
+    Newest deliveries as plain tuples of SUMMARY_COLUMNS
+    No ORM objects and no action_log, for lists and summaries
+    """
+    query = select(*[getattr(Delivery, name) for name in SUMMARY_COLUMNS]).where(
+        *_delivery_filters(status, user_id)
+    ).order_by(Delivery.created_at.desc(), Delivery.ticket_id.desc()).limit(limit)
+    return [tuple(row) for row in db.execute(query)]
+
+@CRUD_METRICS.instrument("get_user_deliveries")
 def get_user_deliveries(db: Session, user_id: str, limit: int = 50):
-    """Get all deliveries for a specific user"""
-    return db.query(Delivery).filter(
+    """Get all deliveries for a specific user (action_log deferred)"""
+    return db.query(Delivery).options(defer(Delivery.legacy_action_log)).filter(
         Delivery.user_id == user_id
     ).order_by(Delivery.created_at.desc()).limit(limit).all()
 
 # ============ ERROR LOG OPERATIONS ============
 
+@CRUD_METRICS.instrument("log_error")
 def log_error(db: Session, ticket_id: str, error_type: str, 
-              error_message: str, node_name: str):
-    """Log an error to the database"""
+              error_message: str, node_name: str, commit: bool = True):
+    """
+    Log an error to the database
+    commit=False only flushes (the caller's unit of work commits)
+    """
     error = ErrorLog(
         ticket_id=ticket_id,
         error_type=error_type,
@@ -102,10 +382,14 @@ def log_error(db: Session, ticket_id: str, error_type: str,
     )
     
     db.add(error)
-    db.commit()
+    if commit:
+        db.commit()
+    else:
+        db.flush()
     print(f"🚨 Error logged: {error_type} for {ticket_id}")
     return error
 
+@CRUD_METRICS.instrument("get_errors_by_ticket")
 def get_errors_by_ticket(db: Session, ticket_id: str):
     """Get all errors for a specific ticket"""
     return db.query(ErrorLog).filter(ErrorLog.ticket_id == ticket_id).all()
@@ -114,19 +398,72 @@ def get_all_errors(db: Session, limit: int = 100):
     """Get all errors"""
     return db.query(ErrorLog).order_by(ErrorLog.timestamp.desc()).limit(limit).all()
 
+# ============ NOTIFICATION OUTBOX ============
+
+@CRUD_METRICS.instrument("enqueue_notification")
+def enqueue_notification(db: Session, ticket_id: str, recipient: str, payload: dict,
+                         channel: str = 'email', commit: bool = True):
+    """
+    Add a notification to the outbox (sent later by the outbox dispatcher)
+    commit=False only flushes (the caller's unit of work commits)
+    """
+    now = datetime.utcnow()
+    notification = NotificationOutbox(
+        ticket_id=ticket_id,
+        channel=channel,
+        recipient=recipient,
+        payload=payload,
+        status='pending',
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now
+    )
+    
+    db.add(notification)
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+    print(f"📨 Notification queued: {channel} for {ticket_id}")
+    return notification
+
+def get_notifications_by_ticket(db: Session, ticket_id: str):
+    """Get all outbox notifications for a specific ticket"""
+    return db.query(NotificationOutbox).filter(
+        NotificationOutbox.ticket_id == ticket_id
+    ).order_by(NotificationOutbox.id).all()
+
 # ============ STATISTICS ============
 
-def get_delivery_stats(db: Session):
-    """Get delivery statistics"""
-    total = db.query(Delivery).count()
-    completed = db.query(Delivery).filter(Delivery.status == 'completed').count()
-    failed = db.query(Delivery).filter(Delivery.status == 'failed').count()
-    pending = db.query(Delivery).filter(Delivery.status == 'pending').count()
+@CRUD_METRICS.instrument("get_delivery_stats")
+def get_delivery_stats(db: Session, exact: bool = False):
+    """
+    Get delivery statistics
+    - Reads the delivery_stats counters (one row per status, cost independent
+      of table size)
+    - exact=True, or no counters yet: one grouped aggregate over deliveries
+      plus the archive partitions
+    """
+    rows = None if exact else db.query(
+        DeliveryStat.status, DeliveryStat.count, DeliveryStat.revenue
+    ).all()
+    if not rows:
+        rows = db.query(
+            Delivery.status, func.count(), func.coalesce(func.sum(Delivery.total_price), 0.0)
+        ).group_by(Delivery.status).all()
+        rows += archived_stats_rows(db)
+    
+    counts = {}
+    for status, count, revenue in rows:
+        counts[status] = counts.get(status, 0) + count
+    total = sum(counts.values())
+    completed = counts.get('completed', 0)
+    failed = counts.get('failed', 0)
+    pending = counts.get('pending', 0)
     
     # Calculate total revenue
-    deliveries = db.query(Delivery).filter(Delivery.total_price.isnot(None)).all()
-    total_revenue = sum(d.total_price for d in deliveries)
-    avg_price = total_revenue / completed if completed > 0 else 0
+    total_revenue = round(sum(revenue for status, count, revenue in rows), 2)
+    avg_price = round(total_revenue / completed, 2) if completed > 0 else 0
     
     return {
         "total_deliveries": total,
@@ -135,4 +472,55 @@ def get_delivery_stats(db: Session):
         "pending": pending,
         "total_revenue": total_revenue,
         "average_price": avg_price
-    }
\ No newline at end of file
+    }
+
+# ============ ASYNC READS ============
+# Same queries as the readers above, awaited on an AsyncSession
+# (AsyncReadSessionLocal) so the GET endpoints never block the event loop.
+
+@CRUD_METRICS.instrument("get_delivery_async")
+async def get_delivery_async(db: AsyncSession, ticket_id: str):
+    """get_delivery() for an AsyncSession; action_log is loaded up front"""
+    writer = get_active_write_behind()
+    if writer and writer.get_pending(ticket_id) is not None:
+        # Rare (write still queued): merge on the session's greenlet
+        delivery = await db.run_sync(get_delivery, ticket_id)
+        if delivery is not None:
+            delivery.action_log = delivery.action_log
+        return delivery
+    
+    delivery = (await db.execute(
+        select(Delivery).where(Delivery.ticket_id == ticket_id)
+    )).scalar_one_or_none()
+    if delivery is None:
+        return await db.run_sync(find_archived_delivery, ticket_id)
+    entries = (await db.execute(action_log_query(ticket_id))).scalars().all()
+    delivery.action_log = list(entries) if entries else list(delivery.legacy_action_log or [])
+    return delivery
+
+@CRUD_METRICS.instrument("list_deliveries_async")
+async def list_deliveries_async(db: AsyncSession, limit: int = 50, cursor: str = None,
+                                status: str = None, user_id: str = None,
+                                created_after: datetime = None, created_before: datetime = None,
+                                columns: tuple = LIST_COLUMNS):
+    """list_deliveries() for an AsyncSession; returns (rows, next_cursor)"""
+    query = _page_query(limit, cursor, status, user_id, created_after, created_before, columns)
+    rows = (await db.execute(query)).mappings().all()
+    return _page(rows, limit, columns)
+
+@CRUD_METRICS.instrument("get_delivery_stats_async")
+async def get_delivery_stats_async(db: AsyncSession, exact: bool = False):
+    """get_delivery_stats() for an AsyncSession"""
+    return await db.run_sync(get_delivery_stats, exact)
+
+@CRUD_METRICS.instrument("get_delivery_rows_async")
+async def get_delivery_rows_async(db: AsyncSession, ticket_ids, columns: tuple = SUMMARY_COLUMNS) -> list:
+    """Column dicts for the given tickets, newest first (missing ones are skipped)"""
+    ticket_ids = list(ticket_ids)
+    rows = []
+    for start in range(0, len(ticket_ids), _IN_CHUNK):
+        query = _list_query([Delivery.ticket_id.in_(ticket_ids[start:start + _IN_CHUNK])], columns)
+        rows.extend((await db.execute(query)).mappings().all())
+    rows.sort(key=lambda row: (row['created_at'], row['ticket_id']), reverse=True)
+    return [{name: row[name] for name in columns} for row in rows]
+
@@ -0,0 +1,212 @@
+# src/database/migrations.py
+from contextlib import contextmanager
+from datetime import datetime
+import os
+import sys
+import time
+from sqlalchemy import create_engine, inspect, text, select, update, null
+from sqlalchemy.exc import OperationalError
+from .models import Base, SchemaMigration, Delivery, engine as default_engine
+from .action_logs import append_action_logs
+
+# ============ MIGRATIONS ============
+# Append-only: never edit or reorder an entry once it has shipped.
+# Each step gets a Connection inside the migration transaction and must be
+# safe on a database where create_all() already built the current schema.
+
+def _create_indexes(*names):
+    """Step that creates model-declared indexes missing from the database"""
+    def apply(connection):
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in names and index.name not in existing:
+                    index.create(connection)
+                    print(f"   + index {index.name} on {table.name}")
+    return apply
+
+# Triggers keep delivery_stats in step with every write path (ORM, bulk
+# inserts, write-behind Core updates). SQLite syntax; on other databases
+# the table stays empty and get_delivery_stats() aggregates instead.
+_STATS_UPSERT = """
+    INSERT INTO delivery_stats (status, count, revenue)
+    VALUES (IFNULL(NEW.status, 'unknown'), 1, IFNULL(NEW.total_price, 0))
+    ON CONFLICT(status) DO UPDATE SET
+        count = count + 1,
+        revenue = revenue + excluded.revenue;
+"""
+
+_STATS_REMOVE = """
+    UPDATE delivery_stats SET
+        count = count - 1,
+        revenue = revenue - IFNULL(OLD.total_price, 0)
+    WHERE status = IFNULL(OLD.status, 'unknown');
+"""
+
+_STATS_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS trg_delivery_stats_insert
+        AFTER INSERT ON deliveries
+        BEGIN {_STATS_UPSERT} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_delivery_stats_update
+        AFTER UPDATE OF status, total_price ON deliveries
+        WHEN OLD.status IS NOT NEW.status OR OLD.total_price IS NOT NEW.total_price
+        BEGIN {_STATS_REMOVE} {_STATS_UPSERT} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_delivery_stats_delete
+        AFTER DELETE ON deliveries
+        BEGIN {_STATS_REMOVE} END""",
+]
+
+def _delivery_stats_counters(connection):
+    """Backfill delivery_stats from the current rows, then install the triggers"""
+    if connection.dialect.name != 'sqlite':
+        return
+    connection.execute(text("DELETE FROM delivery_stats"))
+    connection.execute(text("""
+        INSERT INTO delivery_stats (status, count, revenue)
+        SELECT IFNULL(status, 'unknown'), count(*), IFNULL(sum(total_price), 0)
+        FROM deliveries GROUP BY IFNULL(status, 'unknown')
+    """))
+    for statement in _STATS_TRIGGERS:
+        connection.execute(text(statement))
+
+def _drop_indexes(*names):
+    """Step that drops indexes replaced by newer ones"""
+    def apply(connection):
+        for name in names:
+            connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            print(f"   - index {name}")
+    return apply
+
+def _steps(*steps):
+    def apply(connection):
+        for step in steps:
+            step(connection)
+    return apply
+
+def _move_action_logs(connection, batch_size: int = 1000):
+    """Copy each deliveries.action_log blob into action_log_entries, then clear it"""
+    table = Delivery.__table__
+    last = ''
+    moved = 0
+    while True:
+        rows = connection.execute(
+            select(table.c.ticket_id, table.c.action_log)
+            .where(table.c.action_log.isnot(None), table.c.ticket_id > last)
+            .order_by(table.c.ticket_id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        moved += append_action_logs(connection, {
+            row.ticket_id: row.action_log for row in rows if isinstance(row.action_log, list)
+        })
+        connection.execute(
+            update(table)
+            .where(table.c.ticket_id.in_([row.ticket_id for row in rows]))
+            .values(action_log=null())
+        )
+        last = rows[-1].ticket_id
+    print(f"   moved {moved} action_log entries")
+
+MIGRATIONS = [
+    (1, "secondary indexes for hot query columns", _create_indexes(
+        'ix_deliveries_created_at',
+        'ix_deliveries_user_created',
+        'ix_deliveries_status_created',
+        'ix_error_logs_ticket_timestamp',
+        'ix_error_logs_timestamp',
+        'ix_notification_outbox_due',
+        'ix_notification_outbox_claim',
+        'ix_notification_outbox_ticket',
+    )),
+    (2, "incrementally maintained delivery_stats counters", _delivery_stats_counters),
+    (3, "keyset paging indexes (created_at, ticket_id tie-breaker)", _steps(
+        _drop_indexes('ix_deliveries_user_created', 'ix_deliveries_status_created'),
+        _create_indexes('ix_deliveries_user_page', 'ix_deliveries_status_page'),
+    )),
+    (4, "append-only action_log_entries (moves existing action_log blobs)", _move_action_logs),
+]
+
+# ============ RUNNER ============
+
+def applied_versions(bind) -> set:
+    """Migration versions already recorded in schema_migrations"""
+    if not inspect(bind).has_table(SchemaMigration.__tablename__):
+        return set()
+    table = SchemaMigration.__table__
+    return {row.version for row in bind.execute(table.select())}
+
+# Every worker runs migrate() at startup (uvicorn --workers N). Each step
+# runs under the database write lock and re-reads schema_migrations first,
+# so one worker applies it and the others find it done.
+_LOCK_TIMEOUT = float(os.getenv('MIGRATION_LOCK_TIMEOUT', '600'))
+_PG_LOCK_KEY = 0x64656c67   # "delg"
+
+def _lock(connection):
+    if connection.dialect.name == 'sqlite':
+        # pysqlite doesn't emit BEGIN for DDL; take the write lock ourselves
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+    elif connection.dialect.name == 'postgresql':
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PG_LOCK_KEY})
+
+@contextmanager
+def _migration_lock(engine):
+    """
+    Connection in a transaction that holds the database write lock
+    - Commits on exit, rolls back on error
+    - Waits up to MIGRATION_LOCK_TIMEOUT seconds for another process's
+      migration step (a long one can outlast busy_timeout)
+    """
+    deadline = time.monotonic() + _LOCK_TIMEOUT
+    with engine.connect() as connection:
+        while True:
+            try:
+                connection.begin()
+                _lock(connection)
+                break
+            except OperationalError as e:
+                connection.rollback()
+                if "locked" not in str(e) or time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+        try:
+            yield connection
+        except BaseException:
+            connection.rollback()
+            raise
+        connection.commit()
+
+def migrate(engine=None) -> list:
+    """
+    Apply pending migrations in order, one locked transaction each
+    Safe to run from several processes at once
+    Returns the versions applied by this call
+    """
+    engine = engine or default_engine
+    with _migration_lock(engine) as connection:
+        # Tables added since the database was created (never touches existing ones)
+        Base.metadata.create_all(connection)
+
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        with _migration_lock(engine) as connection:
+            if version in applied_versions(connection):
+                continue
+            print(f"🔧 Migration {version}: {description}")
+            apply(connection)
+            connection.execute(SchemaMigration.__table__.insert().values(
+                version=version,
+                description=description,
+                applied_at=datetime.utcnow()
+            ))
+        applied.append(version)
+
+    if applied:
+        print(f"✅ Applied {len(applied)} migration(s)")
+    return applied
+
+# ============ RUN DIRECTLY TO MIGRATE ============
+# python -m src.database.migrations [DATABASE_URL]
+if __name__ == "__main__":
+    migrate(create_engine(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -1,6 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, create_engine
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Index, create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, object_session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from contextlib import contextmanager
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
@@ -29,6 +32,13 @@ class User(Base):
 class Delivery(Base):
     """Delivery table to store all delivery requests and prices"""
     __tablename__ = 'deliveries'
+    __table_args__ = (
+        # Dashboard list (newest first) and keyset paging
+        Index('ix_deliveries_created_at', 'created_at', 'ticket_id'),
+        # Per-user history and status filters, in keyset order
+        Index('ix_deliveries_user_page', 'user_id', 'created_at', 'ticket_id'),
+        Index('ix_deliveries_status_page', 'status', 'created_at', 'ticket_id'),
+    )
     
     ticket_id = Column(String, primary_key=True)
     user_id = Column(String, nullable=False)
@@ -39,16 +49,61 @@ class Delivery(Base):
     location_type = Column(String)
     total_price = Column(Float)
     status = Column(String, default='pending')
-    action_log = Column(JSON, default=[])
+    # Whole-log JSON blob from before migration 4; entries now live in
+    # action_log_entries and this stays NULL
+    legacy_action_log = Column('action_log', JSON)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     
+    @property
+    def action_log(self):
+        """
+        Log entries, reassembled from action_log_entries on each access
+        (or the value set directly, e.g. on transient objects built from
+        pending write-behind state)
+        """
+        entries = self.__dict__.get('_action_log')
+        if entries is not None:
+            return entries
+        from .action_logs import load_action_log
+        db = object_session(self)
+        if db is None:
+            return list(self.legacy_action_log or [])
+        return load_action_log(db, self.ticket_id, self.legacy_action_log)
+    
+    @action_log.setter
+    def action_log(self, entries):
+        self.__dict__['_action_log'] = list(entries or [])
+    
     def __repr__(self):
         return f"<Delivery(ticket_id='{self.ticket_id}', status='{self.status}')>"
 
+# ============ ACTION LOG TABLE ============
+class ActionLogEntry(Base):
+    """
+    One action_log event per row, append-only
+    seq is the entry's position in the ticket's log
+    """
+    __tablename__ = 'action_log_entries'
+    __table_args__ = (
+        Index('ix_action_log_entries_ticket_seq', 'ticket_id', 'seq', unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    ticket_id = Column(String, nullable=False)
+    seq = Column(Integer, nullable=False)
+    entry = Column(JSON, nullable=False)
+    
+    def __repr__(self):
+        return f"<ActionLogEntry(ticket_id='{self.ticket_id}', seq={self.seq})>"
+
 # ============ ERROR LOG TABLE ============
 class ErrorLog(Base):
     """Error log table to track all errors in the system"""
     __tablename__ = 'error_logs'
+    __table_args__ = (
+        Index('ix_error_logs_ticket_timestamp', 'ticket_id', 'timestamp'),
+        Index('ix_error_logs_timestamp', 'timestamp'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     ticket_id = Column(String)
@@ -60,34 +115,272 @@ class ErrorLog(Base):
     def __repr__(self):
         return f"<ErrorLog(id={self.id}, ticket_id='{self.ticket_id}')>"
 
+# ============ NOTIFICATION OUTBOX TABLE ============
+class NotificationOutbox(Base):
+    """
+    Notifications waiting to be sent (drained by src/api/outbox.py)
+    status: pending -> sending -> sent / skipped / failed
+    """
+    __tablename__ = 'notification_outbox'
+    __table_args__ = (
+        # Dispatcher claim query
+        Index('ix_notification_outbox_due', 'status', 'next_attempt_at'),
+        Index('ix_notification_outbox_claim', 'claim_token'),
+        Index('ix_notification_outbox_ticket', 'ticket_id'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    ticket_id = Column(String)
+    channel = Column(String, default='email')
+    recipient = Column(String)
+    payload = Column(JSON, default={})
+    status = Column(String, default='pending')
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    claim_token = Column(String)
+    last_error = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+    
+    def __repr__(self):
+        return f"<NotificationOutbox(id={self.id}, ticket_id='{self.ticket_id}', status='{self.status}')>"
+
+# ============ DELIVERY STATS TABLE ============
+class DeliveryStat(Base):
+    """
+    Running count and revenue per delivery status
+    Kept current by triggers on deliveries (migration 2), so reading the
+    stats never scans the deliveries table
+    """
+    __tablename__ = 'delivery_stats'
+    
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    
+    def __repr__(self):
+        return f"<DeliveryStat(status='{self.status}', count={self.count})>"
+
+# ============ ARCHIVE INDEX TABLE ============
+class ArchivedDelivery(Base):
+    """Which monthly archive partition holds an archived ticket (see archive.py)"""
+    __tablename__ = 'archived_deliveries'
+    
+    ticket_id = Column(String, primary_key=True)
+    month = Column(String, nullable=False)          # YYYYMM of created_at
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ArchivedDelivery(ticket_id='{self.ticket_id}', month='{self.month}')>"
+
+# ============ SCHEMA MIGRATIONS TABLE ============
+class SchemaMigration(Base):
+    """Migrations already applied to this database (see migrations.py)"""
+    __tablename__ = 'schema_migrations'
+    
+    version = Column(Integer, primary_key=True)
+    description = Column(String)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<SchemaMigration(version={self.version})>"
+
 # ============ DATABASE CONNECTION ============
 # Get database URL from environment or use default SQLite
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///delivergraph.db')
 
-# Create database engine
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,  # Set to True to see SQL queries
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# Read-only endpoints can point at a replica; defaults to the same database
+READ_DATABASE_URL = os.getenv('READ_DATABASE_URL', DATABASE_URL)
+
+# ============ ENGINE PROFILES ============
+# Picked with DB_PROFILE. SQLite settings are applied as PRAGMAs on every
+# new connection; pool settings apply to any database.
+#   default:  SQLAlchemy/SQLite defaults (rollback journal)
+#   wal:      WAL so readers never wait for writers, fsync at checkpoints (default)
+#   durable:  WAL + fsync on every commit
+#   bulk:     WAL, no fsync, big cache - imports, benchmarks, throwaway DBs
+ENGINE_PROFILES = {
+    "default": {},
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,           # ms to wait for a lock before "database is locked"
+        "mmap_size": 256 * 1024 * 1024,
+        "pool_size": 10,
+        "max_overflow": 20,
+        "read_pool_size": 20,
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 10000,
+        "mmap_size": 256 * 1024 * 1024,
+        "pool_size": 10,
+        "max_overflow": 20,
+        "read_pool_size": 20,
+    },
+    "bulk": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "busy_timeout": 30000,
+        "mmap_size": 1024 * 1024 * 1024,
+        "cache_size": -262144,          # KiB (256 MB)
+        "pool_size": 4,
+        "max_overflow": 4,
+        "read_pool_size": 8,
+    },
+}
 
-# Create session factory
+SQLITE_PRAGMAS = ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size")
+
+DB_PROFILE = os.getenv('DB_PROFILE', 'wal')
+
+def _is_memory_url(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+def _pool_options(settings: dict, read_only: bool) -> dict:
+    if "pool_size" not in settings:
+        return {}
+    return {
+        "pool_size": int(os.getenv(
+            'DB_READ_POOL_SIZE' if read_only else 'DB_POOL_SIZE',
+            settings["read_pool_size" if read_only else "pool_size"]
+        )),
+        "max_overflow": int(os.getenv('DB_MAX_OVERFLOW', settings["max_overflow"]))
+    }
+
+def _install_pragmas(db_engine, settings: dict, in_memory: bool, read_only: bool):
+    """Apply the profile's SQLite PRAGMAs on every new DBAPI connection"""
+    pragmas = [(name, settings[name]) for name in SQLITE_PRAGMAS if name in settings]
+    if in_memory:
+        pragmas = [(name, value) for name, value in pragmas if name != "journal_mode"]
+    if read_only:
+        pragmas.append(("query_only", "ON"))
+    
+    @event.listens_for(db_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def _profile_settings(profile: str = None) -> dict:
+    profile = profile or DB_PROFILE
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Invalid DB profile: {profile}. Must be: {', '.join(ENGINE_PROFILES)}")
+    return ENGINE_PROFILES[profile]
+
+def create_db_engine(url: str, profile: str = None, read_only: bool = False):
+    """
+    Engine configured from an ENGINE_PROFILES entry
+    read_only=True opens SQLite connections with PRAGMA query_only, so a
+    stray write from a read path fails instead of taking the write lock
+    """
+    settings = _profile_settings(profile)
+    is_sqlite = url.startswith("sqlite")
+    in_memory = is_sqlite and _is_memory_url(url)
+    
+    options = {"echo": False}  # Set echo=True to see SQL queries
+    if is_sqlite:
+        options["connect_args"] = {"check_same_thread": False}
+    if in_memory:
+        # One shared connection: with a connection per thread, the workflow
+        # executor and threadpool reads would each see an empty database
+        options["poolclass"] = StaticPool
+    else:
+        options.update(_pool_options(settings, read_only))
+    db_engine = create_engine(url, **options)
+    
+    if is_sqlite:
+        _install_pragmas(db_engine, settings, in_memory, read_only)
+    return db_engine
+
+# asyncio drivers for the database URLs the app supports
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def async_database_url(url: str) -> str:
+    """Same database, asyncio driver (sqlite:///x.db -> sqlite+aiosqlite:///x.db)"""
+    scheme, _, rest = url.partition("://")
+    driver = ASYNC_DRIVERS.get(scheme.split("+")[0])
+    if driver is None:
+        raise ValueError(f"No async driver for {scheme}. Supported: {', '.join(ASYNC_DRIVERS)}")
+    return f"{driver}://{rest}"
+
+def create_async_db_engine(url: str, profile: str = None, read_only: bool = True):
+    """
+    AsyncEngine for the same database and profile as create_db_engine()
+    - SQLite goes through aiosqlite; connections are pooled like the sync
+      engine (aiosqlite's own default would open one per session)
+    - read_only=True (the default) applies PRAGMA query_only
+    """
+    settings = _profile_settings(profile)
+    if url.startswith("sqlite") and _is_memory_url(url):
+        raise ValueError("An in-memory database can't be shared with an async engine")
+    
+    options = {"echo": False}
+    pool = _pool_options(settings, read_only)
+    if pool:
+        options.update(pool, poolclass=AsyncAdaptedQueuePool)
+    db_engine = create_async_engine(async_database_url(url), **options)
+    
+    if url.startswith("sqlite"):
+        # PRAGMAs run through the sync facade of each aiosqlite connection
+        _install_pragmas(db_engine.sync_engine, settings, False, read_only)
+    return db_engine
+
+# Create database engines: one for the workflow/writers, one for GET endpoints
+engine = create_db_engine(DATABASE_URL)
+if READ_DATABASE_URL == DATABASE_URL and _is_memory_url(DATABASE_URL):
+    read_engine = engine    # a second in-memory engine would be a different database
+else:
+    read_engine = create_db_engine(READ_DATABASE_URL, read_only=True)
+
+# Create session factories
 SessionLocal = sessionmaker(
     bind=engine,
     autocommit=False,
     autoflush=False
 )
 
+# Read-only sessions for GET endpoints: their own connection pool, so list
+# and detail requests never queue behind pricing writers for a connection
+ReadSessionLocal = sessionmaker(
+    bind=read_engine,
+    autocommit=False,
+    autoflush=False
+)
+
+# Async read sessions for the GET endpoints: queries await aiosqlite instead
+# of blocking the event loop. In-memory databases can't be opened by a
+# second driver, so they only have the sync engines.
+if _is_memory_url(READ_DATABASE_URL):
+    async_read_engine = None
+    AsyncReadSessionLocal = None
+else:
+    async_read_engine = create_async_db_engine(READ_DATABASE_URL)
+    AsyncReadSessionLocal = async_sessionmaker(
+        bind=async_read_engine,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
 # ============ DATABASE INITIALIZATION ============
 def init_db():
     """
-    Initialize database - creates all tables
-    Run this once to set up the database
+    Initialize database - creates missing tables, then applies pending
+    schema migrations (safe to run on an existing database)
     """
+    from .migrations import migrate
+    
     print("🔧 Creating database tables...")
-    Base.metadata.create_all(engine)
+    # migrate() creates missing tables under the write lock, so workers
+    # starting together don't race on CREATE TABLE
+    migrate(engine)
     print("✅ Database initialized successfully!")
-    print(f"📁 Database location: {DATABASE_URL}")
+    print(f"📁 Database location: {DATABASE_URL} (profile: {DB_PROFILE})")
     
     # Print table names
     print("\n📊 Created tables:")
@@ -105,6 +398,37 @@ def get_db():
     finally:
         db.close()
 
+@contextmanager
+def workflow_session(config: dict = None):
+    """
+    Session for a workflow node
+    - Inside invoke_workflow(): the run's shared session from
+      config["configurable"]["db"], committed once when the run ends
+    - Standalone: a private session committed when the block exits
+    A failure inside the shared session rolls back the whole unit of work
+    and is recorded in db.info['unit_of_work_error'], so invoke_workflow()
+    fails the run even if the node catches the error and carries on
+    """
+    db = ((config or {}).get('configurable') or {}).get('db')
+    if db is not None:
+        try:
+            yield db
+        except Exception as e:
+            db.rollback()
+            db.info.setdefault('unit_of_work_error', e)
+            raise
+        return
+    
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
 # ============ RUN DIRECTLY TO INITIALIZE ============
 if __name__ == "__main__":
     init_db()
\ No newline at end of file
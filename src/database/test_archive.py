@@ -0,0 +1,92 @@
+# test_archive.py
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.orm import sessionmaker
+from src.database.models import create_db_engine, Delivery, ErrorLog, ArchivedDelivery
+from src.database.migrations import migrate
+from src.database.archive import (
+    archive_deliveries, archive_error_logs, purge_archives, compact, archive_months
+)
+from src.database.crud import (
+    bulk_create_deliveries, bulk_log_errors, get_delivery, get_delivery_stats, update_delivery
+)
+
+NOW = datetime(2024, 6, 15)
+
+@pytest.fixture
+def archive_db(tmp_path):
+    # Own database file: the shared test DB has old rows other tests rely on
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'archive.db'}")
+    migrate(engine)
+    Session = sessionmaker(bind=engine)
+
+    db = Session()
+    rows = []
+    for i, (days, status) in enumerate([(200, 'completed'), (190, 'failed'), (150, 'completed'),
+                                        (150, 'pending'), (10, 'completed')]):
+        rows.append({
+            'ticket_id': f"ARC-{i}", 'user_id': 'archiver', 'material_type': 'standard',
+            'distance': 10.0, 'urgency': 'standard', 'weight': 5.0, 'location_type': 'urban',
+            'total_price': 100.0 + i, 'status': status, 'created_at': NOW - timedelta(days=days),
+            'action_log': [("input_validated", "input")]
+        })
+    bulk_create_deliveries(db, rows)
+    bulk_log_errors(db, [
+        {'ticket_id': 'ARC-1', 'error_type': 'workflow_error', 'error_message': 'old',
+         'node_name': 'error_handler', 'timestamp': NOW - timedelta(days=190)}
+    ])
+    db.close()
+    yield engine, Session
+    engine.dispose()
+
+def test_archive_moves_old_finished_deliveries(archive_db):
+    engine, Session = archive_db
+    db = Session()
+    stats_before = get_delivery_stats(db)
+    db.close()
+
+    moved = archive_deliveries(90, Session, now=NOW)
+    assert moved == {'202311': 1, '202312': 1, '202401': 1}
+    assert archive_error_logs(90, Session, now=NOW) == {'202312': 1}
+
+    db = Session()
+    try:
+        # Hot table keeps only recent or unfinished tickets
+        assert sorted(t for (t,) in db.query(Delivery.ticket_id)) == ['ARC-3', 'ARC-4']
+        assert db.query(ErrorLog).count() == 0
+
+        # Router finds archived tickets with their action log
+        archived = get_delivery(db, 'ARC-0')
+        assert archived.status == 'completed' and archived.total_price == 100.0
+        assert archived.action_log == [["input_validated", "input"]]
+        assert get_delivery(db, 'ARC-4').ticket_id == 'ARC-4'
+        assert get_delivery(db, 'missing') is None
+
+        # Lifetime stats are unchanged; counters and the exact aggregate agree
+        assert get_delivery_stats(db) == stats_before
+        assert get_delivery_stats(db, exact=True) == stats_before
+        update_delivery(db, 'ARC-3', {'status': 'completed', 'total_price': 103.0})
+        assert get_delivery_stats(db) == get_delivery_stats(db, exact=True)
+    finally:
+        db.close()
+
+def test_retention_drops_old_partitions_and_compact_runs(archive_db):
+    engine, Session = archive_db
+    archive_deliveries(90, Session, now=NOW)
+    archive_error_logs(90, Session, now=NOW)
+
+    assert purge_archives(5, Session, now=NOW) == ['202311', '202312']
+    assert archive_months(engine) == ['202401']
+    assert not inspect(engine).has_table('error_logs_archive_202312')
+
+    db = Session()
+    try:
+        assert get_delivery(db, 'ARC-0') is None
+        assert db.query(ArchivedDelivery).count() == 1
+        assert get_delivery_stats(db) == get_delivery_stats(db, exact=True)
+    finally:
+        db.close()
+
+    sizes = compact(engine)
+    assert sizes["bytes_after"] <= sizes["bytes_before"]
@@ -1,6 +1,12 @@
 # test_database.py
-from src.database.models import SessionLocal
-from src.database.crud import create_user, create_delivery, get_all_users, get_all_deliveries
+from sqlalchemy import event
+from src.database.models import SessionLocal, engine
+from src.database.crud import (
+    create_user, create_delivery, get_all_users, get_all_deliveries,
+    bulk_create_deliveries, bulk_update_status, bulk_log_errors,
+    get_delivery, get_errors_by_ticket, update_delivery
+)
+from src.database.ticket_cache import TicketCache, ticket_cache, etag_matches
 
 def test_database():
     """Test database operations"""
@@ -41,5 +47,102 @@ def test_database():
     finally:
         db.close()
 
+def test_bulk_operations():
+    """Bulk create / status update / error log round trip"""
+    db = SessionLocal()
+    try:
+        rows = [{
+            'user_id': 'bulk-user',
+            'material_type': 'standard',
+            'distance': float(i + 1),
+            'urgency': 'standard',
+            'weight': 2.0,
+            'location_type': 'urban',
+            'action_log': [("input_validated", "input")]
+        } for i in range(3)]
+        rows[0]['ticket_id'] = 'DEL-BULK0'
+        ticket_ids = bulk_create_deliveries(db, rows)
+        assert ticket_ids[0] == 'DEL-BULK0'
+        assert len(set(ticket_ids)) == 3
+
+        assert bulk_update_status(db, ticket_ids + ['DEL-NOPE'], 'failed') == 3
+        assert bulk_log_errors(db, [{
+            'ticket_id': ticket_id,
+            'error_type': 'backfill',
+            'error_message': 'reprocessed',
+            'node_name': 'backfill'
+        } for ticket_id in ticket_ids]) == ticket_ids
+
+        delivery = get_delivery(db, ticket_ids[1])
+        assert delivery.status == 'failed'
+        assert delivery.distance == 2.0
+        assert delivery.action_log == [["input_validated", "input"]]
+        assert get_errors_by_ticket(db, ticket_ids[2])[0].error_type == 'backfill'
+    finally:
+        db.close()
+
+def test_update_delivery_is_a_single_update():
+    """No SELECT before or after the UPDATE unless asked for"""
+    db = SessionLocal()
+    statements = []
+    capture = lambda conn, cursor, statement, *args: statements.append(statement.split()[0])
+    try:
+        [ticket_id] = bulk_create_deliveries(db, [{'user_id': 'upd-user', 'material_type': 'heavy'}])
+        db.close()
+
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            affected = update_delivery(db, ticket_id, {'status': 'completed', 'total_price': 80.0},
+                                       return_object=False)
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        assert affected == 1
+        assert statements == ['UPDATE']
+
+        assert update_delivery(db, 'DEL-MISSING', {'status': 'failed'}, return_object=False) == 0
+        assert update_delivery(db, 'DEL-MISSING', {'status': 'failed'}) is None
+
+        delivery = update_delivery(db, ticket_id, {'total_price': 90.0}, refresh=True)
+        assert (delivery.status, delivery.total_price) == ('completed', 90.0)
+    finally:
+        db.close()
+
+def test_ticket_cache_is_invalidated_by_writes():
+    cache = TicketCache(maxsize=2)
+    body, etag = cache.put("T-1", "completed", b'{"status":"completed"}', cache.epoch)
+    assert cache.get("T-1") == (body, etag)
+    assert etag_matches(etag, etag) and etag_matches(f'"other", W/{etag}', etag)
+    assert not etag_matches('"other"', etag)
+
+    # Unfinished tickets and reads that raced an invalidation are not stored
+    cache.put("T-2", "pending", b"{}", cache.epoch)
+    stale_epoch = cache.epoch
+    cache.invalidate(["T-1"])
+    cache.put("T-1", "completed", b"{}", stale_epoch)
+    assert cache.get("T-1") is cache.get("T-2") is None
+
+    # A write to another ticket doesn't block caching this one
+    cache.put("T-3", "completed", b"{}", stale_epoch)
+    assert cache.get("T-3") is not None
+    cache.clear()
+    cache.put("T-3", "completed", b"{}", stale_epoch)
+    assert cache.get("T-3") is None
+
+    # update_delivery() drops the shared entry when its transaction commits
+    db = SessionLocal()
+    try:
+        ticket_id = bulk_create_deliveries(db, [{'user_id': 'cache-user', 'status': 'completed'}])[0]
+        ticket_cache.put(ticket_id, "completed", b"{}", ticket_cache.epoch)
+        update_delivery(db, ticket_id, {'status': 'failed'}, commit=False)
+        assert ticket_cache.get(ticket_id) is None
+        ticket_cache.put(ticket_id, "completed", b"{}", ticket_cache.epoch)
+        db.commit()
+        assert ticket_cache.get(ticket_id) is None
+    finally:
+        db.close()
+
 if __name__ == "__main__":
-    test_database()
\ No newline at end of file
+    test_database()
+    test_bulk_operations()
+    test_update_delivery_is_a_single_update()
+    test_ticket_cache_is_invalidated_by_writes()
@@ -0,0 +1,47 @@
+# test_engine.py
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from src.database.models import (
+    ENGINE_PROFILES, create_db_engine, engine, read_engine, SessionLocal, ReadSessionLocal
+)
+
+def _pragma(bind, name):
+    with bind.connect() as connection:
+        return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+def test_default_profile_uses_wal():
+    assert _pragma(engine, "journal_mode") == "wal"
+    assert _pragma(engine, "synchronous") == 1      # NORMAL
+    assert _pragma(engine, "busy_timeout") == ENGINE_PROFILES["wal"]["busy_timeout"]
+    assert engine.pool.size() == ENGINE_PROFILES["wal"]["pool_size"]
+
+def test_read_sessions_cannot_write():
+    assert read_engine is not engine
+    assert _pragma(read_engine, "query_only") == 1
+
+    db = ReadSessionLocal()
+    try:
+        with pytest.raises(OperationalError):
+            db.execute(text("DELETE FROM deliveries"))
+    finally:
+        db.close()
+
+def test_readers_see_committed_rows_while_a_write_is_open():
+    writer = SessionLocal()
+    reader = ReadSessionLocal()
+    try:
+        before = reader.execute(text("SELECT count(*) FROM users")).scalar()
+        reader.rollback()
+        writer.execute(text("INSERT INTO users (user_id, name) VALUES ('wal-user', 'WAL')"))
+        writer.flush()
+        # The writer holds the write lock; the reader neither blocks nor sees it
+        assert reader.execute(text("SELECT count(*) FROM users")).scalar() == before
+    finally:
+        writer.rollback()
+        writer.close()
+        reader.close()
+
+def test_unknown_profile_rejected():
+    with pytest.raises(ValueError):
+        create_db_engine("sqlite://", profile="turbo")
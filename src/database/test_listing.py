@@ -0,0 +1,110 @@
+# test_listing.py
+from datetime import datetime, timedelta
+import asyncio
+import pytest
+from sqlalchemy import insert, inspect
+from src.database.models import SessionLocal, AsyncReadSessionLocal, Delivery
+from src.database.crud import (
+    list_deliveries, iter_deliveries, decode_cursor, get_delivery_summaries,
+    get_user_deliveries, SUMMARY_COLUMNS, list_deliveries_async, get_delivery_async,
+    get_delivery_stats, get_delivery_stats_async
+)
+
+START = datetime(2021, 3, 1)
+
+@pytest.fixture(scope="module")
+def listing_rows():
+    # 25 rows, several sharing a created_at so the ticket_id tie-breaker matters
+    rows = [{
+        'ticket_id': f"DEL-LIST{i:03d}",
+        'user_id': 'list-user' if i % 2 else 'list-other',
+        'material_type': 'standard',
+        'distance': float(i + 1),
+        'status': 'completed' if i % 3 else 'failed',
+        'action_log': [],
+        'created_at': START + timedelta(minutes=i // 3)
+    } for i in range(25)]
+    db = SessionLocal()
+    try:
+        db.execute(insert(Delivery), rows)
+        db.commit()
+    finally:
+        db.close()
+    return sorted(rows, key=lambda r: (r['created_at'], r['ticket_id']), reverse=True)
+
+WINDOW = {'created_after': START, 'created_before': START + timedelta(days=1)}
+
+def _all_pages(db, limit, **filters):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = list_deliveries(db, limit, cursor=cursor, **WINDOW, **filters)
+        pages.append(rows)
+        if cursor is None:
+            return pages
+
+def test_keyset_pages_cover_every_row_once(listing_rows):
+    db = SessionLocal()
+    try:
+        pages = _all_pages(db, 4)
+        assert [len(page) for page in pages] == [4] * 6 + [1]
+        ticket_ids = [row['ticket_id'] for page in pages for row in page]
+        assert ticket_ids == [row['ticket_id'] for row in listing_rows]
+        assert 'action_log' not in pages[0][0]
+
+        failed_for_user = _all_pages(db, 2, status='failed', user_id='list-user')
+        expected = [r['ticket_id'] for r in listing_rows
+                    if r['status'] == 'failed' and r['user_id'] == 'list-user']
+        assert [row['ticket_id'] for page in failed_for_user for row in page] == expected
+    finally:
+        db.close()
+
+def test_iter_deliveries_streams_all_matches(listing_rows):
+    db = SessionLocal()
+    try:
+        streamed = [row['ticket_id'] for row in iter_deliveries(db, batch_size=7, **WINDOW)]
+        assert streamed == [row['ticket_id'] for row in listing_rows]
+    finally:
+        db.close()
+
+def test_list_reads_skip_action_log(listing_rows):
+    db = SessionLocal()
+    try:
+        rows, _ = list_deliveries(db, 3, columns=SUMMARY_COLUMNS, **WINDOW)
+        assert list(rows[0]) == list(SUMMARY_COLUMNS)
+
+        summaries = get_delivery_summaries(db, 5, user_id='list-user')
+        assert all(type(row) is tuple and len(row) == len(SUMMARY_COLUMNS) for row in summaries)
+
+        # ORM list helpers leave action_log unloaded until it is accessed
+        [delivery] = get_user_deliveries(db, 'list-user', limit=1)
+        assert 'legacy_action_log' in inspect(delivery).unloaded
+        assert delivery.action_log == []
+    finally:
+        db.close()
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+def test_async_reads_match_sync_reads(listing_rows):
+    async def read_async():
+        async with AsyncReadSessionLocal() as db:
+            first, cursor = await list_deliveries_async(db, 10, **WINDOW, columns=SUMMARY_COLUMNS)
+            second, _ = await list_deliveries_async(db, 10, cursor=cursor, **WINDOW,
+                                                    columns=SUMMARY_COLUMNS)
+            detail = await get_delivery_async(db, 'DEL-LIST004')
+            missing = await get_delivery_async(db, 'DEL-NOPE')
+            stats = await get_delivery_stats_async(db, exact=True)
+        return first + second, detail, missing, stats
+
+    rows, detail, missing, stats = asyncio.run(read_async())
+    db = SessionLocal()
+    try:
+        expected, _ = list_deliveries(db, 20, **WINDOW, columns=SUMMARY_COLUMNS)
+        assert rows == expected
+        assert stats == get_delivery_stats(db, exact=True)
+    finally:
+        db.close()
+    assert detail.ticket_id == 'DEL-LIST004' and detail.action_log == []
+    assert missing is None
+
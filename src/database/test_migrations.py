@@ -0,0 +1,161 @@
+# test_migrations.py
+from datetime import datetime
+import json
+import os
+import subprocess
+import sys
+import time
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import Session
+from src.database.models import SessionLocal, Delivery, engine
+from src.database.migrations import MIGRATIONS, migrate, applied_versions
+from src.database import crud
+
+# Schema as shipped before any migration (no secondary indexes)
+LEGACY_SCHEMA = [
+    """CREATE TABLE users (user_id VARCHAR NOT NULL, name VARCHAR NOT NULL, email VARCHAR,
+       phone VARCHAR, created_at DATETIME, PRIMARY KEY (user_id))""",
+    """CREATE TABLE deliveries (ticket_id VARCHAR NOT NULL, user_id VARCHAR NOT NULL,
+       material_type VARCHAR, distance FLOAT, urgency VARCHAR, weight FLOAT,
+       location_type VARCHAR, total_price FLOAT, status VARCHAR, action_log JSON,
+       created_at DATETIME, PRIMARY KEY (ticket_id))""",
+    """CREATE TABLE error_logs (id INTEGER NOT NULL, ticket_id VARCHAR, error_type VARCHAR,
+       error_message VARCHAR, node_name VARCHAR, timestamp DATETIME, PRIMARY KEY (id))""",
+    """INSERT INTO deliveries (ticket_id, user_id, status, action_log, created_at)
+       VALUES ('DEL-LEGACY1', 'old-user', 'completed',
+               '["✅ Input validated and ticket created", ["distance", "distance", 5.0]]',
+               '2024-01-01 00:00:00')""",
+]
+
+def test_migrate_upgrades_legacy_database(tmp_path):
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.execute(text(statement))
+
+    assert migrate(legacy) == [version for version, _, _ in MIGRATIONS]
+    assert migrate(legacy) == []
+
+    inspector = inspect(legacy)
+    indexes = {index['name'] for index in inspector.get_indexes('deliveries')}
+    assert {'ix_deliveries_created_at', 'ix_deliveries_user_page'} <= indexes
+    assert 'ix_deliveries_user_created' not in indexes
+    with legacy.connect() as connection:
+        assert applied_versions(connection) == {version for version, _, _ in MIGRATIONS}
+        # Existing rows survive, their logs move to action_log_entries
+        assert connection.execute(text("SELECT count(*) FROM deliveries")).scalar() == 1
+        assert connection.execute(text("SELECT action_log FROM deliveries")).scalar() is None
+
+    with Session(legacy) as db:
+        delivery = db.get(Delivery, 'DEL-LEGACY1')
+        assert delivery.action_log == [
+            "✅ Input validated and ticket created", ["distance", "distance", 5.0]
+        ]
+
+# Each worker waits for the same start time, then migrates the shared file
+CONCURRENT_MIGRATE = """
+import json, sys, time
+from sqlalchemy import create_engine
+from src.database.migrations import migrate
+
+url, start = sys.argv[1], float(sys.argv[2])
+engine = create_engine(url)
+time.sleep(max(0.0, start - time.time()))
+print(json.dumps(migrate(engine)))
+"""
+
+@pytest.mark.parametrize("legacy", [True, False], ids=["pending_migrations", "fresh_file"])
+def test_concurrent_workers_migrate_once(tmp_path, legacy):
+    url = f"sqlite:///{tmp_path / 'shared.db'}"
+    if legacy:
+        with create_engine(url).begin() as connection:
+            for statement in LEGACY_SCHEMA:
+                connection.execute(text(statement))
+
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    start = str(time.time() + 5)
+    workers = [
+        subprocess.Popen([sys.executable, "-c", CONCURRENT_MIGRATE, url, start], cwd=root,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        for _ in range(4)
+    ]
+    applied = []
+    for worker in workers:
+        out, err = worker.communicate(timeout=120)
+        assert worker.returncode == 0, err[-2000:]
+        applied += json.loads(out.strip().splitlines()[-1])
+
+    # Every step ran exactly once, in one of the workers
+    assert sorted(applied) == [version for version, _, _ in MIGRATIONS]
+    with create_engine(url).connect() as connection:
+        assert applied_versions(connection) == {version for version, _, _ in MIGRATIONS}
+
+def _query_plans(call):
+    """EXPLAIN QUERY PLAN for every SELECT a crud call issues"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    db = SessionLocal()
+    try:
+        call(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+        db.close()
+
+    plans = []
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            plans.append([row[-1] for row in rows])
+    return plans
+
+@pytest.mark.parametrize("call", [
+    lambda db: crud.get_all_deliveries(db, 50),
+    lambda db: crud.get_user_deliveries(db, 'plan-user'),
+    lambda db: crud.get_errors_by_ticket(db, 'DEL-PLAN1'),
+    lambda db: crud.get_all_errors(db, 50),
+    lambda db: db.query(crud.Delivery).filter(crud.Delivery.status == 'failed').count(),
+    lambda db: crud.list_deliveries(db, 20, cursor=crud.encode_cursor(datetime(2030, 1, 1), 'DEL-Z')),
+    lambda db: crud.list_deliveries(db, 20, status='completed',
+                                    cursor=crud.encode_cursor(datetime(2030, 1, 1), 'DEL-Z')),
+    lambda db: crud.list_deliveries(db, 20, user_id='plan-user'),
+], ids=["all_deliveries", "user_deliveries", "errors_by_ticket", "all_errors", "status_count",
+        "page_cursor", "page_status_cursor", "page_user"])
+def test_hot_queries_use_indexes(call):
+    plans = _query_plans(call)
+    assert plans
+    for plan in plans:
+        for detail in plan:
+            # A bare "SCAN <table>" is a full table scan; sorting in a temp
+            # b-tree means the ORDER BY isn't served by an index
+            assert not (detail.startswith("SCAN ") and "INDEX" not in detail), plan
+            assert "TEMP B-TREE" not in detail, plan
+
+def test_page_cursor_seeks_instead_of_scanning():
+    cursor = crud.encode_cursor(datetime(2030, 1, 1), 'DEL-Z')
+    [plan] = _query_plans(lambda db: crud.list_deliveries(db, 20, cursor=cursor))
+    assert plan[0].startswith("SEARCH deliveries USING"), plan
+
+def test_stats_counters_match_grouped_aggregate():
+    db = SessionLocal()
+    try:
+        crud.create_delivery(db, 'stats-user', {'material_type': 'standard'}, ticket_id='DEL-STATS1')
+        crud.create_delivery(db, 'stats-user', {'material_type': 'standard'}, ticket_id='DEL-STATS2')
+        crud.update_delivery(db, 'DEL-STATS1', {'status': 'completed', 'total_price': 120.5})
+        crud.update_delivery(db, 'DEL-STATS2', {'status': 'failed'})
+        crud.update_delivery(db, 'DEL-STATS1', {'total_price': 99.25})
+
+        stats = crud.get_delivery_stats(db)
+        assert stats == crud.get_delivery_stats(db, exact=True)
+        assert stats['completed'] >= 1 and stats['failed'] >= 1
+    finally:
+        db.close()
+
+    # Counter reads never touch the deliveries table
+    plans = _query_plans(lambda db: crud.get_delivery_stats(db))
+    assert all("deliveries" not in detail for plan in plans for detail in plan)
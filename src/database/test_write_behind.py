@@ -0,0 +1,107 @@
+# test_write_behind.py
+from src.database import write_behind
+from src.database.write_behind import WriteBehindQueue
+from src.database.models import SessionLocal
+from src.database.crud import get_delivery, get_errors_by_ticket
+from src.workflow import invoke_workflow
+
+INPUTS = {
+    'material_type': 'heavy',
+    'distance': 40.0,
+    'urgency': 'standard',
+    'weight': 25.0,
+    'location_type': 'rural'
+}
+
+def test_coalesces_ops_into_one_batch():
+    queue = WriteBehindQueue(flush_interval=60)
+    try:
+        queue.create_delivery('wb-user', INPUTS, ticket_id='DEL-WBCOAL1')
+        queue.update_delivery('DEL-WBCOAL1', {'total_price': 10.0})
+        queue.update_delivery('DEL-WBCOAL1', {'total_price': 420.0, 'status': 'completed'})
+        queue.log_error('DEL-WBCOAL1', 'workflow_error', 'boom', 'error_handler')
+        assert queue.flush(timeout=10)
+
+        assert queue.stats()['batches_written'] == 1
+        assert queue.get_pending('DEL-WBCOAL1') is None
+        db = SessionLocal()
+        try:
+            delivery = get_delivery(db, 'DEL-WBCOAL1')
+            assert delivery.total_price == 420.0
+            assert delivery.status == 'completed'
+            assert len(get_errors_by_ticket(db, 'DEL-WBCOAL1')) == 1
+        finally:
+            db.close()
+    finally:
+        queue.close()
+
+def test_reads_return_in_flight_state(monkeypatch):
+    queue = WriteBehindQueue(flush_interval=60)
+    monkeypatch.setattr(write_behind, '_write_behind', queue)
+    db = SessionLocal()
+    try:
+        queue.create_delivery('wb-user', INPUTS, ticket_id='DEL-WBREAD1')
+        assert get_delivery(db, 'DEL-WBREAD1').status == 'pending'
+
+        queue.update_delivery('DEL-WBREAD1', {'status': 'completed', 'total_price': 300.0})
+        delivery = get_delivery(db, 'DEL-WBREAD1')
+        assert delivery.status == 'completed'
+        assert delivery.material_type == 'heavy'
+
+        queue.flush(timeout=10)
+        queue.update_delivery('DEL-WBREAD1', {'status': 'failed'})
+        delivery = get_delivery(db, 'DEL-WBREAD1')
+        assert delivery.status == 'failed'
+        assert delivery.total_price == 300.0
+
+        # An update alone (no row, no queued create) is not a delivery
+        queue.update_delivery('DEL-WBNOROW', {'status': 'failed'})
+        assert get_delivery(db, 'DEL-WBNOROW') is None
+    finally:
+        db.close()
+        queue.close()
+
+def test_workflow_writes_through_queue():
+    queue = WriteBehindQueue(flush_interval=0.01)
+    try:
+        result = invoke_workflow(dict(INPUTS, user_id='wb-user'), write_behind=queue)
+    finally:
+        queue.close()
+
+    db = SessionLocal()
+    try:
+        delivery = get_delivery(db, result['ticket_id'])
+        assert delivery.status == 'completed'
+        assert delivery.total_price == result['total_price']
+    finally:
+        db.close()
+
+def test_action_log_survives_batch_retry():
+    failures = []
+
+    def flaky_session():
+        db = SessionLocal()
+        if not failures:
+            failures.append(db)
+            def fail():
+                raise RuntimeError("database is locked")
+            db.commit = fail
+        return db
+
+    queue = WriteBehindQueue(flush_interval=60, session_factory=flaky_session)
+    log = [("input_validated", "input"), ("final_price", "final_price", 1.0, 1.0, 0, 0, 1.0)]
+    try:
+        queue.create_delivery('wb-user', INPUTS, ticket_id='DEL-WBRETRY')
+        queue.update_delivery('DEL-WBRETRY', {'status': 'completed', 'action_log': log})
+        assert queue.flush(timeout=10)
+    finally:
+        queue.close()
+
+    assert failures
+    db = SessionLocal()
+    try:
+        delivery = get_delivery(db, 'DEL-WBRETRY')
+        assert delivery.status == 'completed'
+        assert [tuple(entry) for entry in delivery.action_log] == log
+    finally:
+        db.close()
@@ -0,0 +1,136 @@
+# src/database/ticket_cache.py
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+import time
+from sqlalchemy.orm import Session
+from .change_feed import add_change_listener, mark_changed
+
+# Tickets in these statuses only change through update_delivery() and
+# friends, which invalidate them, so they are safe to serve from memory
+CACHEABLE_STATUSES = ('completed', 'failed')
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag for an exact response body"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+class TicketCache:
+    """
+    Bounded LRU + TTL cache of ticket detail responses
+    - Each entry is the exact JSON body plus its strong ETag
+    - Only finished tickets are kept; writers invalidate through
+      invalidate_on_commit()
+    - The TTL bounds staleness from writes made by other processes
+    - Thread-safe
+    """
+    
+    def __init__(self, maxsize: int = 4096, ttl: float = 600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Logical clock, advanced by every invalidation. Each invalidated
+        # ticket remembers the epoch it was last written at; a read that
+        # started before that may have loaded the old row, so its put()
+        # is dropped. Reads of other tickets are unaffected.
+        self.epoch = 0
+        self._written = OrderedDict()
+        self._max_written = max(maxsize * 4, 1024)
+        # Reads that started before this epoch are dropped: the tickets
+        # they may have raced with were forgotten or the cache was cleared
+        self._floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, ticket_id: str):
+        """(body, etag) for a cached ticket, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(ticket_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[ticket_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(ticket_id)
+            self.hits += 1
+            return entry[1], entry[2]
+    
+    def put(self, ticket_id: str, status: str, body: bytes, epoch: int) -> tuple:
+        """
+        Cache a freshly loaded body if the ticket is finished and it was not
+        invalidated since epoch was read. Returns (body, etag) either way
+        """
+        etag = make_etag(body)
+        if self.maxsize <= 0 or status not in CACHEABLE_STATUSES:
+            return body, etag
+        with self._lock:
+            if epoch >= self._floor and self._written.get(ticket_id, 0) <= epoch:
+                self._entries[ticket_id] = (time.monotonic() + self.ttl, body, etag)
+                self._entries.move_to_end(ticket_id)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return body, etag
+    
+    def invalidate(self, ticket_ids):
+        with self._lock:
+            self.epoch += 1
+            for ticket_id in ticket_ids:
+                self._written[ticket_id] = self.epoch
+                self._written.move_to_end(ticket_id)
+                if self._entries.pop(ticket_id, None) is not None:
+                    self.invalidations += 1
+            while len(self._written) > self._max_written:
+                self._floor = self._written.popitem(last=False)[1]
+    
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self.epoch += 1
+            self._floor = self.epoch
+            self._written.clear()
+            self._entries.clear()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+# ============ SHARED CACHE ============
+ticket_cache = TicketCache(
+    maxsize=int(os.getenv('TICKET_CACHE_SIZE', '4096')),
+    ttl=float(os.getenv('TICKET_CACHE_TTL', '600'))
+)
+
+# ============ INVALIDATION ============
+
+def invalidate_on_commit(db: Session, ticket_ids):
+    """
+    Drop tickets now and again once db commits, so a reader that loaded
+    the old row in between can't put it back
+    """
+    ticket_ids = list(ticket_ids)
+    ticket_cache.invalidate(ticket_ids)
+    mark_changed(db, ticket_ids)
+
+add_change_listener(lambda ticket_ids: ticket_cache.invalidate(ticket_ids))
@@ -0,0 +1,295 @@
+# src/database/write_behind.py
+from datetime import datetime
+import atexit
+import os
+import queue
+import threading
+import time
+from sqlalchemy import insert, update, bindparam
+from .models import SessionLocal, Delivery, ErrorLog
+from .action_logs import append_action_logs
+from .ticket_cache import invalidate_on_commit
+from .change_feed import mark_changed
+
+# Durability levels
+#   buffered: writes return at once, a crash can lose up to one flush window
+#   flush:    writes block until the batch holding them has committed
+DURABILITY_LEVELS = ("buffered", "flush")
+
+_STOP = "stop"
+_FLUSH = "flush"
+
+class WriteBehindQueue:
+    """
+    Write-behind persistence for delivery records
+    - Nodes enqueue inserts/updates/error logs and return immediately
+    - A background thread coalesces them per ticket and writes each batch
+      in one transaction (flushes at max_batch ops or every flush_interval s)
+    - Rows not yet written stay readable through get_pending()
+    """
+
+    def __init__(self, max_batch: int = 500, flush_interval: float = 0.05,
+                 durability: str = "buffered", session_factory=None):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Invalid durability: {durability}. Must be: {', '.join(DURABILITY_LEVELS)}")
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self.session_factory = session_factory or SessionLocal
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = {}      # ticket_id -> {'seq', 'fields', 'in_db'}
+        self._seq = 0
+        self._closed = False
+        self.batches_written = 0
+        self.ops_written = 0
+        self.write_errors = 0
+
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    # ============ PRODUCERS ============
+
+    def create_delivery(self, user_id: str, inputs: dict, ticket_id: str) -> str:
+        """Queue a new delivery row (same columns as crud.create_delivery)"""
+        row = {
+            'ticket_id': ticket_id,
+            'user_id': user_id,
+            'material_type': inputs.get('material_type'),
+            'distance': inputs.get('distance'),
+            'urgency': inputs.get('urgency'),
+            'weight': inputs.get('weight'),
+            'location_type': inputs.get('location_type'),
+            'total_price': None,
+            'status': 'pending',
+            'created_at': datetime.utcnow()
+        }
+        self._submit('create', ticket_id, row)
+        return ticket_id
+
+    def update_delivery(self, ticket_id: str, updates: dict):
+        """Queue field updates for a delivery (merged with earlier ones)"""
+        fields = {
+            key: list(value) if isinstance(value, list) else value
+            for key, value in updates.items()
+            if hasattr(Delivery, key)
+        }
+        self._submit('update', ticket_id, fields)
+
+    def log_error(self, ticket_id: str, error_type: str, error_message: str, node_name: str):
+        """Queue an error log row"""
+        self._submit('error', ticket_id, {
+            'ticket_id': ticket_id,
+            'error_type': error_type,
+            'error_message': error_message,
+            'node_name': node_name,
+            'timestamp': datetime.utcnow()
+        })
+
+    # ============ READS ============
+
+    def get_pending(self, ticket_id: str):
+        """
+        In-flight state for a ticket, or None if nothing is queued
+        Returns (fields, in_db): in_db=False means the row isn't inserted yet
+        """
+        with self._lock:
+            entry = self._pending.get(ticket_id)
+            if entry is None:
+                return None
+            return dict(entry['fields']), entry['in_db']
+
+    # ============ CONTROL ============
+
+    def flush(self, timeout: float = None) -> bool:
+        """Block until everything queued so far is written"""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put((_FLUSH, None, None, None, done))
+        return done.wait(timeout)
+
+    def close(self, timeout: float = None):
+        """Flush remaining writes and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put((_STOP, None, None, None, None))
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "queued": self._queue.qsize(),
+            "pending_tickets": pending,
+            "batches_written": self.batches_written,
+            "ops_written": self.ops_written,
+            "write_errors": self.write_errors,
+            "durability": self.durability
+        }
+
+    # ============ WRITER ============
+
+    def _submit(self, kind: str, ticket_id: str, payload: dict):
+        if self._closed:
+            raise RuntimeError("Write-behind queue is closed")
+
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            if kind != 'error':
+                entry = self._pending.get(ticket_id)
+                if entry is None:
+                    entry = self._pending[ticket_id] = {'fields': {}, 'in_db': kind != 'create'}
+                entry['fields'].update(payload)
+                entry['seq'] = seq
+
+        done = threading.Event() if self.durability == "flush" else None
+        self._queue.put((kind, ticket_id, payload, seq, done))
+        if done is not None:
+            done.wait()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            ops = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(ops) < self.max_batch and ops[-1][0] not in (_STOP, _FLUSH):
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    ops.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            stop = ops[-1][0] == _STOP
+            writes = [op for op in ops if op[0] not in (_STOP, _FLUSH)]
+            if writes:
+                self._write(writes)
+            for op in ops:
+                if op[4] is not None:
+                    op[4].set()
+
+    def _write(self, ops: list):
+        """Coalesce ops per ticket and write them in one transaction"""
+        inserts = {}
+        updates = {}
+        errors = []
+        for kind, ticket_id, payload, seq, done in ops:
+            if kind == 'create':
+                inserts[ticket_id] = dict(payload)
+            elif kind == 'update':
+                if ticket_id in inserts:
+                    inserts[ticket_id].update(payload)
+                else:
+                    updates.setdefault(ticket_id, {}).update(payload)
+            else:
+                errors.append(payload)
+
+        try:
+            self._execute(list(inserts.values()), updates, errors)
+        except Exception as e:
+            # Retry ticket by ticket so one bad row doesn't drop the whole batch
+            print(f"⚠️ Write-behind batch failed ({e}), retrying per ticket")
+            for ticket_id in set(inserts) | set(updates):
+                try:
+                    self._execute(
+                        [inserts[ticket_id]] if ticket_id in inserts else [],
+                        {ticket_id: updates[ticket_id]} if ticket_id in updates else {},
+                        [row for row in errors if row['ticket_id'] == ticket_id]
+                    )
+                except Exception as row_error:
+                    self.write_errors += 1
+                    print(f"❌ Write-behind dropped writes for {ticket_id}: {row_error}")
+
+        last_seq = {}
+        for kind, ticket_id, payload, seq, done in ops:
+            last_seq[ticket_id] = seq
+        with self._lock:
+            for ticket_id, seq in last_seq.items():
+                entry = self._pending.get(ticket_id)
+                if entry is None:
+                    continue
+                if entry['seq'] <= seq:
+                    del self._pending[ticket_id]
+                else:
+                    entry['in_db'] = True
+
+        self.batches_written += 1
+        self.ops_written += len(ops)
+
+    def _execute(self, inserts: list, updates: dict, errors: list):
+        # action_log goes to the append-only entries table, not the row.
+        # The batch dicts are left untouched: a failed batch is retried
+        # per ticket with the same dicts.
+        new_logs = {row['ticket_id']: row['action_log'] for row in inserts if 'action_log' in row}
+        logs = {ticket_id: fields['action_log'] for ticket_id, fields in updates.items()
+                if 'action_log' in fields}
+        inserts = [_without_log(row) for row in inserts]
+        updates = {ticket_id: _without_log(fields) for ticket_id, fields in updates.items()}
+        updates = {ticket_id: fields for ticket_id, fields in updates.items() if fields}
+        
+        db = self.session_factory()
+        try:
+            if inserts:
+                db.execute(insert(Delivery), inserts)
+            # Group updates by column set so each group is one executemany
+            groups = {}
+            for ticket_id, fields in updates.items():
+                groups.setdefault(tuple(sorted(fields)), []).append(
+                    {'b_ticket_id': ticket_id, **fields}
+                )
+            table = Delivery.__table__
+            for columns, rows in groups.items():
+                db.execute(
+                    update(table)
+                    .where(table.c.ticket_id == bindparam('b_ticket_id'))
+                    .values({column: bindparam(column) for column in columns}),
+                    rows
+                )
+            if errors:
+                db.execute(insert(ErrorLog), errors)
+            append_action_logs(db, new_logs, new_tickets=True)
+            append_action_logs(db, logs)
+            invalidate_on_commit(db, updates.keys() | logs.keys())
+            mark_changed(db, [row['ticket_id'] for row in inserts])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+def _without_log(fields: dict) -> dict:
+    return {key: value for key, value in fields.items() if key != 'action_log'}
+
+# ============ SHARED QUEUE ============
+_write_behind = None
+_write_behind_lock = threading.Lock()
+
+def write_behind_enabled() -> bool:
+    return os.getenv('WRITE_BEHIND_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+
+def get_write_behind() -> WriteBehindQueue:
+    """Shared queue, started on first use (configured from the environment)"""
+    global _write_behind
+    with _write_behind_lock:
+        if _write_behind is None:
+            _write_behind = WriteBehindQueue(
+                max_batch=int(os.getenv('WRITE_BEHIND_MAX_BATCH', '500')),
+                flush_interval=float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', '0.05')),
+                durability=os.getenv('WRITE_BEHIND_DURABILITY', 'buffered')
+            )
+            atexit.register(_write_behind.close)
+        return _write_behind
+
+def get_active_write_behind():
+    """Shared queue if it has been started, else None (never starts it)"""
+    return _write_behind
+
+def writer_from_config(config: dict = None):
+    """Write-behind queue for this workflow run, if the run uses one"""
+    return ((config or {}).get('configurable') or {}).get('write_behind')
@@ -0,0 +1,138 @@
+# src/executor.py
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+import asyncio
+import multiprocessing
+import os
+from .workflow import invoke_workflow
+from .batch import price_batch
+from .utils.metrics import drain_observations, merge_observations
+
+# Executor kinds accepted by WorkflowExecutor
+#   thread:  shares the API process, overlaps I/O (default)
+#   process: one warm interpreter per worker, runs outside the API process GIL
+EXECUTOR_KINDS = ("thread", "process")
+
+def run_workflow(payload: dict) -> dict:
+    """Run one request through the compiled workflow (blocking, one commit)"""
+    return invoke_workflow(payload)
+
+def _init_worker():
+    """
+    Process pool initializer, runs once per worker
+    - Importing this module compiled the workflow graph
+    - Write-behind is off: a worker's queue is invisible to the API
+      process's reads and shutdown flush, so quotes commit directly
+    - Open a DB connection now so the first quote doesn't pay for it
+    """
+    from .database.write_behind import write_behind_enabled
+    if write_behind_enabled():
+        os.environ['WRITE_BEHIND_ENABLED'] = 'false'
+        print(f"ℹ️ Write-behind is off in workflow worker {os.getpid()} (process executor)")
+    from .database.models import engine
+    with engine.connect():
+        pass
+    print(f"✅ Workflow worker ready (pid {os.getpid()})")
+
+def _in_worker(fn, *args):
+    """
+    Process pool task wrapper: the result plus the metrics the worker
+    recorded, so node/CRUD/workflow timings reach the API's /metrics
+    A failed task keeps its observations; they ship with the next result
+    """
+    result = fn(*args)
+    return result, drain_observations()
+
+def _merged(returned):
+    result, observations = returned
+    merge_observations(observations)
+    return result
+
+def _resolve(future: Future, task: Future):
+    try:
+        future.set_result(_merged(task.result()))
+    except BaseException as e:
+        future.set_exception(e)
+
+class WorkflowExecutor:
+    """
+    Bounded worker pool for running blocking workflow code
+    - Keeps LangGraph, SQLAlchemy and SendGrid calls off the event loop
+    - max_workers caps how many quotes run at the same time
+    - kind="process" spreads quotes over CPU cores (not limited by the GIL)
+    """
+
+    def __init__(self, max_workers: int = None, kind: str = None,
+                 batch_chunk_size: int = None):
+        self.kind = kind or os.getenv('WORKFLOW_EXECUTOR', 'thread')
+        if self.kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Invalid executor kind: {self.kind}. Must be: {', '.join(EXECUTOR_KINDS)}")
+
+        default_workers = (os.cpu_count() or 1) if self.kind == "process" else 8
+        self.max_workers = max_workers or int(os.getenv('WORKFLOW_EXECUTOR_WORKERS', default_workers))
+        self.batch_chunk_size = batch_chunk_size or int(os.getenv('WORKFLOW_BATCH_CHUNK_SIZE', '1000'))
+
+        if self.kind == "process":
+            # spawn: workers never inherit the parent's DB connections or event loop
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="workflow"
+            )
+
+    def submit(self, fn, *args):
+        """Schedule fn(*args) on the pool, returns a concurrent Future"""
+        if self.kind == "process":
+            future = Future()
+            task = self._pool.submit(_in_worker, fn, *args)
+            task.add_done_callback(lambda task: _resolve(future, task))
+            return future
+        return self._pool.submit(fn, *args)
+
+    async def run(self, fn, *args):
+        """Await fn(*args) without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        if self.kind == "process":
+            return _merged(await loop.run_in_executor(self._pool, _in_worker, fn, *args))
+        return await loop.run_in_executor(self._pool, fn, *args)
+
+    async def invoke(self, payload: dict) -> dict:
+        """Async equivalent of workflow_app.invoke(payload)"""
+        return await self.run(run_workflow, payload)
+
+    def invoke_many(self, payloads: list) -> list:
+        """Run many payloads through the full workflow, results in input order"""
+        if self.kind == "process":
+            tasks = self._pool.map(_in_worker, [run_workflow] * len(payloads), payloads)
+            return [_merged(returned) for returned in tasks]
+        return list(self._pool.map(run_workflow, payloads))
+
+    async def price_batch(self, requests: list) -> list:
+        """
+        price_batch() split into chunks that run on separate workers
+        Each chunk is its own transaction
+        """
+        requests = [r.model_dump() if hasattr(r, 'model_dump') else dict(r) for r in requests]
+        size = self.batch_chunk_size
+        chunks = [requests[i:i + size] for i in range(0, len(requests), size)]
+        results = await asyncio.gather(*[self.run(price_batch, chunk) for chunk in chunks])
+        return [state for chunk in results for state in chunk]
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+# ============ SHARED EXECUTOR ============
+# Created on first use so process-pool workers (which import this module)
+# don't each build a pool of their own
+_workflow_executor = None
+
+def get_workflow_executor() -> WorkflowExecutor:
+    """Shared executor used by the API (configured from the environment)"""
+    global _workflow_executor
+    if _workflow_executor is None:
+        _workflow_executor = WorkflowExecutor()
+    return _workflow_executor
@@ -1,5 +1,6 @@
 # src/nodes/distance_node.py
 from ..utils.state import DeliveryState
+from ..utils.action_log import log_event
 
 def distance_node(state: DeliveryState) -> DeliveryState:
     """
@@ -13,11 +14,11 @@ def distance_node(state: DeliveryState) -> DeliveryState:
     
     if not distance or distance <= 0:
         state['error_message'] = "Invalid distance provided"
-        state['action_log'].append(f"❌ {state['error_message']}")
+        log_event(state, "error", "distance", state['error_message'])
         print("   ❌ Invalid distance")
         return state
     
-    state['action_log'].append(f"📍 Distance: {distance} km (manual input)")
+    log_event(state, "distance", "distance", distance)
     print(f"   ✅ Distance: {distance} km")
     
     return state
\ No newline at end of file
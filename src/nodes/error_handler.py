@@ -1,9 +1,11 @@
 # src/nodes/error_handler.py
 from ..utils.state import DeliveryState
+from ..utils.action_log import log_event
 from ..database.crud import log_error, update_delivery
-from ..database.models import SessionLocal
+from ..database.models import workflow_session
+from ..database.write_behind import writer_from_config
 
-def error_handler_node(state: DeliveryState) -> DeliveryState:
+def error_handler_node(state: DeliveryState, config: dict = None) -> DeliveryState:
     """
     Handles errors and logs escalation
     """
@@ -11,25 +13,30 @@ def error_handler_node(state: DeliveryState) -> DeliveryState:
     ticket_id = state['ticket_id']
     
     # Log to database
-    db = SessionLocal()
+    updates = {
+        'status': 'failed',
+        'action_log': state['action_log']
+    }
     try:
-        log_error(
-            db,
-            ticket_id=ticket_id,
-            error_type="workflow_error",
-            error_message=error_message,
-            node_name="error_handler"
-        )
+        writer = writer_from_config(config)
+        if writer:
+            writer.log_error(ticket_id, "workflow_error", error_message, "error_handler")
+            writer.update_delivery(ticket_id, updates)
+        else:
+            with workflow_session(config) as db:
+                log_error(
+                    db,
+                    ticket_id=ticket_id,
+                    error_type="workflow_error",
+                    error_message=error_message,
+                    node_name="error_handler",
+                    commit=False
+                )
+                
+                update_delivery(db, ticket_id, updates, commit=False, return_object=False)
         
-        update_delivery(db, ticket_id, {
-            'status': 'failed',
-            'action_log': state['action_log']
-        })
-        
-        state['action_log'].append(f"🚨 Error logged: {error_message}")
+        log_event(state, "error_logged", "error_handler", error_message)
     except Exception as e:
-        state['action_log'].append(f"⚠️ Error logging failed: {str(e)}")
-    finally:
-        db.close()
+        log_event(state, "error_logging_failed", "error_handler", str(e))
     
     return state
\ No newline at end of file
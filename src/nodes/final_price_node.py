@@ -1,9 +1,11 @@
 # src/nodes/final_price_node.py
 from ..utils.state import DeliveryState
+from ..utils.action_log import log_event
 from ..database.crud import update_delivery
-from ..database.models import SessionLocal
+from ..database.models import workflow_session
+from ..database.write_behind import writer_from_config
 
-def final_price_node(state: DeliveryState) -> DeliveryState:
+def final_price_node(state: DeliveryState, config: dict = None) -> DeliveryState:
     """
     Calculates final delivery price
     """
@@ -15,23 +17,24 @@ def final_price_node(state: DeliveryState) -> DeliveryState:
     total = (base * multiplier) + weight_surcharge + location_adj
     state['total_price'] = round(total, 2)
     
-    state['action_log'].append(
-        f"💳 Final Calculation: "
-        f"(₹{base} × {multiplier}) + ₹{weight_surcharge} + ₹{location_adj} = ₹{state['total_price']}"
-    )
+    log_event(state, "final_price", "final_price",
+              base, multiplier, weight_surcharge, location_adj, state['total_price'])
     
     # Update database
-    db = SessionLocal()
+    updates = {
+        'total_price': state['total_price'],
+        'action_log': state['action_log'],
+        'status': 'completed'
+    }
     try:
-        update_delivery(db, state['ticket_id'], {
-            'total_price': state['total_price'],
-            'action_log': state['action_log'],
-            'status': 'completed'
-        })
-        state['action_log'].append("✅ Price saved to database")
+        writer = writer_from_config(config)
+        if writer:
+            writer.update_delivery(state['ticket_id'], updates)
+        else:
+            with workflow_session(config) as db:
+                update_delivery(db, state['ticket_id'], updates, commit=False, return_object=False)
+        log_event(state, "price_saved", "final_price")
     except Exception as e:
-        state['action_log'].append(f"⚠️ Database update warning: {str(e)}")
-    finally:
-        db.close()
+        log_event(state, "db_update_warning", "final_price", str(e))
     
     return state
\ No newline at end of file
@@ -1,11 +1,16 @@
 # src/nodes/input_node.py
 from ..utils.state import DeliveryState
-from ..utils.pricing_config import validate_material_type, validate_urgency, validate_location_type
+from ..utils.pricing_config import (
+    validate_material_type, validate_urgency, validate_location_type,
+    invalid_option_message, get_pricing_table, refresh_pricing_table
+)
+from ..utils.action_log import log_event
 from ..database.crud import create_delivery
-from ..database.models import SessionLocal
+from ..database.models import workflow_session
+from ..database.write_behind import writer_from_config
 import uuid
 
-def input_node(state: DeliveryState) -> DeliveryState:
+def input_node(state: DeliveryState, config: dict = None) -> DeliveryState:
     """
     NODE 1: Input Validation
     - Validates all input parameters
@@ -32,6 +37,12 @@ def input_node(state: DeliveryState) -> DeliveryState:
     except Exception:
         state['retry_count'] = 0
     
+    # Pin the quote to one pricing table version, even if a new one is
+    # swapped in while it runs
+    refresh_pricing_table()
+    table = get_pricing_table()
+    state['pricing_version'] = table.version
+    
     # ============ VALIDATE REQUIRED FIELDS ============
     required_fields = {
         'material_type': state.get('material_type'),
@@ -45,72 +56,68 @@ def input_node(state: DeliveryState) -> DeliveryState:
     
     if missing:
         state['error_message'] = f"Missing required fields: {', '.join(missing)}"
-        state['action_log'].append(f"❌ Validation failed: {state['error_message']}")
+        log_event(state, "validation_failed", "input", state['error_message'])
         print(f"   ❌ {state['error_message']}")
         return state
     
     # ============ VALIDATE FIELD VALUES ============
     
     # Validate material type
-    if not validate_material_type(state['material_type']):
-        state['error_message'] = (
-            f"Invalid material_type: {state['material_type']}. "
-            f"Must be: standard, fragile, perishable, heavy"
-        )
-        state['action_log'].append(f"❌ {state['error_message']}")
+    if not validate_material_type(state['material_type'], table):
+        state['error_message'] = invalid_option_message('material_type', state['material_type'], table)
+        log_event(state, "error", "input", state['error_message'])
         print(f"   ❌ {state['error_message']}")
         return state
     
     # Validate urgency
-    if not validate_urgency(state['urgency']):
-        state['error_message'] = (
-            f"Invalid urgency: {state['urgency']}. "
-            f"Must be: standard, express, same_day"
-        )
-        state['action_log'].append(f"❌ {state['error_message']}")
+    if not validate_urgency(state['urgency'], table):
+        state['error_message'] = invalid_option_message('urgency', state['urgency'], table)
+        log_event(state, "error", "input", state['error_message'])
         print(f"   ❌ {state['error_message']}")
         return state
     
     # Validate location type
-    if not validate_location_type(state['location_type']):
-        state['error_message'] = (
-            f"Invalid location_type: {state['location_type']}. "
-            f"Must be: urban, suburban, rural"
-        )
-        state['action_log'].append(f"❌ {state['error_message']}")
+    if not validate_location_type(state['location_type'], table):
+        state['error_message'] = invalid_option_message('location_type', state['location_type'], table)
+        log_event(state, "error", "input", state['error_message'])
         print(f"   ❌ {state['error_message']}")
         return state
     
     # Validate numeric fields
     if state['distance'] <= 0:
         state['error_message'] = "Distance must be greater than 0 km"
-        state['action_log'].append(f"❌ {state['error_message']}")
+        log_event(state, "error", "input", state['error_message'])
         print(f"   ❌ {state['error_message']}")
         return state
     
     if state['weight'] <= 0:
         state['error_message'] = "Weight must be greater than 0 kg"
-        state['action_log'].append(f"❌ {state['error_message']}")
+        log_event(state, "error", "input", state['error_message'])
         print(f"   ❌ {state['error_message']}")
         return state
     
     # ============ SAVE TO DATABASE ============
-    db = SessionLocal()
+    inputs = {
+        'material_type': state['material_type'],
+        'distance': state['distance'],
+        'urgency': state['urgency'],
+        'weight': state['weight'],
+        'location_type': state['location_type']
+    }
     try:
-        create_delivery(db, state['user_id'], {
-            'material_type': state['material_type'],
-            'distance': state['distance'],
-            'urgency': state['urgency'],
-            'weight': state['weight'],
-            'location_type': state['location_type']
-        })
-        state['action_log'].append("✅ Input validated and ticket created")
+        writer = writer_from_config(config)
+        if writer:
+            writer.create_delivery(state['user_id'], inputs, ticket_id=state['ticket_id'])
+        else:
+            with workflow_session(config) as db:
+                create_delivery(db, state['user_id'], inputs,
+                                ticket_id=state['ticket_id'], commit=False)
+        log_event(state, "input_validated", "input")
+        log_event(state, "pricing_version", "input", table.version)
         print("   ✅ Validation successful")
     except Exception as e:
         state['error_message'] = f"Database error: {str(e)}"
-        state['action_log'].append(f"❌ {state['error_message']}")
+        log_event(state, "error", "input", state['error_message'])
         print(f"   ❌ Database error: {e}")
-    finally:
-        db.close()
     
     return state
\ No newline at end of file
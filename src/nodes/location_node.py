@@ -1,21 +1,20 @@
 # src/nodes/location_node.py
 from ..utils.state import DeliveryState
-from ..utils.pricing_config import PRICING_CONFIG
+from ..utils.pricing_config import pricing_table_for
+from ..utils.action_log import log_event
 
 def location_node(state: DeliveryState) -> DeliveryState:
     """
     Adjusts price based on location type
     """
     location_type = state.get('location_type', 'urban')
-    adjustment = PRICING_CONFIG['location_adjustments'].get(location_type, 0.0)
+    adjustment = pricing_table_for(state).location_adjustments.get(location_type, 0.0)
     
     state['location_adjustment'] = adjustment
     
     if adjustment > 0:
-        state['action_log'].append(
-            f"📍 Location: {location_type.upper()} (+₹{adjustment})"
-        )
+        log_event(state, "location_adjusted", "location", location_type, adjustment)
     else:
-        state['action_log'].append(f"📍 Location: {location_type.upper()}")
+        log_event(state, "location", "location", location_type)
     
     return state
\ No newline at end of file
@@ -1,6 +1,7 @@
 # src/nodes/material_node.py
 from ..utils.state import DeliveryState
-from ..utils.pricing_config import PRICING_CONFIG
+from ..utils.pricing_config import pricing_table_for
+from ..utils.action_log import log_event
 
 def material_pricing_node(state: DeliveryState) -> DeliveryState:
     """
@@ -9,17 +10,16 @@ def material_pricing_node(state: DeliveryState) -> DeliveryState:
     material_type = state.get('material_type', 'standard')
     distance = state.get('distance', 0)
     
+    table = pricing_table_for(state)
+    
     # Get base price for material
-    base = PRICING_CONFIG['material_base_prices'].get(material_type, 100.0)
+    base = table.material_base_prices.get(material_type, 100.0)
     
     # Add distance cost
-    distance_cost = distance * PRICING_CONFIG['distance_rate_per_km']
+    distance_cost = distance * table.distance_rate_per_km
     
     state['base_price'] = base + distance_cost
-    state['action_log'].append(
-        f"💰 Material pricing: {material_type.upper()} "
-        f"(base: ₹{base} + distance: {distance}km × ₹{PRICING_CONFIG['distance_rate_per_km']}/km) "
-        f"= ₹{state['base_price']}"
-    )
+    log_event(state, "material_priced", "material",
+              material_type, base, distance, table.distance_rate_per_km, state['base_price'])
     
     return state
\ No newline at end of file
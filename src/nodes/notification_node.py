@@ -1,13 +1,15 @@
 # src/nodes/notification_node.py
 from ..utils.state import DeliveryState
-from ..api.notifications import NotificationService
-from ..database.crud import get_user
-from ..database.models import SessionLocal
+from ..utils.action_log import log_event
+from ..database.crud import get_user, enqueue_notification
+from ..database.models import workflow_session
 
-def notification_node(state: DeliveryState) -> DeliveryState:
+def notification_node(state: DeliveryState, config: dict = None) -> DeliveryState:
     """
-    Sends price notification via email (optional)
-    Primary notification is via web UI
+    Queues the price notification email (optional)
+    - Only writes an outbox row; the outbox dispatcher (src/api/outbox.py)
+      sends it in the background, so SendGrid never slows down a quote
+    - Primary notification is via web UI
     """
     ticket_id = state['ticket_id']
     total_price = state['total_price']
@@ -16,42 +18,32 @@ def notification_node(state: DeliveryState) -> DeliveryState:
     # Get user email
     user_email = state.get('user_email')
     
-    if not user_email:
-        db = SessionLocal()
-        try:
+    with workflow_session(config) as db:
+        if not user_email:
             user = get_user(db, user_id)
             if user:
                 user_email = user.email
-        finally:
-            db.close()
-    
-    # Send email notification (optional)
-    if user_email:
-        notifier = NotificationService()
-        breakdown = {
-            'base_price': state.get('base_price', 0),
-            'urgency_multiplier': state.get('urgency_multiplier', 1.0),
-            'weight_surcharge': state.get('weight_surcharge', 0),
-            'location_adjustment': state.get('location_adjustment', 0)
-        }
-        
-        result = notifier.send_price_quote_email(
-            email=user_email,
-            ticket_id=ticket_id,
-            total_price=total_price,
-            breakdown=breakdown
-        )
         
-        if result['status'] == 'success':
-            state['action_log'].append(f"📧 Email sent to {user_email}")
-        elif result['status'] == 'skipped':
-            state['action_log'].append("ℹ️ Email notification skipped (not configured)")
+        # Queue email notification (optional)
+        if user_email:
+            payload = {
+                'total_price': total_price,
+                'breakdown': {
+                    'base_price': state.get('base_price', 0),
+                    'urgency_multiplier': state.get('urgency_multiplier', 1.0),
+                    'weight_surcharge': state.get('weight_surcharge', 0),
+                    'location_adjustment': state.get('location_adjustment', 0)
+                }
+            }
+            try:
+                enqueue_notification(db, ticket_id, user_email, payload, commit=False)
+                log_event(state, "email_queued", "notification", user_email)
+            except Exception as e:
+                log_event(state, "email_failed", "notification", str(e))
         else:
-            state['action_log'].append(f"⚠️ Email failed: {result['message']}")
-    else:
-        state['action_log'].append("ℹ️ No email provided for notification")
+            log_event(state, "no_email", "notification")
     
     # Primary notification is via web UI
-    state['action_log'].append("✅ Notification ready for display")
+    log_event(state, "notification_ready", "notification")
     
-    return state
\ No newline at end of file
+    return state
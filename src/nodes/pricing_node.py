@@ -0,0 +1,41 @@
+# src/nodes/pricing_node.py
+from ..utils.state import DeliveryState
+from .material_node import material_pricing_node
+from .urgency_node import urgency_node
+from .weight_node import weight_volume_node
+from .location_node import location_node
+from .final_price_node import final_price_node
+from ..utils.quote_cache import lookup_quote, store_quote
+
+# Pure pricing steps the fused node runs in a loop, in graph order.
+# final_price_node is not one of them: it takes config (shared DB session)
+# and runs once after the loop, on cache hits too.
+PRICE_COMPUTE_STEPS = (
+    material_pricing_node,
+    urgency_node,
+    weight_volume_node,
+    location_node,
+)
+
+def pricing_node(state: DeliveryState, config: dict = None) -> DeliveryState:
+    """
+    Fused pricing step (workflow mode="fused")
+    - Runs material, urgency, weight, location and final price in one graph step
+    - Produces the same state fields and action_log entries as the separate nodes
+    """
+    for step in PRICE_COMPUTE_STEPS:
+        state = step(state)
+    return final_price_node(state, config)
+
+
+def cached_pricing_node(state: DeliveryState, config: dict = None) -> DeliveryState:
+    """
+    Fused pricing step with the quote cache in front
+    - Hit: only final price runs (ticket update + audit log still written)
+    - Miss: runs every step and caches the result
+    """
+    if not lookup_quote(state):
+        for step in PRICE_COMPUTE_STEPS:
+            state = step(state)
+        store_quote(state)
+    return final_price_node(state, config)
@@ -0,0 +1,25 @@
+# src/nodes/quote_cache_node.py
+from ..utils.state import DeliveryState
+from ..utils.quote_cache import lookup_quote, store_quote
+
+def quote_cache_node(state: DeliveryState) -> DeliveryState:
+    """
+    Quote cache lookup (only wired when caching is enabled)
+    - Hit: restores pricing fields + log lines, skips to final price
+    - Miss: records where the pricing log starts for quote_cache_store_node
+    """
+    lookup_quote(state)
+    return state
+
+def quote_cache_store_node(state: DeliveryState) -> DeliveryState:
+    """
+    Stores the freshly computed pricing fields after a cache miss
+    """
+    store_quote(state)
+    return state
+
+def check_cache_hit(state: DeliveryState) -> str:
+    """Routing for the edge leaving quote_cache_node"""
+    if (state.get('quote_cache') or {}).get('hit'):
+        return "hit"
+    return "miss"
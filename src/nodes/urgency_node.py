@@ -1,17 +1,16 @@
 # src/nodes/urgency_node.py
 from ..utils.state import DeliveryState
-from ..utils.pricing_config import PRICING_CONFIG
+from ..utils.pricing_config import pricing_table_for
+from ..utils.action_log import log_event
 
 def urgency_node(state: DeliveryState) -> DeliveryState:
     """
     Applies urgency multiplier
     """
     urgency = state.get('urgency', 'standard')
-    multiplier = PRICING_CONFIG['urgency_multipliers'].get(urgency, 1.0)
+    multiplier = pricing_table_for(state).urgency_multipliers.get(urgency, 1.0)
     
     state['urgency_multiplier'] = multiplier
-    state['action_log'].append(
-        f"⚡ Urgency: {urgency.upper()} (multiplier: {multiplier}x)"
-    )
+    log_event(state, "urgency", "urgency", urgency, multiplier)
     
     return state
\ No newline at end of file
@@ -1,14 +1,16 @@
 # src/nodes/weight_node.py
 from ..utils.state import DeliveryState
-from ..utils.pricing_config import PRICING_CONFIG
+from ..utils.pricing_config import pricing_table_for
+from ..utils.action_log import log_event
 
 def weight_volume_node(state: DeliveryState) -> DeliveryState:
     """
     Adds surcharge for excess weight
     """
     weight = state.get('weight', 0)
-    threshold = PRICING_CONFIG['weight_thresholds']['threshold_kg']
-    surcharge_rate = PRICING_CONFIG['weight_thresholds']['surcharge_per_kg']
+    table = pricing_table_for(state)
+    threshold = table.weight_threshold_kg
+    surcharge_rate = table.surcharge_per_kg
     
     if weight > threshold:
         excess = weight - threshold
@@ -19,10 +21,8 @@ def weight_volume_node(state: DeliveryState) -> DeliveryState:
     state['weight_surcharge'] = surcharge
     
     if surcharge > 0:
-        state['action_log'].append(
-            f"⚖️ Weight: {weight}kg (excess: {excess}kg × ₹{surcharge_rate}/kg) = +₹{surcharge}"
-        )
+        log_event(state, "weight_surcharge", "weight", weight, excess, surcharge_rate, surcharge)
     else:
-        state['action_log'].append(f"⚖️ Weight: {weight}kg (within threshold)")
+        log_event(state, "weight_within_threshold", "weight", weight)
     
     return state
\ No newline at end of file
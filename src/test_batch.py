@@ -0,0 +1,94 @@
+# test_batch.py
+from src.batch import price_batch
+from src.workflow import app as workflow_app
+from src.database.models import SessionLocal
+from src.database.crud import get_delivery, get_errors_by_ticket
+from src.utils.pricing_config import (
+    PRICING_CONFIG, PricingTable, get_pricing_table, swap_pricing_table
+)
+
+COMPARED_FIELDS = [
+    'ticket_id', 'base_price', 'urgency_multiplier', 'weight_surcharge',
+    'location_adjustment', 'total_price', 'error_message'
+]
+
+def _requests():
+    sizes = [(0.1, 0.1), (12.3, 9.99), (47.7, 10.01), (333.3, 87.65), (15, 12)]
+    requests = []
+    for material in ['standard', 'fragile', 'perishable', 'heavy']:
+        for urgency in ['standard', 'express', 'same_day']:
+            for location in ['urban', 'suburban', 'rural']:
+                distance, weight = sizes[len(requests) % len(sizes)]
+                requests.append({
+                    'user_id': 'batch-user',
+                    'material_type': material,
+                    'distance': distance,
+                    'urgency': urgency,
+                    'weight': weight,
+                    'location_type': location
+                })
+    base = {'user_id': 'batch-user', 'material_type': 'standard', 'distance': 5.0,
+            'urgency': 'express', 'weight': 2.0, 'location_type': 'urban'}
+    requests.append({**base, 'material_type': 'glass'})
+    requests.append({**base, 'urgency': 'yesterday'})
+    requests.append({**base, 'location_type': 'moon'})
+    requests.append({**base, 'distance': -3.0})
+    requests.append({**base, 'weight': -1.0})
+    requests.append({**base, 'distance': None, 'weight': 0})
+    for i, request in enumerate(requests):
+        request['ticket_id'] = f"DEL-B{i:07d}"
+    return requests
+
+def test_price_batch_matches_workflow():
+    """Every batch result must equal the per-request workflow result"""
+    requests = _requests()
+    expected = [workflow_app.invoke(dict(r, ticket_id=r['ticket_id'] + 'W')) for r in requests]
+    results = price_batch(requests)
+
+    assert len(results) == len(requests)
+    for request, graph_state, batch_state in zip(requests, expected, results):
+        graph_state['ticket_id'] = graph_state['ticket_id'][:-1]
+        for field in COMPARED_FIELDS:
+            assert batch_state[field] == graph_state[field], (field, request)
+        # Batch quotes skip notifications, everything before them is identical
+        assert batch_state['action_log'] == graph_state['action_log'][:len(batch_state['action_log'])]
+
+def test_price_batch_persists_in_bulk():
+    requests = _requests()
+    for request in requests:
+        request['ticket_id'] += 'P'
+    results = price_batch(requests)
+
+    db = SessionLocal()
+    try:
+        ok = next(r for r in results if not r['error_message'])
+        delivery = get_delivery(db, ok['ticket_id'])
+        assert delivery.status == 'completed'
+        assert delivery.total_price == ok['total_price']
+
+        failed = next(r for r in results if r['error_message'])
+        assert get_delivery(db, failed['ticket_id']) is None
+        assert get_errors_by_ticket(db, failed['ticket_id'])[0].error_message == failed['error_message']
+    finally:
+        db.close()
+
+def test_price_batch_empty():
+    assert price_batch([]) == []
+
+def test_price_batch_errors_list_swapped_table_options():
+    original = get_pricing_table()
+    prices = dict(PRICING_CONFIG['material_base_prices'], oversized=300.0)
+    swap_pricing_table(PricingTable(dict(PRICING_CONFIG, material_base_prices=prices)))
+    base = {'user_id': 'batch-user', 'distance': 5.0, 'urgency': 'express',
+            'weight': 2.0, 'location_type': 'urban'}
+    try:
+        requests = [dict(base, material_type='oversized'), dict(base, material_type='glass')]
+        batch = price_batch([dict(r) for r in requests])
+        graph = workflow_app.invoke(dict(requests[1]))
+    finally:
+        swap_pricing_table(original)
+
+    assert batch[0]['error_message'] is None and batch[0]['base_price'] == 320.0
+    assert batch[1]['error_message'] == graph['error_message'] == (
+        "Invalid material_type: glass. Must be: standard, fragile, perishable, heavy, oversized"
+    )
@@ -0,0 +1,47 @@
+# test_executor.py
+from src.executor import WorkflowExecutor, run_workflow
+from src.database.models import SessionLocal
+from src.database.crud import get_delivery
+from src.utils.metrics import NODE_METRICS, WORKFLOW_METRICS
+
+REQUEST = {
+    'user_id': 'executor-user',
+    'material_type': 'standard',
+    'distance': 8.0,
+    'urgency': 'standard',
+    'weight': 3.0,
+    'location_type': 'urban'
+}
+
+def test_process_workers_report_metrics_to_parent():
+    calls = lambda metrics, *labels: metrics.calls.labels(*labels).value
+    node_before = calls(NODE_METRICS, "final_price_node", "ok")
+    workflow_before = calls(WORKFLOW_METRICS, "invoke_workflow", "ok")
+    seconds_before = WORKFLOW_METRICS.seconds.labels("invoke_workflow").snapshot()[2]
+
+    executor = WorkflowExecutor(max_workers=1, kind="process")
+    try:
+        results = executor.invoke_many([dict(REQUEST), dict(REQUEST)])
+        results.append(executor.submit(run_workflow, dict(REQUEST)).result(timeout=60))
+    finally:
+        executor.shutdown()
+
+    assert all(result['total_price'] for result in results)
+    assert calls(NODE_METRICS, "final_price_node", "ok") == node_before + 3
+    assert calls(WORKFLOW_METRICS, "invoke_workflow", "ok") == workflow_before + 3
+    assert WORKFLOW_METRICS.seconds.labels("invoke_workflow").snapshot()[2] == seconds_before + 3
+
+def test_process_workers_commit_without_write_behind(monkeypatch):
+    # A worker-side queue would hold the write long after the quote returned
+    monkeypatch.setenv('WRITE_BEHIND_ENABLED', 'true')
+    monkeypatch.setenv('WRITE_BEHIND_FLUSH_INTERVAL', '60')
+    executor = WorkflowExecutor(max_workers=1, kind="process")
+    db = SessionLocal()
+    try:
+        # Checked while the worker is still alive (its exit would flush a queue)
+        [result] = executor.invoke_many([dict(REQUEST)])
+        delivery = get_delivery(db, result['ticket_id'])
+        assert delivery is not None and delivery.status == 'completed'
+    finally:
+        db.close()
+        executor.shutdown()
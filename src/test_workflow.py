@@ -0,0 +1,215 @@
+# test_workflow.py
+import pytest
+from sqlalchemy import event
+from src.workflow import create_workflow, invoke_workflow
+from src.database.models import engine, SessionLocal, ActionLogEntry
+from src.database.crud import (
+    get_delivery, get_errors_by_ticket, get_notifications_by_ticket, update_delivery
+)
+from src.utils.pricing_config import (
+    PRICING_CONFIG, PricingTable, PricingVersionError, get_pricing_table,
+    pricing_table_for, swap_pricing_table
+)
+from src.utils.quote_cache import QuoteCache, quote_cache
+from src.utils.action_log import render_action_log
+from src.utils.metrics import NODE_METRICS, CRUD_METRICS, Histogram, render_metrics
+
+REQUEST = {
+    'user_id': 'workflow-user',
+    'material_type': 'fragile',
+    'distance': 15.0,
+    'urgency': 'express',
+    'weight': 12.5,
+    'location_type': 'suburban'
+}
+
+def test_fused_mode_matches_graph_mode():
+    graph_state = create_workflow("graph").invoke(dict(REQUEST, ticket_id="DEL-WFGRAPH"))
+    fused_state = create_workflow("fused").invoke(dict(REQUEST, ticket_id="DEL-WFFUSED"))
+
+    graph_state.pop('ticket_id')
+    fused_state.pop('ticket_id')
+    assert fused_state == graph_state
+    assert fused_state['total_price'] == 352.5
+
+def test_fused_mode_routes_errors():
+    state = create_workflow("fused").invoke(dict(REQUEST, material_type='glass'))
+    assert state['error_message'].startswith("Invalid material_type")
+    assert state['total_price'] is None
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        create_workflow("parallel")
+
+@pytest.mark.parametrize("mode", ["graph", "fused"])
+def test_quote_cache_hit_skips_pricing(mode):
+    quote_cache.clear()
+    app = create_workflow(mode, use_cache=True)
+    request = dict(REQUEST, distance=21.5)
+    before = quote_cache.stats()
+
+    miss = app.invoke(dict(request))
+    hit = app.invoke(dict(request))
+
+    stats = quote_cache.stats()
+    assert stats['misses'] == before['misses'] + 1
+    assert stats['hits'] == before['hits'] + 1
+    assert miss['quote_cache']['hit'] is False
+    assert hit['quote_cache']['hit'] is True
+    assert hit['total_price'] == miss['total_price']
+    assert hit['ticket_id'] != miss['ticket_id']
+    log = render_action_log(hit['action_log'])
+    assert "♻️ Quote served from cache" in log
+    assert log[-3] == "✅ Price saved to database"
+
+def test_quote_cache_invalidated_by_config_change():
+    quote_cache.clear()
+    app = create_workflow("fused", use_cache=True)
+    request = dict(REQUEST, distance=33.0)
+    first = app.invoke(dict(request))
+
+    original = get_pricing_table()
+    swap_pricing_table(PricingTable(dict(PRICING_CONFIG, distance_rate_per_km=5.0)))
+    try:
+        second = app.invoke(dict(request))
+    finally:
+        swap_pricing_table(original)
+
+    assert second['quote_cache']['hit'] is False
+    assert second['total_price'] > first['total_price']
+
+def test_pinned_pricing_table_outlives_rapid_swaps():
+    original = get_pricing_table()
+    state = {'pricing_version': original.version}
+    try:
+        # More swaps than _KEEP_VERSIONS while the quote is still running
+        for rate in range(10):
+            swap_pricing_table(PricingTable(dict(PRICING_CONFIG, distance_rate_per_km=10.0 + rate)))
+        assert pricing_table_for(state) is original
+    finally:
+        swap_pricing_table(original)
+
+    with pytest.raises(PricingVersionError):
+        pricing_table_for({'pricing_version': 'never-loaded'})
+
+def test_invalid_option_lists_pinned_table():
+    original = get_pricing_table()
+    prices = dict(PRICING_CONFIG['material_base_prices'], oversized=300.0)
+    swap_pricing_table(PricingTable(dict(PRICING_CONFIG, material_base_prices=prices)))
+    try:
+        state = create_workflow("graph").invoke(dict(REQUEST, material_type='glass'))
+    finally:
+        swap_pricing_table(original)
+    assert state['error_message'] == (
+        "Invalid material_type: glass. Must be: standard, fragile, perishable, heavy, oversized"
+    )
+
+def test_quote_cache_lru_and_ttl():
+    cache = QuoteCache(maxsize=2, ttl=60)
+    cache.put(('a',), 'v1', {'n': 1})
+    cache.put(('b',), 'v1', {'n': 2})
+    cache.get(('a',), 'v1')
+    cache.put(('c',), 'v1', {'n': 3})
+    assert cache.get(('b',), 'v1') is None
+    assert cache.get(('a',), 'v1') == {'n': 1}
+    assert cache.stats()['evictions'] == 1
+
+    cache.ttl = -1
+    cache.put(('d',), 'v1', {'n': 4})
+    assert cache.get(('d',), 'v1') is None
+    assert cache.stats()['expirations'] == 1
+
+@pytest.mark.parametrize("mode", ["graph", "fused"])
+def test_invoke_workflow_commits_once(mode):
+    commits = []
+    listener = lambda conn: commits.append(conn)
+    event.listen(engine, "commit", listener)
+    try:
+        result = invoke_workflow(dict(REQUEST), create_workflow(mode))
+        failed = invoke_workflow(dict(REQUEST, urgency='yesterday'), create_workflow(mode))
+    finally:
+        event.remove(engine, "commit", listener)
+
+    assert len(commits) == 2
+    db = SessionLocal()
+    try:
+        delivery = get_delivery(db, result['ticket_id'])
+        assert delivery.status == 'completed'
+        assert delivery.total_price == result['total_price']
+        assert get_errors_by_ticket(db, failed['ticket_id'])
+    finally:
+        db.close()
+
+def test_failed_write_rolls_back_whole_run(monkeypatch):
+    def broken_update(*args, **kwargs):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr("src.nodes.final_price_node.update_delivery", broken_update)
+
+    ticket_id = "DEL-WFBROKEN"
+    with pytest.raises(RuntimeError, match="quote not saved"):
+        invoke_workflow(dict(REQUEST, ticket_id=ticket_id, user_email="broken@example.com"))
+
+    # Neither the delivery nor its email: the row and the outbox agree
+    db = SessionLocal()
+    try:
+        assert get_delivery(db, ticket_id) is None
+        assert get_notifications_by_ticket(db, ticket_id) == []
+    finally:
+        db.close()
+
+def test_action_log_is_stored_append_only():
+    result = invoke_workflow(dict(REQUEST))
+    ticket_id = result['ticket_id']
+    saved = result['action_log'][:result['action_log'].index(("price_saved", "final_price"))]
+
+    db = SessionLocal()
+    try:
+        entries = db.query(ActionLogEntry).filter(ActionLogEntry.ticket_id == ticket_id)
+        assert entries.count() == len(saved)
+        assert get_delivery(db, ticket_id).legacy_action_log is None
+
+        # Re-saving the full log only inserts the new tail
+        update_delivery(db, ticket_id, {'action_log': result['action_log']})
+        assert entries.count() == len(result['action_log'])
+        assert render_action_log(get_delivery(db, ticket_id).action_log) == \
+            render_action_log(result['action_log'])
+    finally:
+        db.close()
+
+def test_action_log_renders_original_text():
+    state = create_workflow("graph").invoke(dict(REQUEST))
+    assert render_action_log(state['action_log']) == [
+        "✅ Input validated and ticket created",
+        f"🏷️ Pricing config: v{get_pricing_table().version}",
+        "📍 Distance: 15.0 km (manual input)",
+        "💰 Material pricing: FRAGILE (base: ₹150.0 + distance: 15.0km × ₹4.0/km) = ₹210.0",
+        "⚡ Urgency: EXPRESS (multiplier: 1.5x)",
+        "⚖️ Weight: 12.5kg (excess: 2.5kg × ₹5.0/kg) = +₹12.5",
+        "📍 Location: SUBURBAN (+₹25.0)",
+        "💳 Final Calculation: (₹210.0 × 1.5) + ₹12.5 + ₹25.0 = ₹352.5",
+        "✅ Price saved to database",
+        "ℹ️ No email provided for notification",
+        "✅ Notification ready for display",
+    ]
+    # Legacy rows stored plain strings
+    assert render_action_log(["📍 Location: URBAN"]) == ["📍 Location: URBAN"]
+
+def test_nodes_and_crud_are_timed():
+    calls = lambda metrics, *labels: metrics.calls.labels(*labels).value
+    before = (calls(NODE_METRICS, "final_price_node", "ok"), calls(CRUD_METRICS, "update_delivery", "ok"))
+    invoke_workflow(REQUEST)
+    assert calls(NODE_METRICS, "final_price_node", "ok") == before[0] + 1
+    assert calls(CRUD_METRICS, "update_delivery", "ok") == before[1] + 1
+    assert NODE_METRICS.in_flight.labels("final_price_node").value == 0
+
+    text = render_metrics()
+    assert '# TYPE delivergraph_node_duration_seconds histogram' in text
+    assert 'delivergraph_node_duration_seconds_bucket{node="input",le="+Inf"}' in text
+    assert 'delivergraph_node_duration_seconds_quantile{node="input",quantile="0.99"}' in text
+
+    histogram = Histogram("test_quantile_seconds", "quantile check", buckets=(1.0, 2.0, 4.0)).labels()
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 1.5      # halfway through the (1, 2] bucket
+    assert histogram.quantile(0.25) == 1.0
+
@@ -2,17 +2,27 @@
 from .state import DeliveryState
 from .pricing_config import (
     PRICING_CONFIG,
+    PricingTable,
+    get_pricing_table,
+    swap_pricing_table,
+    reload_pricing_table,
     validate_material_type,
     validate_urgency,
     validate_location_type,
-    get_valid_options
+    get_valid_options,
+    get_config_version
 )
 
 __all__ = [
     'DeliveryState',
     'PRICING_CONFIG',
+    'PricingTable',
+    'get_pricing_table',
+    'swap_pricing_table',
+    'reload_pricing_table',
     'validate_material_type',
     'validate_urgency',
     'validate_location_type',
-    'get_valid_options'
+    'get_valid_options',
+    'get_config_version'
 ]
\ No newline at end of file
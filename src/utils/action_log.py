@@ -0,0 +1,69 @@
+# src/utils/action_log.py
+
+# ============ EVENT FORMAT ============
+# action_log holds compact events instead of pre-rendered strings:
+#   (code, node, *args)   e.g. ("urgency", "urgency", "express", 1.5)
+# Events are stored as JSON arrays and only turned into text by
+# render_action_log() when the API/UI shows them. Plain strings (older
+# tickets) are passed through unchanged.
+
+# Templates render the exact text the nodes used to append
+TEMPLATES = {
+    # input / validation
+    "input_validated": lambda: "✅ Input validated and ticket created",
+    "validation_failed": lambda message: f"❌ Validation failed: {message}",
+    "error": lambda message: f"❌ {message}",
+    "pricing_version": lambda version: f"🏷️ Pricing config: v{version}",
+    # pricing
+    "distance": lambda distance: f"📍 Distance: {distance} km (manual input)",
+    "material_priced": lambda material_type, base, distance, rate, base_price: (
+        f"💰 Material pricing: {material_type.upper()} "
+        f"(base: ₹{base} + distance: {distance}km × ₹{rate}/km) "
+        f"= ₹{base_price}"
+    ),
+    "urgency": lambda urgency, multiplier: (
+        f"⚡ Urgency: {urgency.upper()} (multiplier: {multiplier}x)"
+    ),
+    "weight_surcharge": lambda weight, excess, rate, surcharge: (
+        f"⚖️ Weight: {weight}kg (excess: {excess}kg × ₹{rate}/kg) = +₹{surcharge}"
+    ),
+    "weight_within_threshold": lambda weight: f"⚖️ Weight: {weight}kg (within threshold)",
+    "location_adjusted": lambda location_type, adjustment: (
+        f"📍 Location: {location_type.upper()} (+₹{adjustment})"
+    ),
+    "location": lambda location_type: f"📍 Location: {location_type.upper()}",
+    "final_price": lambda base, multiplier, weight_surcharge, location_adj, total: (
+        f"💳 Final Calculation: "
+        f"(₹{base} × {multiplier}) + ₹{weight_surcharge} + ₹{location_adj} = ₹{total}"
+    ),
+    "quote_cache_hit": lambda: "♻️ Quote served from cache",
+    # persistence
+    "price_saved": lambda: "✅ Price saved to database",
+    "db_update_warning": lambda message: f"⚠️ Database update warning: {message}",
+    "error_logged": lambda message: f"🚨 Error logged: {message}",
+    "error_logging_failed": lambda message: f"⚠️ Error logging failed: {message}",
+    # notifications
+    "email_queued": lambda email: f"📨 Email queued for {email}",
+    "email_sent": lambda email: f"📧 Email sent to {email}",
+    "email_skipped": lambda: "ℹ️ Email notification skipped (not configured)",
+    "email_failed": lambda message: f"⚠️ Email failed: {message}",
+    "no_email": lambda: "ℹ️ No email provided for notification",
+    "notification_ready": lambda: "✅ Notification ready for display",
+}
+
+def log_event(state: dict, code: str, node: str, *args):
+    """Append one structured event to state['action_log']"""
+    state['action_log'].append((code, node) + args)
+
+def render_event(entry) -> str:
+    """Human-readable text for one action_log entry"""
+    if isinstance(entry, str):
+        return entry
+    template = TEMPLATES.get(entry[0])
+    if template is None:
+        return f"{entry[0]}: {', '.join(str(arg) for arg in entry[2:])}"
+    return template(*entry[2:])
+
+def render_action_log(entries) -> list:
+    """Render a whole action_log (events and/or legacy strings)"""
+    return [render_event(entry) for entry in entries or []]
@@ -0,0 +1,348 @@
+# src/utils/metrics.py
+from bisect import bisect_left
+from functools import wraps
+import inspect
+import os
+import threading
+import time
+
+# ============ SETTINGS ============
+# On by default: a timed call costs two perf_counter() reads and a few
+# locked increments. METRICS_ENABLED=false skips the wrappers entirely.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+# Seconds; nodes run in microseconds, SendGrid in hundreds of milliseconds
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Quantiles estimated from the buckets and exported next to each histogram
+QUANTILES = (0.5, 0.95, 0.99)
+
+# ============ METRIC TYPES ============
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+class _GaugeChild(_CounterChild):
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; cumulative only when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> tuple:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q: float, counts: list = None) -> float:
+        """
+        Estimate like PromQL histogram_quantile(): linear interpolation
+        inside the bucket that holds the q-th observation
+        """
+        counts = counts if counts is not None else self.snapshot()[0]
+        total = sum(counts)
+        if not total:
+            return float("nan")
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if seen + count >= rank and count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]     # in +Inf: best we can say
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+class MetricFamily:
+    """One named metric with labels; children are created on first use"""
+
+    def __init__(self, name: str, documentation: str, kind: str,
+                 labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._new_child()
+                    self._children[values] = child
+        return child
+
+    def _new_child(self):
+        if self.kind == "counter":
+            return _CounterChild()
+        if self.kind == "gauge":
+            return _GaugeChild()
+        return _HistogramChild(self.buckets)
+
+    def render(self) -> list:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}"
+        ]
+        quantile_lines = []
+        for values, child in sorted(self._children.items()):
+            labels = _labels(self.labelnames, values)
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{_braces(labels)} {_number(child.value)}")
+                continue
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket{_braces(labels + [('le', _number(bound))])} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_braces(labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_braces(labels)} {count}")
+            for q in QUANTILES:
+                quantile_lines.append(
+                    f"{self.name}_quantile{_braces(labels + [('quantile', str(q))])} "
+                    f"{_number(child.quantile(q, counts))}"
+                )
+        if quantile_lines:
+            lines += [
+                f"# HELP {self.name}_quantile {self.documentation} (p50/p95/p99 estimated from buckets)",
+                f"# TYPE {self.name}_quantile gauge",
+                *quantile_lines
+            ]
+        return lines
+
+def _labels(names: tuple, values: tuple) -> list:
+    return list(zip(names, values))
+
+def _braces(labels: list) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value != value:
+        return "NaN"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# ============ REGISTRY ============
+REGISTRY = []
+
+def Counter(name: str, documentation: str, labelnames: tuple = ()) -> MetricFamily:
+    return MetricFamily(name, documentation, "counter", labelnames)
+
+def Gauge(name: str, documentation: str, labelnames: tuple = ()) -> MetricFamily:
+    return MetricFamily(name, documentation, "gauge", labelnames)
+
+def Histogram(name: str, documentation: str, labelnames: tuple = (),
+              buckets: tuple = DEFAULT_BUCKETS) -> MetricFamily:
+    return MetricFamily(name, documentation, "histogram", labelnames, buckets)
+
+def render_metrics() -> str:
+    """Every registered metric in the Prometheus text format (0.0.4)"""
+    lines = []
+    for family in REGISTRY:
+        lines += family.render()
+    return "\n".join(lines) + "\n"
+
+# ============ PROCESS WORKERS ============
+# Process-pool workers have their own registry, which /metrics never sees.
+# Each task result carries what the worker recorded since its last task,
+# and the parent adds it to its own registry.
+
+def drain_observations() -> list:
+    """
+    Counter and histogram data recorded in this process, reset to zero
+    Gauges (in_flight) are left alone: they describe the worker right now
+    """
+    observations = []
+    for family in REGISTRY:
+        if family.kind == "gauge":
+            continue
+        for values, child in list(family._children.items()):
+            with child._lock:
+                if family.kind == "counter":
+                    data, child.value = child.value, 0.0
+                else:
+                    data = (child.counts, child.sum, child.count)
+                    child.counts, child.sum, child.count = [0] * len(child.counts), 0.0, 0
+            if data and (family.kind == "counter" or data[2]):
+                observations.append((family.name, values, data))
+    return observations
+
+def merge_observations(observations: list):
+    """Add drain_observations() output from a worker to this registry"""
+    families = {family.name: family for family in REGISTRY}
+    for name, values, data in observations:
+        family = families.get(name)
+        if family is None:
+            continue
+        child = family.labels(*values)
+        with child._lock:
+            if family.kind == "counter":
+                child.value += data
+            else:
+                counts, total, count = data
+                child.counts = [a + b for a, b in zip(child.counts, counts)]
+                child.sum += total
+                child.count += count
+
+# ============ TIMED OPERATIONS ============
+
+class OperationMetrics:
+    """
+    Latency histogram, outcome counter and in-flight gauge for one kind of
+    operation (workflow nodes, CRUD calls, SendGrid requests)
+      <prefix>_duration_seconds{<label>}
+      <prefix>_calls_total{<label>, outcome="ok"|"error"}
+      <prefix>_in_flight{<label>}
+    """
+
+    def __init__(self, prefix: str, label: str, description: str):
+        self.seconds = Histogram(f"{prefix}_duration_seconds", f"{description} latency in seconds", (label,))
+        self.calls = Counter(f"{prefix}_calls_total", f"{description} calls by outcome", (label, "outcome"))
+        self.in_flight = Gauge(f"{prefix}_in_flight", f"{description} calls running now", (label,))
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    def operation(self, name: str) -> "_Operation":
+        operation = self._operations.get(name)
+        if operation is None:
+            with self._lock:
+                operation = self._operations.get(name)
+                if operation is None:
+                    operation = self._operations[name] = _Operation(self, name)
+        return operation
+
+    def time(self, name: str):
+        """Context manager: with SENDGRID_METRICS.time("send"): ..."""
+        return _Timer(self.operation(name))
+
+    def instrument(self, name: str):
+        """
+        Decorator timing every call of a function (sync or async)
+        functools.wraps keeps the signature visible, so LangGraph still
+        passes config to nodes that take it
+        """
+        def decorator(func):
+            if not METRICS_ENABLED:
+                return func
+            operation = self.operation(name)
+            begin, end = operation.begin, operation.end
+
+            if inspect.iscoroutinefunction(func):
+                @wraps(func)
+                async def timed_async(*args, **kwargs):
+                    start = begin()
+                    try:
+                        result = await func(*args, **kwargs)
+                    except BaseException:
+                        end(start, True)
+                        raise
+                    end(start, False)
+                    return result
+                return timed_async
+
+            @wraps(func)
+            def timed(*args, **kwargs):
+                start = begin()
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException:
+                    end(start, True)
+                    raise
+                end(start, False)
+                return result
+            return timed
+        return decorator
+
+class _Operation:
+    """
+    The four children of one labelled operation, sharing one lock so a
+    timed call costs two lock round-trips (begin + end), not five
+    """
+
+    def __init__(self, metrics: OperationMetrics, name: str):
+        self.seconds = metrics.seconds.labels(name)
+        self.ok = metrics.calls.labels(name, "ok")
+        self.error = metrics.calls.labels(name, "error")
+        self.in_flight = metrics.in_flight.labels(name)
+        self._lock = threading.Lock()
+        for child in (self.seconds, self.ok, self.error, self.in_flight):
+            child._lock = self._lock
+
+    def begin(self) -> float:
+        with self._lock:
+            self.in_flight.value += 1
+        return time.perf_counter()
+
+    def end(self, start: float, failed: bool):
+        elapsed = time.perf_counter() - start
+        seconds = self.seconds
+        index = bisect_left(seconds.buckets, elapsed)
+        with self._lock:
+            seconds.counts[index] += 1
+            seconds.sum += elapsed
+            seconds.count += 1
+            self.in_flight.value -= 1
+            (self.error if failed else self.ok).value += 1
+
+class _Timer:
+    def __init__(self, operation: _Operation):
+        self.operation = operation
+
+    def __enter__(self):
+        if METRICS_ENABLED:
+            self.start = self.operation.begin()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if METRICS_ENABLED:
+            self.operation.end(self.start, exc_type is not None)
+        return False
+
+# ============ SHARED METRICS ============
+NODE_METRICS = OperationMetrics("delivergraph_node", "node", "Workflow node")
+CRUD_METRICS = OperationMetrics("delivergraph_crud", "operation", "Database CRUD")
+SENDGRID_METRICS = OperationMetrics("delivergraph_sendgrid", "operation", "SendGrid API")
+WORKFLOW_METRICS = OperationMetrics("delivergraph_workflow", "entrypoint", "Whole quote run")
@@ -1,4 +1,11 @@
 # src/utils/pricing_config.py
+from collections import OrderedDict
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
 
 # ============ PRICING CONFIGURATION ============
 PRICING_CONFIG = {
@@ -34,51 +41,215 @@ PRICING_CONFIG = {
     "distance_rate_per_km": 4.0     # Cost per kilometer
 }
 
+# ============ PRICING TABLES ============
+
+class PricingTable:
+    """
+    Immutable, precompiled snapshot of one pricing config version
+    - Flat per-enum lookups instead of nested string-keyed dicts
+    - Dense (index map + tuple) views for the vectorized batch kernels
+    - version: explicit "version" from the source, else a content hash
+    """
+    
+    def __init__(self, config: dict, version: str = None, source: str = "builtin"):
+        config = copy.deepcopy(config)
+        declared_version = config.pop("version", None)
+        self.config = config
+        self.version = str(version or declared_version or _fingerprint(config))
+        self.source = source
+        self.loaded_at = time.time()
+        
+        self.material_base_prices = dict(config["material_base_prices"])
+        self.urgency_multipliers = dict(config["urgency_multipliers"])
+        self.location_adjustments = dict(config["location_adjustments"])
+        self.distance_rate_per_km = config["distance_rate_per_km"]
+        self.weight_threshold_kg = config["weight_thresholds"]["threshold_kg"]
+        self.surcharge_per_kg = config["weight_thresholds"]["surcharge_per_kg"]
+        
+        # Dense views: enum value -> position, position -> rate
+        self.dense = {
+            "material_type": _dense(self.material_base_prices),
+            "urgency": _dense(self.urgency_multipliers),
+            "location_type": _dense(self.location_adjustments),
+        }
+    
+    def __repr__(self):
+        return f"<PricingTable(version='{self.version}', source='{self.source}')>"
+
+def _fingerprint(config: dict) -> str:
+    payload = json.dumps(config, sort_keys=True).encode()
+    return hashlib.sha1(payload).hexdigest()[:12]
+
+def _dense(rates: dict) -> tuple:
+    keys = tuple(rates)
+    return {key: i for i, key in enumerate(keys)}, tuple(rates[key] for key in keys)
+
+def load_pricing_table(path: str) -> PricingTable:
+    """Build a table from a JSON file shaped like PRICING_CONFIG"""
+    with open(path, encoding="utf-8") as f:
+        return PricingTable(json.load(f), source=path)
+
+# ============ ACTIVE TABLE (HOT SWAP) ============
+# Readers grab the module-level reference (atomic, no lock). Writers build
+# a complete table first and then swap the reference under _swap_lock.
+# Recent versions stay addressable so an in-flight quote keeps the table
+# it started with: the last _KEEP_VERSIONS, and any table replaced less
+# than _GRACE_SECONDS ago (a quote runs in milliseconds, so however fast
+# tables are swapped, a running quote's table is still held).
+_KEEP_VERSIONS = 8
+_GRACE_SECONDS = float(os.getenv('PRICING_TABLE_GRACE_SECONDS', '300'))
+_swap_lock = threading.Lock()
+_tables = OrderedDict()
+_retired_at = {}
+_active_table = None
+_config_path = os.getenv('PRICING_CONFIG_PATH')
+_config_mtime = None
+_next_poll = 0.0
+_POLL_SECONDS = float(os.getenv('PRICING_CONFIG_POLL_SECONDS', '5'))
+
+def get_pricing_table(version: str = None) -> PricingTable:
+    """Active pricing table, or a specific recent version if still held"""
+    if version is not None:
+        table = _tables.get(version)
+        if table is not None:
+            return table
+    return _active_table
+
+class PricingVersionError(LookupError):
+    """A quote is pinned to a pricing table version that is no longer held"""
+
+def pricing_table_for(state: dict) -> PricingTable:
+    """
+    Table a quote is pinned to (state['pricing_version']), else the active one
+    Raises PricingVersionError rather than pricing a pinned quote with a
+    different table
+    """
+    version = state.get('pricing_version')
+    if version is None:
+        return _active_table
+    table = _tables.get(version)
+    if table is None:
+        print(f"⚠️ Pricing table v{version} is no longer held (active: v{_active_table.version})")
+        raise PricingVersionError(f"Pricing table v{version} is no longer available")
+    return table
+
+def swap_pricing_table(table: PricingTable) -> PricingTable:
+    """Atomically make table the active one, returns the previous table"""
+    global _active_table
+    with _swap_lock:
+        previous = _active_table
+        now = time.monotonic()
+        if previous is not None and previous.version != table.version:
+            _retired_at[previous.version] = now
+        _retired_at.pop(table.version, None)
+        _tables[table.version] = table
+        _tables.move_to_end(table.version)
+        while len(_tables) > _KEEP_VERSIONS:
+            oldest = next(iter(_tables))
+            if now - _retired_at.get(oldest, now) < _GRACE_SECONDS:
+                break
+            del _tables[oldest]
+            _retired_at.pop(oldest, None)
+        _active_table = table
+    if previous is None or previous.version != table.version:
+        print(f"💱 Pricing table active: v{table.version} ({table.source})")
+    return previous
+
+def reload_pricing_table(path: str = None) -> PricingTable:
+    """Load path (or PRICING_CONFIG_PATH) and swap it in, no restart needed"""
+    global _config_path, _config_mtime
+    path = path or _config_path
+    if path:
+        table = load_pricing_table(path)
+        _config_path = path
+        _config_mtime = os.path.getmtime(path)
+    else:
+        table = PricingTable(PRICING_CONFIG)
+    swap_pricing_table(table)
+    return table
+
+def refresh_pricing_table():
+    """
+    Pick up edits to PRICING_CONFIG_PATH (checked at most every
+    PRICING_CONFIG_POLL_SECONDS), so every worker process follows the file
+    """
+    global _next_poll
+    if not _config_path or time.monotonic() < _next_poll:
+        return
+    _next_poll = time.monotonic() + _POLL_SECONDS
+    try:
+        if os.path.getmtime(_config_path) != _config_mtime:
+            reload_pricing_table(_config_path)
+    except Exception as e:
+        print(f"⚠️ Pricing config reload failed, keeping v{_active_table.version}: {e}")
+
+def get_config_version() -> str:
+    """Version of the active pricing table (cached quotes are keyed on it)"""
+    return _active_table.version
+
+if _config_path:
+    reload_pricing_table(_config_path)
+else:
+    swap_pricing_table(PricingTable(PRICING_CONFIG))
+
 # ============ VALIDATION FUNCTIONS ============
 
-def validate_material_type(material_type: str) -> bool:
+def validate_material_type(material_type: str, table: PricingTable = None) -> bool:
     """Check if material type is valid"""
-    return material_type in PRICING_CONFIG["material_base_prices"]
+    return material_type in (table or get_pricing_table()).material_base_prices
 
-def validate_urgency(urgency: str) -> bool:
+def validate_urgency(urgency: str, table: PricingTable = None) -> bool:
     """Check if urgency level is valid"""
-    return urgency in PRICING_CONFIG["urgency_multipliers"]
+    return urgency in (table or get_pricing_table()).urgency_multipliers
 
-def validate_location_type(location_type: str) -> bool:
+def validate_location_type(location_type: str, table: PricingTable = None) -> bool:
     """Check if location type is valid"""
-    return location_type in PRICING_CONFIG["location_adjustments"]
+    return location_type in (table or get_pricing_table()).location_adjustments
+
+# State field -> table attribute holding its valid options
+OPTION_FIELDS = {
+    "material_type": "material_base_prices",
+    "urgency": "urgency_multipliers",
+    "location_type": "location_adjustments",
+}
+
+def invalid_option_message(field: str, value, table: PricingTable = None) -> str:
+    """Validation error for an enum field, listing the table's own options"""
+    options = getattr(table or get_pricing_table(), OPTION_FIELDS[field])
+    return f"Invalid {field}: {value}. Must be: {', '.join(options)}"
 
 def get_valid_options():
     """Get all valid options for form dropdowns"""
+    table = get_pricing_table()
     return {
-        "material_types": list(PRICING_CONFIG["material_base_prices"].keys()),
-        "urgencies": list(PRICING_CONFIG["urgency_multipliers"].keys()),
-        "location_types": list(PRICING_CONFIG["location_adjustments"].keys())
+        "material_types": list(table.material_base_prices.keys()),
+        "urgencies": list(table.urgency_multipliers.keys()),
+        "location_types": list(table.location_adjustments.keys())
     }
 
 # ============ PRICING HELPERS ============
 
 def calculate_base_price(material_type: str, distance: float) -> float:
     """Calculate base price before modifiers"""
-    base = PRICING_CONFIG["material_base_prices"].get(material_type, 100.0)
-    distance_cost = distance * PRICING_CONFIG["distance_rate_per_km"]
+    table = get_pricing_table()
+    base = table.material_base_prices.get(material_type, 100.0)
+    distance_cost = distance * table.distance_rate_per_km
     return base + distance_cost
 
 def calculate_urgency_cost(base_price: float, urgency: str) -> float:
     """Calculate price after urgency multiplier"""
-    multiplier = PRICING_CONFIG["urgency_multipliers"].get(urgency, 1.0)
+    multiplier = get_pricing_table().urgency_multipliers.get(urgency, 1.0)
     return base_price * multiplier
 
 def calculate_weight_surcharge(weight: float) -> float:
     """Calculate weight surcharge"""
-    threshold = PRICING_CONFIG["weight_thresholds"]["threshold_kg"]
-    rate = PRICING_CONFIG["weight_thresholds"]["surcharge_per_kg"]
+    table = get_pricing_table()
     
-    if weight > threshold:
-        excess = weight - threshold
-        return excess * rate
+    if weight > table.weight_threshold_kg:
+        excess = weight - table.weight_threshold_kg
+        return excess * table.surcharge_per_kg
     return 0.0
 
 def calculate_location_adjustment(location_type: str) -> float:
     """Get location adjustment cost"""
-    return PRICING_CONFIG["location_adjustments"].get(location_type, 0.0)
\ No newline at end of file
+    return get_pricing_table().location_adjustments.get(location_type, 0.0)
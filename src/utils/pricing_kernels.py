@@ -0,0 +1,84 @@
+# src/utils/pricing_kernels.py
+import numpy as np
+from .pricing_config import PricingTable, get_pricing_table
+
+# ============ VALIDATION CODES ============
+# Order matches the checks in input_node, so the first failing rule wins
+VALID = 0
+MISSING_FIELDS = 1
+INVALID_MATERIAL = 2
+INVALID_URGENCY = 3
+INVALID_LOCATION = 4
+INVALID_DISTANCE = 5
+INVALID_WEIGHT = 6
+
+REQUIRED_FIELDS = ('material_type', 'distance', 'urgency', 'weight', 'location_type')
+
+# ============ LOOKUP TABLES ============
+
+def build_lookup_tables(table: PricingTable = None) -> dict:
+    """
+    NumPy arrays over the table's dense views
+    Each enum value maps to a position in its array
+    """
+    table = table or get_pricing_table()
+    return {
+        field: (index, np.array(values, dtype=np.float64))
+        for field, (index, values) in table.dense.items()
+    }
+
+def encode(values: list, index: dict) -> np.ndarray:
+    """Map enum strings to table positions (-1 for unknown values)"""
+    return np.fromiter((index.get(v, -1) for v in values), dtype=np.intp, count=len(values))
+
+# ============ KERNELS ============
+
+def validate_arrays(present: np.ndarray, material_idx: np.ndarray, urgency_idx: np.ndarray,
+                    location_idx: np.ndarray, distance: np.ndarray, weight: np.ndarray) -> np.ndarray:
+    """
+    Vectorized input validation
+    present: (N, 5) bool matrix, one column per REQUIRED_FIELDS entry
+    Returns one validation code per row
+    """
+    return np.select(
+        [
+            ~present.all(axis=1),
+            material_idx < 0,
+            urgency_idx < 0,
+            location_idx < 0,
+            distance <= 0,
+            weight <= 0,
+        ],
+        [
+            MISSING_FIELDS, INVALID_MATERIAL, INVALID_URGENCY,
+            INVALID_LOCATION, INVALID_DISTANCE, INVALID_WEIGHT,
+        ],
+        default=VALID
+    )
+
+def price_arrays(tables: dict, material_idx: np.ndarray, urgency_idx: np.ndarray,
+                 location_idx: np.ndarray, distance: np.ndarray, weight: np.ndarray,
+                 table: PricingTable = None) -> dict:
+    """
+    Vectorized version of material/urgency/weight/location/final price nodes
+    Operations run in the same order as the nodes, so every element is
+    bit-identical to the per-request float result (before rounding)
+    """
+    table = table or get_pricing_table()
+    threshold = table.weight_threshold_kg
+    surcharge_rate = table.surcharge_per_kg
+
+    base_price = tables['material_type'][1][material_idx] + distance * table.distance_rate_per_km
+    urgency_multiplier = tables['urgency'][1][urgency_idx]
+    weight_surcharge = np.where(weight > threshold, (weight - threshold) * surcharge_rate, 0.0)
+    location_adjustment = tables['location_type'][1][location_idx]
+
+    total = (base_price * urgency_multiplier) + weight_surcharge + location_adjustment
+
+    return {
+        'base_price': base_price,
+        'urgency_multiplier': urgency_multiplier,
+        'weight_surcharge': weight_surcharge,
+        'location_adjustment': location_adjustment,
+        'total': total
+    }
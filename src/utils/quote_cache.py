@@ -0,0 +1,139 @@
+# src/utils/quote_cache.py
+from collections import OrderedDict
+import os
+import threading
+import time
+from .pricing_config import get_config_version
+from .action_log import log_event
+
+# Fields the pricing nodes write, restored as-is on a cache hit
+CACHED_FIELDS = ('base_price', 'urgency_multiplier', 'weight_surcharge', 'location_adjustment')
+
+class QuoteCache:
+    """
+    Bounded LRU + TTL cache for priced quotes
+    - Keys are normalized inputs plus the pricing table version
+    - A config change clears every entry
+    - Thread-safe (the API may run workflows from several threads)
+    """
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._config_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    def get(self, key: tuple, config_version: str):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            self._check_version(config_version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: tuple, config_version: str, value: dict):
+        """Store a value, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._check_version(config_version)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> dict:
+        """Counters for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "config_version": self._config_version
+            }
+    
+    def _check_version(self, config_version: str):
+        # Caller holds the lock
+        if config_version != self._config_version:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self._config_version = config_version
+
+# ============ SHARED CACHE ============
+quote_cache = QuoteCache(
+    maxsize=int(os.getenv('QUOTE_CACHE_SIZE', '1024')),
+    ttl=float(os.getenv('QUOTE_CACHE_TTL', '300'))
+)
+
+def make_quote_key(state: dict) -> tuple:
+    """
+    Normalized cache key for a validated request
+    Numeric types are part of the key so cached log lines render identically
+    """
+    distance = state['distance']
+    weight = state['weight']
+    return (
+        state['material_type'], state['urgency'], state['location_type'],
+        distance, type(distance), weight, type(weight)
+    )
+
+def lookup_quote(state: dict, cache: QuoteCache = None) -> bool:
+    """
+    Apply a cached quote to the state
+    Returns True on a hit (pricing fields and log lines restored)
+    """
+    cache = cache or quote_cache
+    value = cache.get(make_quote_key(state), state.get('pricing_version') or get_config_version())
+    if value is None:
+        state['quote_cache'] = {'hit': False, 'log_start': len(state['action_log'])}
+        return False
+    
+    for field in CACHED_FIELDS:
+        state[field] = value[field]
+    state['action_log'].extend(value['action_log'])
+    log_event(state, "quote_cache_hit", "quote_cache")
+    state['quote_cache'] = {'hit': True, 'log_start': None}
+    return True
+
+def store_quote(state: dict, cache: QuoteCache = None):
+    """Cache the pricing fields and log lines written since lookup_quote()"""
+    cache = cache or quote_cache
+    log_start = (state.get('quote_cache') or {}).get('log_start')
+    if log_start is None:
+        return
+    
+    value = {field: state[field] for field in CACHED_FIELDS}
+    value['action_log'] = list(state['action_log'][log_start:])
+    cache.put(make_quote_key(state), state.get('pricing_version') or get_config_version(), value)
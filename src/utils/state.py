@@ -1,5 +1,5 @@
 # src/utils/state.py
-from typing import TypedDict, List, Optional
+from typing import TypedDict, List, Optional, Any
 
 class DeliveryState(TypedDict):
     """
@@ -24,11 +24,13 @@ class DeliveryState(TypedDict):
     urgency_multiplier: Optional[float]     # Urgency multiplier (1.0, 1.5, 2.0)
     weight_surcharge: Optional[float]       # Extra charge for excess weight
     location_adjustment: Optional[float]    # Location-based adjustment
+    pricing_version: Optional[str]          # Pricing table version the quote used
     
     # ============ FINAL OUTPUT ============
     total_price: Optional[float]            # Final calculated price
     
     # ============ METADATA ============
-    action_log: List[str]                   # Log of all processing steps
+    action_log: List[Any]                   # Structured log events (see utils/action_log.py)
     error_message: Optional[str]            # Error message if any
-    retry_count: int                        # Number of retry attempts
\ No newline at end of file
+    retry_count: int                        # Number of retry attempts
+    quote_cache: Optional[dict]             # Quote cache lookup (hit flag, log offset)
\ No newline at end of file
@@ -1,6 +1,10 @@
 # src/workflow.py
+import os
 from langgraph.graph import StateGraph, END
+from .database.models import SessionLocal
+from .database.write_behind import get_write_behind, write_behind_enabled
 from .utils.state import DeliveryState
+from .utils.metrics import NODE_METRICS, WORKFLOW_METRICS
 from .nodes.input_node import input_node
 from .nodes.distance_node import distance_node
 from .nodes.material_node import material_pricing_node
@@ -8,25 +12,47 @@ from .nodes.urgency_node import urgency_node
 from .nodes.weight_node import weight_volume_node
 from .nodes.location_node import location_node
 from .nodes.final_price_node import final_price_node
+from .nodes.pricing_node import pricing_node, cached_pricing_node
+from .nodes.quote_cache_node import quote_cache_node, quote_cache_store_node, check_cache_hit
 from .nodes.notification_node import notification_node
 from .nodes.error_handler import error_handler_node
 
-def create_workflow():
+# Workflow shapes accepted by create_workflow()
+#   graph: one node per pricing step (default, easiest to audit)
+#   fused: material/urgency/weight/location/final price run as one step
+WORKFLOW_MODES = ("graph", "fused")
+
+def create_workflow(mode: str = "graph", use_cache: bool = False):
     """
     Creates the LangGraph workflow
+    use_cache puts the shared quote cache (src/utils/quote_cache.py) in
+    front of the pricing nodes
     """
+    if mode not in WORKFLOW_MODES:
+        raise ValueError(f"Invalid workflow mode: {mode}. Must be: {', '.join(WORKFLOW_MODES)}")
+    
     workflow = StateGraph(DeliveryState)
     
+    def add_node(name, node):
+        # Every node is timed under its graph name (NODE_METRICS)
+        workflow.add_node(name, NODE_METRICS.instrument(name)(node))
+    
     # Add nodes
-    workflow.add_node("input", input_node)
-    workflow.add_node("distance_node", distance_node)
-    workflow.add_node("material", material_pricing_node)
-    workflow.add_node("urgency_node", urgency_node)
-    workflow.add_node("weight_volume_node", weight_volume_node)
-    workflow.add_node("location_node", location_node)
-    workflow.add_node("final_price_node", final_price_node)
-    workflow.add_node("notification_node", notification_node)
-    workflow.add_node("error_handler_node", error_handler_node)
+    add_node("input", input_node)
+    add_node("distance_node", distance_node)
+    if mode == "fused":
+        add_node("pricing_node", cached_pricing_node if use_cache else pricing_node)
+    else:
+        if use_cache:
+            add_node("quote_cache_node", quote_cache_node)
+            add_node("quote_cache_store_node", quote_cache_store_node)
+        add_node("material", material_pricing_node)
+        add_node("urgency_node", urgency_node)
+        add_node("weight_volume_node", weight_volume_node)
+        add_node("location_node", location_node)
+        add_node("final_price_node", final_price_node)
+    add_node("notification_node", notification_node)
+    add_node("error_handler_node", error_handler_node)
     
     # Define conditional routing
     def check_for_errors(state: DeliveryState):
@@ -47,24 +73,83 @@ def create_workflow():
         }
     )
     
+    if mode == "fused":
+        pricing_entry = "pricing_node"
+    elif use_cache:
+        pricing_entry = "quote_cache_node"
+    else:
+        pricing_entry = "material"
+    
     workflow.add_conditional_edges(
         "distance_node",
         check_for_errors,
         {
-            "continue": "material",
+            "continue": pricing_entry,
             "error_handler_node": "error_handler_node"
         }
     )
     
-    workflow.add_edge("material", "urgency_node")
-    workflow.add_edge("urgency_node", "weight_volume_node")
-    workflow.add_edge("weight_volume_node", "location_node")
-    workflow.add_edge("location_node", "final_price_node")
-    workflow.add_edge("final_price_node", "notification_node")
+    if mode == "fused":
+        workflow.add_edge("pricing_node", "notification_node")
+    else:
+        if use_cache:
+            workflow.add_conditional_edges(
+                "quote_cache_node",
+                check_cache_hit,
+                {
+                    "hit": "final_price_node",
+                    "miss": "material"
+                }
+            )
+        workflow.add_edge("material", "urgency_node")
+        workflow.add_edge("urgency_node", "weight_volume_node")
+        workflow.add_edge("weight_volume_node", "location_node")
+        if use_cache:
+            workflow.add_edge("location_node", "quote_cache_store_node")
+            workflow.add_edge("quote_cache_store_node", "final_price_node")
+        else:
+            workflow.add_edge("location_node", "final_price_node")
+        workflow.add_edge("final_price_node", "notification_node")
     workflow.add_edge("notification_node", END)
     workflow.add_edge("error_handler_node", END)
     
     return workflow.compile()
 
+@WORKFLOW_METRICS.instrument("invoke_workflow")
+def invoke_workflow(payload: dict, workflow=None, write_behind=None) -> dict:
+    """
+    Runs the workflow as one unit of work
+    - Every node shares one DB session (config["configurable"]["db"])
+    - All writes commit once, after the last node
+    - With a write-behind queue (or WRITE_BEHIND_ENABLED=true) delivery
+      writes are handed to the queue instead (config["configurable"]["write_behind"])
+    - If a node's DB write failed, the earlier writes were rolled back with
+      it: nothing is committed and the run raises RuntimeError
+    """
+    workflow = workflow or app
+    if write_behind is None and write_behind_enabled():
+        write_behind = get_write_behind()
+    
+    db = SessionLocal()
+    configurable = {"db": db}
+    if write_behind is not None:
+        configurable["write_behind"] = write_behind
+    try:
+        result = workflow.invoke(payload, config={"configurable": configurable})
+        error = db.info.pop('unit_of_work_error', None)
+        if error is not None:
+            # Writes after the failure started a new transaction; drop them too
+            raise RuntimeError(f"Database error, quote not saved: {error}") from error
+        db.commit()
+        return result
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
 # Create compiled workflow
-app = create_workflow()
\ No newline at end of file
+app = create_workflow(
+    os.getenv('WORKFLOW_MODE', 'graph'),
+    use_cache=os.getenv('QUOTE_CACHE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+)
\ No newline at end of file
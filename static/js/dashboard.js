@@ -1,9 +1,13 @@
 // static/js/dashboard.js
+// Rows kept in the table (newest first)
+const TABLE_LIMIT = 100;
 let deliveriesData = [];
+let deliveryStream = null;
 
-// Load deliveries on page load
+// Load the summary on page load, then follow live updates
 document.addEventListener('DOMContentLoaded', () => {
     loadDeliveries();
+    openDeliveryStream();
 });
 
 async function loadDeliveries() {
@@ -12,18 +16,13 @@ async function loadDeliveries() {
     document.getElementById('noData').classList.add('hidden');
     
     try {
-        const response = await fetch('/api/deliveries?limit=100');
+        // Stats are computed server-side over every delivery, not just these rows
+        const response = await fetch(`/api/dashboard/summary?limit=${TABLE_LIMIT}`);
         const data = await response.json();
         
-        deliveriesData = data;
-        
-        if (data.length === 0) {
-            document.getElementById('noData').classList.remove('hidden');
-        } else {
-            displayDeliveries(data);
-            updateStats(data);
-            document.getElementById('deliveriesTable').classList.remove('hidden');
-        }
+        deliveriesData = data.deliveries;
+        updateStats(data.stats);
+        renderTable();
         
     } catch (error) {
         console.error('Error loading deliveries:', error);
@@ -34,6 +33,43 @@ async function loadDeliveries() {
     }
 }
 
+function openDeliveryStream() {
+    if (!window.EventSource || deliveryStream) {
+        return;
+    }
+    // The browser reconnects on its own if the connection drops
+    deliveryStream = new EventSource('/api/dashboard/stream');
+    
+    deliveryStream.addEventListener('deliveries', (event) => {
+        const update = JSON.parse(event.data);
+        mergeDeliveries(update.deliveries);
+        updateStats(update.stats);
+        renderTable();
+    });
+    
+    // Sent when this page fell behind and missed updates
+    deliveryStream.addEventListener('resync', () => loadDeliveries());
+}
+
+function mergeDeliveries(changed) {
+    const byId = new Map(deliveriesData.map(d => [d.ticket_id, d]));
+    changed.forEach(d => byId.set(d.ticket_id, d));
+    deliveriesData = Array.from(byId.values())
+        .sort((a, b) => (b.created_at.localeCompare(a.created_at) || b.ticket_id.localeCompare(a.ticket_id)))
+        .slice(0, TABLE_LIMIT);
+}
+
+function renderTable() {
+    if (deliveriesData.length === 0) {
+        document.getElementById('noData').classList.remove('hidden');
+        document.getElementById('deliveriesTable').classList.add('hidden');
+        return;
+    }
+    document.getElementById('noData').classList.add('hidden');
+    filterTable();
+    document.getElementById('deliveriesTable').classList.remove('hidden');
+}
+
 function displayDeliveries(deliveries) {
     const tbody = document.getElementById('deliveriesBody');
     tbody.innerHTML = '';
@@ -63,18 +99,11 @@ function displayDeliveries(deliveries) {
     });
 }
 
-function updateStats(deliveries) {
-    const total = deliveries.length;
-    const completed = deliveries.filter(d => d.status === 'completed').length;
-    const totalRevenue = deliveries
-        .filter(d => d.total_price)
-        .reduce((sum, d) => sum + d.total_price, 0);
-    const avgPrice = total > 0 ? totalRevenue / completed : 0;
-    
-    document.getElementById('totalDeliveries').textContent = total;
-    document.getElementById('completedDeliveries').textContent = completed;
-    document.getElementById('totalRevenue').textContent = `₹${totalRevenue.toFixed(2)}`;
-    document.getElementById('avgPrice').textContent = `₹${avgPrice.toFixed(2)}`;
+function updateStats(stats) {
+    document.getElementById('totalDeliveries').textContent = stats.total_deliveries;
+    document.getElementById('completedDeliveries').textContent = stats.completed;
+    document.getElementById('totalRevenue').textContent = `₹${stats.total_revenue.toFixed(2)}`;
+    document.getElementById('avgPrice').textContent = `₹${stats.average_price.toFixed(2)}`;
 }
 
 function refreshDeliveries() {